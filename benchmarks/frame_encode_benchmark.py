@@ -0,0 +1,68 @@
+import random
+import time
+
+from sport.control_code import SportControlCode as Code
+from sport.frame import Checksum, FrameEncoder
+from util.buffer import WriteBuffer
+
+# Compare the throughput, in frames/second, of `FrameEncoder` with the original byte-at-a-time encoder.
+# Run from this directory with `PYTHONPATH=../lib python frame_encode_benchmark.py`.
+
+_FRAME_COUNT = 200000
+
+
+# The original encoder, which appended each byte via a method call and then summed the frame in a second pass.
+class _OriginalFrameEncoder:
+    def __init__(self, frame):
+        self._frame = frame
+        self._encoded = WriteBuffer(length=16)
+
+    def get_frame(self):
+        return self._frame
+
+    def _append(self, b):
+        if b == Code.ESCAPE or b == Code.START:
+            self._encoded.write_u8(Code.ESCAPE)
+            b ^= Code.ESCAPE_XOR
+        self._encoded.write_u8(b)
+
+    def encode(self):
+        self._encoded.reset_offset()
+
+        for b in self._frame.buffer:
+            self._append(b)
+
+        total = sum(self._frame.buffer)
+        self._append(Checksum.calculate(total))
+
+        return self._encoded.get_buffer()
+
+
+def _time(name, encoder, frames):
+    buffer = encoder.get_frame().buffer
+    start = time.perf_counter()
+    for frame in frames:
+        buffer[:] = frame
+        encoder.encode()
+    elapsed = time.perf_counter() - start
+    print("{:>24}: {:10,.0f} frames/s".format(name, len(frames) / elapsed))
+
+
+def main():
+    rng = random.Random(0)
+    plain = [bytes(rng.randrange(0x7D) for _ in range(7)) for _ in range(_FRAME_COUNT)]
+    escaped = [
+        bytes(rng.choice([0x7D, 0x7E, 0x10]) for _ in range(7))
+        for _ in range(_FRAME_COUNT)
+    ]
+
+    encoder = FrameEncoder()
+    original = _OriginalFrameEncoder(encoder.get_frame())
+
+    _time("original (no escapes)", original, plain)
+    _time("FrameEncoder (no escapes)", encoder, plain)
+    _time("original (escapes)", original, escaped)
+    _time("FrameEncoder (escapes)", encoder, escaped)
+
+
+main()
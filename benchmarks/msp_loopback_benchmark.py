@@ -0,0 +1,96 @@
+import os
+import select
+import threading
+import time
+
+from config.vtx import VtxConfig
+from host.msp_client import DirectPumper, encode_sport_request, encode_uart_v1
+from host.selector_pump_master import SelectorPumpMaster
+from host.serial_transport import create_serial_transport, open_pty_pair
+from msp.command.vtx import MspVtxTableBandCommand
+from msp.uart_pumper import MspUartPumper
+from sport.coordinator import SportCoordinator
+from sport.frame import Frame, FrameId
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import SportPumper
+
+# Compare MSP throughput, in response bytes/second, over a direct serial link and over S.Port. Each request reads
+# a band of the VTX table and the next request is only sent once the previous response has been received.
+# * UART - `MspUartPumper` on one end of a pseudo-terminal pair, so this is CPU-bound.
+# * S.Port - `SportCoordinator` driven directly with request frames and polled for response frames, i.e. without
+#   a bus, so this is also CPU-bound. The S.Port wire limit is shown for comparison.
+# Run from this directory with `PYTHONPATH=../lib python msp_loopback_benchmark.py`.
+
+_REQUEST_COUNT = 2000
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+
+# At 57600 baud, a poll (2 bytes) plus a response frame (at least 8 bytes, 10 bits per byte) takes ~1.7ms. That's
+# the best case, i.e. if every poll were for our physical ID. Each frame carries at most 5 bytes of MSP payload.
+_SPORT_SLOT_BITS = (2 + 8) * 10
+_SPORT_PAYLOAD_PER_FRAME = 5
+
+
+def _create_commands():
+    config = VtxConfig("../vtx_config.json", "../tests/vtx_table.json")
+    return {_BAND: MspVtxTableBandCommand(config)}
+
+
+def _uart():
+    controller, _peripheral, path = open_pty_pair()
+    master = SelectorPumpMaster()
+    master.register(
+        MspUartPumper(path, path, _create_commands(), transport=create_serial_transport)
+    )
+    request = encode_uart_v1(b"<", _BAND, b"\x01")
+    received = [0]
+    done = threading.Event()
+
+    def client():
+        for _ in range(_REQUEST_COUNT):
+            os.write(controller, request)
+            # Responses are small enough to arrive in one read.
+            select.select([controller], [], [])
+            received[0] += len(os.read(controller, 1024))
+        done.set()
+
+    thread = threading.Thread(target=client)
+    start = time.perf_counter()
+    thread.start()
+    while not done.is_set():
+        master.pump_all(timeout=0.01)
+    elapsed = time.perf_counter() - start
+    thread.join()
+    return received[0] / elapsed
+
+
+def _sport():
+    pumper = DirectPumper()
+    coordinator = SportCoordinator(pumper)
+    coordinator.set_commands(_create_commands())
+    receive = pumper.subscribers[PhysicalId.ID13]
+    write_frame = pumper.publishers[PhysicalId.ID27]
+
+    request = Frame()
+    request.set_id(FrameId.MSP_CLIENT)
+    # The request fits in a single frame.
+    request.payload[:] = encode_sport_request(_BAND, b"\x01")[0]
+    response = Frame()
+    received = 0
+
+    start = time.perf_counter()
+    for _ in range(_REQUEST_COUNT):
+        receive(request)
+        while write_frame(response):
+            received += len(response.payload)
+    elapsed = time.perf_counter() - start
+    return received / elapsed
+
+
+def main():
+    print("{:>20}: {:12,.0f} bytes/s".format("UART (pty)", _uart()))
+    print("{:>20}: {:12,.0f} bytes/s".format("S.Port (no bus)", _sport()))
+    wire_limit = SportPumper.BAUD_RATE / _SPORT_SLOT_BITS * _SPORT_PAYLOAD_PER_FRAME
+    print("{:>20}: {:12,.0f} bytes/s".format("S.Port wire limit", wire_limit))
+
+
+main()
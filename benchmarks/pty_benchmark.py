@@ -0,0 +1,49 @@
+import os
+import threading
+import time
+
+from host.selector_pump_master import SelectorPumpMaster
+from host.serial_transport import create_serial_transport, open_pty_pair
+from sbus.sbus_pumper import SbusPumper
+
+# Measure S.BUS throughput, in frames/second, through a pseudo-terminal pair driven by `SelectorPumpMaster`
+# and report how much CPU is used while the line is idle.
+# Run from this directory with `PYTHONPATH=../lib python pty_benchmark.py`.
+
+_FRAME = bytes.fromhex(
+    "0F1A28A2957C07EA05F6CEBF61AD793F2DB7CAFA62870D8500"
+)
+_FRAME_COUNT = 20000
+_IDLE_SECONDS = 1
+
+
+def main():
+    controller, _peripheral, path = open_pty_pair()
+
+    received = [0]
+
+    def subscriber(_):
+        received[0] += 1
+
+    master = SelectorPumpMaster()
+    master.register(SbusPumper(path, subscriber, transport=create_serial_transport))
+
+    writer = threading.Thread(target=lambda: os.write(controller, _FRAME * _FRAME_COUNT))
+
+    start = time.perf_counter()
+    writer.start()
+    while received[0] < _FRAME_COUNT:
+        master.pump_all()
+    elapsed = time.perf_counter() - start
+    writer.join()
+    print("throughput: {:,.0f} frames/s".format(_FRAME_COUNT / elapsed))
+
+    cpu_start = time.process_time()
+    idle_end = time.monotonic() + _IDLE_SECONDS
+    while time.monotonic() < idle_end:
+        master.pump_all(timeout=idle_end - time.monotonic())
+    cpu = time.process_time() - cpu_start
+    print("idle CPU: {:.1f}%".format(100 * cpu / _IDLE_SECONDS))
+
+
+main()
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+
+from sbus.sbus_batch_decoder import decode_capture
+from sbus.sbus_decoder import SbusDecoder
+
+# Compare the throughput, in frames/second, of the byte-at-a-time, chunked and NumPy batch S.BUS decoders.
+# Run from this directory with `PYTHONPATH=../lib python sbus_decode_benchmark.py`.
+
+_FRAME_COUNT = 100000
+
+
+def _create_capture(count):
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, size=(count, 25), dtype=np.uint8)
+    frames[:, 0] = 0x0F
+    frames[:, 24] = 0x00
+    return frames.tobytes()
+
+
+def _time(name, count, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print("{:>12}: {:12,.0f} frames/s".format(name, count / elapsed))
+
+
+def _per_byte(capture):
+    decoder = SbusDecoder()
+    for b in capture:
+        decoder.decode(b)
+
+
+def _chunked(capture):
+    decoder = SbusDecoder()
+    buffer = memoryview(capture)
+    i = 0
+    while i < len(buffer):
+        _, consumed = decoder.decode_into(buffer, i)
+        i += consumed
+
+
+def main():
+    capture = _create_capture(_FRAME_COUNT)
+    # The pure Python decoders are far slower so they get a smaller sample.
+    sample = capture[: len(capture) // 10]
+
+    _time("per-byte", _FRAME_COUNT // 10, lambda: _per_byte(sample))
+    _time("decode_into", _FRAME_COUNT // 10, lambda: _chunked(sample))
+    _time("numpy", _FRAME_COUNT, lambda: decode_capture(capture))
+
+
+main()
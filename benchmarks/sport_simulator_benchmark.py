@@ -0,0 +1,101 @@
+import logging
+import os
+
+from config.vtx import VtxConfig
+from host.sport_simulator import MspClient, SportBusSimulator
+from msp.command.vtx import MspVtxTableBandCommand
+from sensor.sensor import GeneratorSensor
+from sensor.sensor_id import SensorId
+from sport.coordinator import SportCoordinator
+from sport.physical_id import PhysicalId
+from util.util import loop
+
+# Load test `SportPumper` and `SportCoordinator` on a simulated S.Port bus, in virtual time, while varying the number
+# of our own sensors, which MSP responses share our slots with, the number of foreign sensors sharing the bus and the
+# length of CPU stalls, e.g. as caused by saving the config. An MSP client reads a VTX table band over and over. For
+# each combination, this reports the proportion of our slots that we answered in time, the MSP round-trip latency,
+# the sustained MSP throughput and the rate at which our sensor values were sent.
+# Run with `PYTHONPATH=lib python benchmarks/sport_simulator_benchmark.py` from the repo root, or the equivalent
+# from anywhere else.
+
+_DURATION_MS = 60000
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+_CONFIG_FILENAME = os.path.join(_ROOT, "vtx_config.json")
+_TABLE_FILENAME = os.path.join(_ROOT, "tests", "vtx_table.json")
+
+_OWN_COUNTS = (0, 2, 8)
+
+_FOREIGN_IDS = (
+    PhysicalId.ID1,
+    PhysicalId.ID2,
+    PhysicalId.ID3,
+    PhysicalId.ID4,
+    PhysicalId.ID5,
+    PhysicalId.ID6,
+    PhysicalId.ID7,
+    PhysicalId.ID8,
+)
+_FOREIGN_COUNTS = (0, 2, 8)
+
+# `(stall, interval)` in milliseconds.
+_STALLS = ((0, 0), (5, 100), (15, 100), (30, 250))
+
+
+# Like the demo sensors, each loops through the values [0, 99999].
+def _create_sensors(count):
+    return [GeneratorSensor(SensorId.T1_FIRST + i, loop(100000)) for i in range(count)]
+
+
+def _run(config, own_count, foreign_count, stall_ms, interval_ms):
+    client = MspClient(_BAND, b"\x01")
+    simulator = SportBusSimulator(
+        foreign_ids=_FOREIGN_IDS[:foreign_count],
+        msp_client=client,
+        stall_ns=stall_ms * 10**6,
+        stall_interval_ns=interval_ms * 10**6,
+    )
+    coordinator = SportCoordinator(simulator.pumper)
+    coordinator.set_sensors(_create_sensors(own_count))
+    coordinator.set_commands({_BAND: MspVtxTableBandCommand(config)})
+    simulator.run(_DURATION_MS)
+
+    print(
+        "{:>3} {:>7} {:>9} {:>8.1%} {:>11.1f} {:>11.1f} {:>9.1f} {:>9.1f}".format(
+            own_count,
+            foreign_count,
+            "{}/{}ms".format(stall_ms, interval_ms) if stall_ms else "none",
+            simulator.get_hit_rate(),
+            client.get_average_latency() / 10**6,
+            client.latency_max / 10**6,
+            client.response_bytes * 1000 / _DURATION_MS,
+            simulator.sensor_frames * 1000 / _DURATION_MS,
+        )
+    )
+
+
+def main():
+    # Missed slots are expected with stalls - they're counted rather than logged.
+    logging.getLogger("sport_pumper").setLevel(logging.CRITICAL)
+    config = VtxConfig(_CONFIG_FILENAME, _TABLE_FILENAME)
+
+    print(
+        "{:>3} {:>7} {:>9} {:>8} {:>11} {:>11} {:>9} {:>9}".format(
+            "own",
+            "foreign",
+            "stall",
+            "hit rate",
+            "avg rtt ms",
+            "max rtt ms",
+            "bytes/s",
+            "sensor/s",
+        )
+    )
+    for own_count in _OWN_COUNTS:
+        for foreign_count in _FOREIGN_COUNTS:
+            for stall_ms, interval_ms in _STALLS:
+                _run(config, own_count, foreign_count, stall_ms, interval_ms)
+
+
+main()
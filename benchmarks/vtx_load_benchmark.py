@@ -0,0 +1,77 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+
+from config.vtx import VtxConfig, VtxDeviceType
+from config.vtx_table import VtxTable, compile_table
+
+# Compare the load time and memory use of the VTX table and config when loaded from JSON versus the binary
+# formats created by `host-vtx-convert.py`. "legacy" is the original namedtuple-based table, kept here for
+# comparison. Numbers are for CPython on the host - on a microcontroller the differences are much larger.
+# Run from this directory with `PYTHONPATH=../lib python vtx_load_benchmark.py`.
+
+_TABLE_FILENAME = "../tests/vtx_table.json"
+_CONFIG_FILENAME = "../vtx_config.json"
+_LOAD_COUNT = 2000
+
+_Band = namedtuple("Band", ["name", "letter", "is_factory_band", "frequencies"])
+_Level = namedtuple("VtxPowerLevel", ["value", "label"])
+
+
+def _legacy_table(filename):
+    with open(filename) as f:
+        table = json.load(f)["vtx_table"]
+    bands = [
+        _Band(
+            d["name"].encode(), ord(d["letter"]), d["is_factory_band"], d["frequencies"]
+        )
+        for d in table["bands_list"]
+    ]
+    levels = [
+        _Level(d["value"], d["label"].encode()) for d in table["powerlevels_list"]
+    ]
+    return bands, levels
+
+
+def _measure(name, load):
+    start = time.perf_counter()
+    for _ in range(_LOAD_COUNT):
+        load()
+    elapsed_us = (time.perf_counter() - start) / _LOAD_COUNT * 1e6
+
+    tracemalloc.start()
+    result = load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(
+        "{:>14}: {:8.1f} us {:8,d} B retained {:8,d} B peak".format(
+            name, elapsed_us, retained, peak
+        )
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        table_bin = os.path.join(directory, "vtx_table.bin")
+        config_bin = os.path.join(directory, "vtx_config.bin")
+        with open(table_bin, "wb") as f:
+            f.write(compile_table(_TABLE_FILENAME))
+        with open(_CONFIG_FILENAME) as f:
+            store = json.load(f)
+        store["type"] = getattr(VtxDeviceType, store["type"])
+        with open(config_bin, "wb") as f:
+            f.write(VtxConfig.pack(store))
+
+        _measure("table legacy", lambda: _legacy_table(_TABLE_FILENAME))
+        _measure("table json", lambda: VtxTable(_TABLE_FILENAME))
+        _measure("table binary", lambda: VtxTable(table_bin))
+        _measure("config json", lambda: VtxConfig(_CONFIG_FILENAME, table_bin))
+        _measure("config binary", lambda: VtxConfig(config_bin, table_bin))
+
+
+main()
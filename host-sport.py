@@ -0,0 +1,117 @@
+import argparse
+
+from app.main import Main
+from host.async_main import AsyncMain
+from host.select_wait import SelectWait
+from host.selector_pump_master import SelectorPumpMaster
+from host.serial_transport import create_serial_transport
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import SportPumper
+from util import metrics
+from util.slot_stats import SlotStats
+from util.wait_strategy import SleepWait, SpinWait
+
+# Run the same stack as `code-sport.py` on a Linux host, e.g. a companion computer, with serial devices or
+# pseudo-terminals in place of the board's UARTs. Run with `lib` on the path:
+# $ PYTHONPATH=lib python host-sport.py --sport /dev/ttyUSB0 --sbus /dev/ttyUSB1
+
+# How the S.Port pumper waits for echoes - see `util/wait_strategy.py`. `yield` is the board's default.
+_WAIT_STRATEGIES = {
+    "spin": SpinWait,
+    "yield": lambda: None,
+    "sleep": lambda: SleepWait(SportPumper.BAUD_RATE),
+    "select": SelectWait,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="S.Port/S.BUS stack on a Linux host")
+    parser.add_argument("--sport", help="S.Port serial device")
+    parser.add_argument("--sbus", help="S.BUS serial device")
+    parser.add_argument(
+        "--msp", help="serial device for MSP requests from e.g. a configurator"
+    )
+    parser.add_argument(
+        "--no-echo",
+        action="store_true",
+        help="the S.Port device doesn't echo transmitted bytes, e.g. it's a pseudo-terminal",
+    )
+    parser.add_argument(
+        "--asyncio",
+        action="store_true",
+        help="use one asyncio task per bus rather than a selectors-based loop",
+    )
+    parser.add_argument(
+        "--wait",
+        choices=_WAIT_STRATEGIES.keys(),
+        help="how to wait for echoed bytes (default: select)",
+    )
+    parser.add_argument("--config", default="vtx_config.json")
+    parser.add_argument("--table", default="vtx_table.json")
+    parser.add_argument(
+        "--slot-stats",
+        action="store_true",
+        help="record S.Port slot timings and print them on exit",
+    )
+    parser.add_argument(
+        "--rx-stats",
+        action="store_true",
+        help="measure pump intervals and print receive statistics on exit",
+    )
+    parser.add_argument(
+        "--sport-rx-buffer", type=int, default=0, help="S.Port receive buffer length"
+    )
+    parser.add_argument(
+        "--sbus-rx-buffer", type=int, default=0, help="S.BUS receive buffer length"
+    )
+    args = parser.parse_args()
+    if args.msp and args.asyncio:
+        parser.error("--msp isn't supported with --asyncio")
+    # The asyncio pumper checks echoes as they're read, rather than waiting for them.
+    if args.wait and args.asyncio:
+        parser.error("--wait isn't supported with --asyncio")
+
+    slot_stats = SlotStats() if args.slot_stats else None
+    kwargs = {
+        "echo": not args.no_echo,
+        "config_filename": args.config,
+        "table_filename": args.table,
+        "slot_stats": slot_stats,
+        "sport_rx_buffer_len": args.sport_rx_buffer,
+        "sbus_rx_buffer_len": args.sbus_rx_buffer,
+        "timed_rx_stats": args.rx_stats,
+    }
+
+    if args.asyncio:
+        app = AsyncMain(args.sport, args.sbus, **kwargs)
+    else:
+        app = Main(
+            args.sport,
+            args.sport,
+            args.sbus,
+            transport=create_serial_transport,
+            pump_master=SelectorPumpMaster(),
+            msp_tx=args.msp,
+            msp_rx=args.msp,
+            sport_wait=_WAIT_STRATEGIES[args.wait if args.wait else "select"](),
+            **kwargs
+        )
+
+    try:
+        app.run()
+    except KeyboardInterrupt:
+        if slot_stats:
+            slot_stats.dump(PhysicalId.name)
+        pumper = app.get_sport_pumper()
+        echo_verifier = pumper.get_echo_verifier() if pumper else None
+        if echo_verifier:
+            echo_verifier.dump()
+        metrics.registry.dump()
+        if args.rx_stats:
+            if pumper:
+                pumper.get_rx_stats().dump("S.Port")
+            if app.get_sbus_pumper():
+                app.get_sbus_pumper().get_rx_stats().dump("S.BUS")
+
+
+main()
@@ -0,0 +1,40 @@
+import argparse
+import json
+
+from config.vtx import VtxConfig, VtxDeviceType
+from config.vtx_table import compile_table
+
+# Convert `vtx_table.json` and `vtx_config.json` to the binary formats that `VtxTable` and `VtxConfig` load
+# directly, avoiding JSON parsing at boot. Run with `lib` on the path:
+# $ PYTHONPATH=lib python host-vtx-convert.py vtx_table.json vtx_config.json
+
+
+def _convert_config(filename):
+    with open(filename) as f:
+        store = json.load(f)
+    store["type"] = getattr(VtxDeviceType, store["type"])
+    return VtxConfig.pack(store)
+
+
+def _convert(filename):
+    with open(filename) as f:
+        is_table = "vtx_table" in json.load(f)
+    return compile_table(filename) if is_table else _convert_config(filename)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="convert VTX JSON files to binary")
+    parser.add_argument(
+        "files", nargs="+", help="VTX table or config JSON files - written as .bin"
+    )
+    args = parser.parse_args()
+
+    for filename in args.files:
+        data = _convert(filename)
+        out_filename = filename.rsplit(".", 1)[0] + ".bin"
+        with open(out_filename, "wb") as f:
+            f.write(data)
+        print("{} -> {} ({} bytes)".format(filename, out_filename, len(data)))
+
+
+main()
@@ -0,0 +1,208 @@
+import logging
+
+from msp.command.core import (
+    MspApiVersionCommand,
+    MspMultipleCommand,
+    MspSaveAllCommand,
+)
+from msp.command.vtx import (
+    MspVtxConfigCommand,
+    MspVtxTableBandCommand,
+    MspVtxTablePowerLevelCommand,
+    MspSetVtxConfigCommand,
+)
+from config.vtx import VtxConfig
+from config.write_behind import WriteBehindSaver
+from msp.response_cache import MspResponseCache
+from msp.uart_pumper import MspUartPumper
+from sbus.sbus_pumper import SbusPumper
+from sensor.demo import create_demo_2_sensor, create_demo_1_sensor
+from sensor.health import create_health_sensors, HEALTH_SCHEDULE
+from sensor.scheduler import SensorScheduler
+from sport.coordinator import SportCoordinator
+from sport.sport_pumper import SportPumper
+from util.uart_pumper import PumpMaster
+from util.wait_strategy import SpinYieldWait
+
+_logger = logging.getLogger("main")
+
+
+def dump_sbus_frame(frame):
+    print(":".join("{:03X}".format(ch) for ch in frame.channels))
+
+    print("lost_frame:", frame.lost_frame)
+    print("failsafe:", frame.failsafe)
+
+
+# A background task that dumps the latest S.BUS frame. The S.BUS pumper may be pumped while the S.Port pumper
+# waits for an echo, see `_get_sport_wait`, so its subscriber mustn't do anything slow like console output.
+class _SbusFrameDumper:
+    def __init__(self):
+        self._frame = None
+
+    def receive(self, frame):
+        self._frame = frame
+
+    def has_work(self):
+        return self._frame is not None
+
+    def pump(self):
+        frame = self._frame
+        if frame is not None:
+            self._frame = None
+            dump_sbus_frame(frame)
+
+
+# On the board, the pins are `board` pins and the defaults are used for everything else. On a host, the pins are
+# device paths and `transport` and `pump_master` come from the `host` package - see `host-sport.py`.
+# `sport_wait` is the `WaitStrategy` used by the S.Port pumper while waiting for echoes. By default, it spins
+# briefly and then pumps the S.BUS pumper so that S.BUS isn't starved while S.Port transmits - S.BUS frames are
+# only dumped later, by a background task, to keep console output out of the wait.
+# The receive buffer lengths and `timed_rx_stats` are passed to the pumpers - see `UartPumper` and `RxStats`.
+class Main:
+    def __init__(
+        self,
+        sport_tx,
+        sport_rx,
+        sbus_rx,
+        transport=None,
+        pump_master=None,
+        echo=True,
+        config_filename="vtx_config.json",
+        table_filename="vtx_table.json",
+        slot_stats=None,
+        msp_tx=None,
+        msp_rx=None,
+        msp_baud_rate=MspUartPumper.DEFAULT_BAUD_RATE,
+        sport_wait=None,
+        sport_rx_buffer_len=0,
+        sbus_rx_buffer_len=0,
+        timed_rx_stats=False,
+    ):
+        self._sport_tx = sport_tx
+        self._sport_rx = sport_rx
+        self._sbus_rx = sbus_rx
+        self._transport = transport
+        self._pump_master = pump_master if pump_master else PumpMaster()
+        self._echo = echo
+        self._config_filename = config_filename
+        self._table_filename = table_filename
+        self._slot_stats = slot_stats
+        self._msp_tx = msp_tx
+        self._msp_rx = msp_rx
+        self._msp_baud_rate = msp_baud_rate
+        self._saver = WriteBehindSaver()
+        self._sport_wait = sport_wait
+        self._sport_rx_buffer_len = sport_rx_buffer_len
+        self._sbus_rx_buffer_len = sbus_rx_buffer_len
+        self._timed_rx_stats = timed_rx_stats
+        self._sport_pumper = None
+        self._sbus_pumper = None
+
+    def _get_commands(self, response_cache):
+        vtx_config = VtxConfig(self._config_filename, self._table_filename)
+        vtx_config.add_listener(response_cache.invalidate)
+        configs = [vtx_config]  # At the moment there's just the VTX config.
+        commands = [
+            MspApiVersionCommand(),
+            MspVtxConfigCommand(vtx_config),
+            MspVtxTableBandCommand(vtx_config),
+            MspVtxTablePowerLevelCommand(vtx_config),
+            MspSetVtxConfigCommand(vtx_config),
+            MspSaveAllCommand(configs, self._saver),
+        ]
+        commands = {c.id: c for c in commands}
+        multiple = MspMultipleCommand(commands)
+        commands[multiple.id] = multiple
+        return commands
+
+    # The health sensors report bus-health metrics, e.g. checksum errors, to the radio. Unlike the other sensors,
+    # they're only sent occasionally - see `HEALTH_SCHEDULE`.
+    @staticmethod
+    def _get_scheduler():
+        scheduler = SensorScheduler()
+        scheduler.add(create_demo_1_sensor())
+        scheduler.add(create_demo_2_sensor())
+        for sensor in create_health_sensors():
+            scheduler.add(sensor, **HEALTH_SCHEDULE)
+        return scheduler
+
+    def _create_sport_pumper(self):
+        return SportPumper(
+            self._sport_tx,
+            self._sport_rx,
+            echo=self._echo,
+            transport=self._transport,
+            slot_stats=self._slot_stats,
+            wait=self._get_sport_wait(),
+            rx_buffer_len=self._sport_rx_buffer_len,
+            timed_rx_stats=self._timed_rx_stats,
+        )
+
+    def _get_sport_wait(self):
+        if self._sport_wait:
+            return self._sport_wait
+        on_yield = self._sbus_pumper.pump if self._sbus_pumper else None
+        return SpinYieldWait(on_yield=on_yield)
+
+    def _create_sbus_pumper(self, subscriber):
+        return SbusPumper(
+            self._sbus_rx,
+            subscriber,
+            transport=self._transport,
+            rx_buffer_len=self._sbus_rx_buffer_len,
+            timed_rx_stats=self._timed_rx_stats,
+        )
+
+    # These return `None` until `setup` has been called or if the bus isn't enabled.
+
+    def get_sport_pumper(self):
+        return self._sport_pumper
+
+    def get_sbus_pumper(self):
+        return self._sbus_pumper
+
+    def _setup_sport(self, master, commands, response_cache):
+        pumper = self._create_sport_pumper()
+        self._sport_pumper = pumper
+        coordinator = SportCoordinator(pumper)
+        coordinator.set_scheduler(self._get_scheduler())
+        coordinator.set_response_cache(response_cache)
+        coordinator.set_commands(commands)
+        master.register(pumper)
+
+    # MSP requests can also be served on a direct serial link - both links share the same commands.
+    def _setup_msp(self, master, commands, response_cache):
+        pumper = MspUartPumper(
+            self._msp_tx,
+            self._msp_rx,
+            commands,
+            baud_rate=self._msp_baud_rate,
+            response_cache=response_cache,
+            transport=self._transport,
+        )
+        master.register(pumper)
+
+    def setup(self):
+        self._pump_master.register_background(self._saver)
+        # The S.BUS pumper is created first, so the S.Port pumper can yield to it, but registered last.
+        if self._sbus_rx is not None:
+            dumper = _SbusFrameDumper()
+            self._pump_master.register_background(dumper)
+            self._sbus_pumper = self._create_sbus_pumper(dumper.receive)
+        if self._sport_rx is not None or self._msp_rx is not None:
+            response_cache = MspResponseCache()
+            commands = self._get_commands(response_cache)
+            if self._sport_rx is not None:
+                self._setup_sport(self._pump_master, commands, response_cache)
+            if self._msp_rx is not None:
+                self._setup_msp(self._pump_master, commands, response_cache)
+        if self._sbus_pumper:
+            self._pump_master.register(self._sbus_pumper)
+        return self._pump_master
+
+    def run(self):
+        pump_master = self.setup()
+
+        while True:
+            pump_master.pump_all()
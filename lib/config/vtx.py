@@ -1,8 +1,13 @@
 import json
+import logging
+import struct
 
 from config.vtx_table import VtxTable
+from config.write_behind import recover_saved
 from util.util import get_field_name
 
+_logger = logging.getLogger("vtx_config")
+
 
 # From `vtxDevType_e` in Betaflight src/main/drivers/vtx_common.h
 class VtxDeviceType:
@@ -12,15 +17,40 @@ class VtxDeviceType:
     TRAMP = 4
 
 
+# The config can be stored as JSON or, if the filename ends with `.bin`, in a compact binary layout that's
+# faster to load - see `host-vtx-convert.py`. Saves are written back in the same format. If the binary file is
+# missing or unusable, e.g. it predates a change to the layout, the JSON file of the same name is loaded instead
+# and the next save replaces the binary file.
 class VtxConfig:
+    MAGIC = b"VTXC"
+    VERSION = 1
+
+    # Note: CircuitPython doesn't support '?' as the format character for booleans.
+    _STRUCT_FORMAT = "<4sBBBBBBHBBBH"
+    _STRUCT_LEN = struct.calcsize(_STRUCT_FORMAT)
+    _FIELDS = (
+        "type",
+        "ready",
+        "use_vtx_table",
+        "low_power_disarm",
+        "pit_mode",
+        "pit_mode_freq",
+        "power",
+        "band",
+        "channel",
+        "freq",
+    )
+    _BOOLEAN_FIELDS = ("ready", "use_vtx_table", "pit_mode")
+
     def __init__(
         self, config_filename="vtx_config.json", table_filename="vtx_table.json"
     ):
         self._filename = config_filename
+        self._listeners = []
 
         store = self._load()
 
-        self.type = getattr(VtxDeviceType, store["type"])
+        self.type = store["type"]
         self.ready = store["ready"]
 
         self.use_vtx_table = store["use_vtx_table"]
@@ -41,19 +71,78 @@ class VtxConfig:
         self.set_frequency(self.band, self.channel, self.freq)
 
     # `freq` is normally determined from `band` and `channel` but you can set them to 0 and set `freq` directly.
+    # If `freq` is in the table then `band` and `channel` are set to match it.
     def set_frequency(self, band=0, channel=0, freq=0):
+        if band == 0:
+            found = self.table.find_band_channel(freq)
+            if found is not None:
+                band = found[0] + 1
+                channel = found[1] + 1
+        else:
+            freq = self.table.get_freq(band - 1, channel - 1)
         self.band = band
         self.channel = channel
-        self.freq = freq if band == 0 else self.table.get_freq(band - 1, channel - 1)
+        self.freq = freq
+        self.changed()
 
-    def _load(self):
-        with open(self._filename) as f:
-            return json.load(f)
+    # Listeners are called with this config whenever it changes, e.g. to invalidate cached MSP responses.
+    def add_listener(self, listener):
+        self._listeners.append(listener)
 
-    # Saving is very slow - so incoming requests may back up and we may miss transmission slots.
-    def save(self):
+    # Must be called after changing any fields directly.
+    def changed(self):
+        for listener in self._listeners:
+            listener(self)
+
+    def _is_binary(self):
+        return self._filename.endswith(".bin")
+
+    def _load(self):
+        filename = recover_saved(self._filename)
+        if not self._is_binary():
+            return self._load_json(filename)
+        try:
+            with open(filename, "rb") as f:
+                return self.unpack(f.read())
+        except (OSError, ValueError) as e:
+            json_filename = self._filename[: -len(".bin")] + ".json"
+            _logger.error("%s - loading %s instead", e, json_filename)
+            return self._load_json(json_filename)
+
+    @staticmethod
+    def _load_json(filename):
+        with open(filename) as f:
+            store = json.load(f)
+        store["type"] = getattr(VtxDeviceType, store["type"])
+        return store
+
+    # Unpack the binary layout to the same dictionary form as the JSON file (except that `type` is a value).
+    @classmethod
+    def unpack(cls, data):
+        if len(data) != cls._STRUCT_LEN:
+            raise ValueError(
+                "VTX config is {} bytes, expected {}".format(len(data), cls._STRUCT_LEN)
+            )
+        values = struct.unpack(cls._STRUCT_FORMAT, data)
+        if values[0] != cls.MAGIC or values[1] != cls.VERSION:
+            raise ValueError("unsupported VTX config format")
+        store = dict(zip(cls._FIELDS, values[2:]))
+        for name in cls._BOOLEAN_FIELDS:
+            store[name] = bool(store[name])
+        return store
+
+    @classmethod
+    def pack(cls, store):
+        values = (int(store.get(name, 0)) for name in cls._FIELDS)
+        return struct.pack(cls._STRUCT_FORMAT, cls.MAGIC, cls.VERSION, *values)
+
+    def get_filename(self):
+        return self._filename
+
+    # Returns the config as bytes in the format that it was loaded from.
+    def serialize(self):
         store = {
-            "type": get_field_name(VtxDeviceType, self.type),
+            "type": self.type,
             "ready": self.ready,
             "use_vtx_table": self.use_vtx_table,
             "low_power_disarm": self.low_power_disarm,
@@ -63,7 +152,16 @@ class VtxConfig:
             "band": self.band,
             "channel": self.channel,
         }
+        if self._is_binary():
+            store["freq"] = self.freq
+            return self.pack(store)
+        store["type"] = get_field_name(VtxDeviceType, self.type)
         if self.band == 0:
             store["freq"] = self.freq
-        with open(self._filename, "w") as f:
-            json.dump(store, f)
+        return json.dumps(store).encode()
+
+    # Saving is very slow - so incoming requests may back up and we may miss transmission slots.
+    # Use `WriteBehindSaver` to save in small increments instead.
+    def save(self):
+        with open(self._filename, "wb") as f:
+            f.write(self.serialize())
@@ -1,36 +1,197 @@
 import json
-from collections import namedtuple
+import struct
+from array import array
 
+from util.util import repeat
 
-VtxPowerLevel = namedtuple("VtxPowerLevel", ["value", "label"])
 
-VtxBand = namedtuple("Band", ["name", "letter", "is_factory_band", "frequencies"])
+# The table is held as a single block of fixed-layout records, read via `struct.unpack_from` and memoryview
+# slices, rather than as a graph of namedtuples, lists and strings. The block can be loaded directly from a
+# binary file created with `host-vtx-convert.py` or compiled from the JSON file at boot (which is slower).
+#
+# Layout (little-endian):
+# * header - magic, version, band count, channel count, level count, name length and label length.
+# * band records - name length, name (padded to name length), letter, is-factory-band, frequency count and
+#   frequencies (channel count u16 values, padded with zeros).
+# * level records - value (u16), label length and label (padded to label length).
+#
+# At load, the frequencies are also copied to a flat band x channel `array("H")`, for `get_freq`, and a reverse
+# index is built, for `find_band_channel`, as an array of frequencies, sorted, and a parallel array of slots,
+# i.e. `band * channel_count + channel`.
+class VtxTable:
+    MAGIC = b"VTXT"
+    VERSION = 1
 
+    _HEADER_FORMAT = "<4sBBBBBB"
+    _HEADER_LEN = struct.calcsize(_HEADER_FORMAT)
+
+    # Band record fields before the name and between the name and the frequencies.
+    _BAND_NAME_OFFSET = 1
+    _BAND_FIELDS_LEN = 3
+
+    _LEVEL_LABEL_OFFSET = 3
 
-class VtxTable:
     def __init__(self, filename):
-        # In CircuitPython strings are automatically interned. So parsing JSON is reasonably
-        # space efficient, e.g. you don't end up with multiple strings for repeated keys.
-        with open(filename) as f:
-            table = json.load(f)["vtx_table"]
+        if filename.endswith(".json"):
+            data = compile_table(filename)
+        else:
+            with open(filename, "rb") as f:
+                data = f.read()
+
+        (
+            magic,
+            version,
+            self.band_count,
+            self.channel_count,
+            self.level_count,
+            self._name_len,
+            self._label_len,
+        ) = struct.unpack_from(self._HEADER_FORMAT, data)
+
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("unsupported VTX table format")
+
+        self._data = memoryview(data)
+        self._band_len = (
+            self._BAND_NAME_OFFSET
+            + self._name_len
+            + self._BAND_FIELDS_LEN
+            + 2 * self.channel_count
+        )
+        self._level_len = self._LEVEL_LABEL_OFFSET + self._label_len
+        self._levels_offset = self._HEADER_LEN + self.band_count * self._band_len
 
-        def to_band(d):
-            return VtxBand(
-                d["name"].encode(),
-                ord(d["letter"]),
-                d["is_factory_band"],
-                d["frequencies"],
-            )
+        self._frequencies = self._load_frequencies()
+        self._index_freqs, self._index_slots = self._build_index(self._frequencies)
 
-        def to_level(d):
-            return VtxPowerLevel(d["value"], d["label"].encode())
+    def _load_frequencies(self):
+        frequencies = array("H", repeat(0, self.band_count * self.channel_count))
+        slot = 0
+        for band in range(self.band_count):
+            offset = self._band_fields_offset(band) + self._BAND_FIELDS_LEN
+            for _ in range(self.channel_count):
+                frequencies[slot] = struct.unpack_from("<H", self._data, offset)[0]
+                offset += 2
+                slot += 1
+        return frequencies
 
-        self.bands_list = [to_band(d) for d in table["bands_list"]]
-        self.levels_list = [to_level(d) for d in table["powerlevels_list"]]
+    # Unused channels, i.e. with frequency 0, aren't indexed. Where a frequency appears more than once, the
+    # lowest band and channel wins.
+    @staticmethod
+    def _build_index(frequencies):
+        slots = [slot for slot in range(len(frequencies)) if frequencies[slot] != 0]
+        slots.sort(key=lambda slot: (frequencies[slot], slot))
+        return array("H", [frequencies[slot] for slot in slots]), array("H", slots)
 
-        self.band_count = len(self.bands_list)
-        self.channel_count = max([len(band.frequencies) for band in self.bands_list])
-        self.level_count = len(self.levels_list)
+    # All `band`, `channel` and `level` values are zero-based.
+
+    def get_band_name(self, band):
+        offset = self._band_offset(band)
+        length = self._data[offset]
+        offset += self._BAND_NAME_OFFSET
+        return self._data[offset : offset + length]
+
+    def get_band_letter(self, band):
+        return self._data[self._band_fields_offset(band)]
+
+    def is_factory_band(self, band):
+        return self._data[self._band_fields_offset(band) + 1] != 0
+
+    def get_frequency_count(self, band):
+        return self._data[self._band_fields_offset(band) + 2]
+
+    # The band's frequencies as little-endian u16 values, i.e. ready to be written to an MSP response.
+    def get_frequencies(self, band):
+        offset = self._band_fields_offset(band) + self._BAND_FIELDS_LEN
+        return self._data[offset : offset + 2 * self.get_frequency_count(band)]
 
     def get_freq(self, band, channel):
-        return self.bands_list[band].frequencies[channel]
+        if not 0 <= channel < self.get_frequency_count(band):
+            raise IndexError("channel out of range")
+        return self._frequencies[band * self.channel_count + channel]
+
+    # Returns the `(band, channel)` with the given frequency or `None` if it's not in the table.
+    def find_band_channel(self, freq):
+        freqs = self._index_freqs
+        low = 0
+        high = len(freqs)
+        while low < high:
+            mid = (low + high) // 2
+            if freqs[mid] < freq:
+                low = mid + 1
+            else:
+                high = mid
+        if low == len(freqs) or freqs[low] != freq:
+            return None
+        return divmod(self._index_slots[low], self.channel_count)
+
+    def get_level_value(self, level):
+        return struct.unpack_from("<H", self._data, self._level_offset(level))[0]
+
+    def get_level_label(self, level):
+        offset = self._level_offset(level)
+        length = self._data[offset + 2]
+        offset += self._LEVEL_LABEL_OFFSET
+        return self._data[offset : offset + length]
+
+    def _band_offset(self, band):
+        if not 0 <= band < self.band_count:
+            raise IndexError("band out of range")
+        return self._HEADER_LEN + band * self._band_len
+
+    def _band_fields_offset(self, band):
+        return self._band_offset(band) + self._BAND_NAME_OFFSET + self._name_len
+
+    def _level_offset(self, level):
+        if not 0 <= level < self.level_count:
+            raise IndexError("level out of range")
+        return self._levels_offset + level * self._level_len
+
+
+# Compile a Betaflight VTX table JSON file to the binary layout described above.
+def compile_table(filename):
+    # In CircuitPython strings are automatically interned. So parsing JSON is reasonably
+    # space efficient, e.g. you don't end up with multiple strings for repeated keys.
+    with open(filename) as f:
+        table = json.load(f)["vtx_table"]
+
+    bands = table["bands_list"]
+    levels = table["powerlevels_list"]
+
+    names = [band["name"].encode() for band in bands]
+    labels = [level["label"].encode() for level in levels]
+    name_len = max(len(name) for name in names)
+    label_len = max(len(label) for label in labels)
+    channel_count = max(len(band["frequencies"]) for band in bands)
+
+    band_format = "<B{}sBBB{}H".format(name_len, channel_count)
+    level_format = "<HB{}s".format(label_len)
+
+    data = bytearray(
+        struct.pack(
+            VtxTable._HEADER_FORMAT,
+            VtxTable.MAGIC,
+            VtxTable.VERSION,
+            len(bands),
+            channel_count,
+            len(levels),
+            name_len,
+            label_len,
+        )
+    )
+    for band, name in zip(bands, names):
+        frequencies = band["frequencies"]
+        padding = [0] * (channel_count - len(frequencies))
+        data += struct.pack(
+            band_format,
+            len(name),
+            name,
+            ord(band["letter"]),
+            int(band["is_factory_band"]),
+            len(frequencies),
+            *(frequencies + padding)
+        )
+    for level, label in zip(levels, labels):
+        data += struct.pack(level_format, level["value"], len(label), label)
+
+    return bytes(data)
@@ -0,0 +1,120 @@
+import logging
+import os
+
+_logger = logging.getLogger("write_behind")
+
+
+def _temp_filename(filename):
+    return filename + ".tmp"
+
+
+def _exists(filename):
+    try:
+        os.stat(filename)
+        return True
+    except OSError:
+        return False
+
+
+# Returns the name of the file to load `filename` from. If a save was interrupted after the old file was removed,
+# the temporary file, which is complete by then, is renamed to `filename` or, if that fails, its name is returned.
+def recover_saved(filename):
+    temp_filename = _temp_filename(filename)
+    if _exists(filename) or not _exists(temp_filename):
+        return filename
+    _logger.warning("recovering %s from %s", filename, temp_filename)
+    try:
+        os.rename(temp_filename, filename)
+    except OSError:
+        # E.g. the file-system is read-only - see `boot.py`.
+        return temp_filename
+    return filename
+
+
+# Saves configs in small increments, driven by `PumpMaster`, so that a save never holds up the pumpers for long.
+# Saves are coalesced - requesting a save of a config that's already waiting to be saved does nothing.
+# A config must provide `get_filename` and `serialize`, which returns bytes. The file is written to a temporary
+# file first and then renamed so that an interrupted save doesn't leave a truncated config behind. CircuitPython
+# won't rename over an existing file, so the old file is removed first - if the save is interrupted between the
+# two, only the temporary file is left and configs must load via `recover_saved`.
+class WriteBehindSaver:
+    IDLE = 0
+    PENDING = 1
+    FAILED = 2
+
+    _CHUNK_LEN = 64
+
+    def __init__(self, chunk_len=_CHUNK_LEN):
+        self._chunk_len = chunk_len
+        self._pending = []
+        self._job = None
+        self._failed = False
+        self.completed = 0
+        self.failures = 0
+
+    # Returns true if a save has failed since the previous request, so that the failure can be reported.
+    def request_save(self, configs):
+        for config in configs:
+            if config not in self._pending:
+                self._pending.append(config)
+        failed = self._failed
+        self._failed = False
+        return failed
+
+    def has_work(self):
+        return self._job is not None or len(self._pending) > 0
+
+    # `PENDING` until all requested saves have completed, then `IDLE`, or `FAILED` if any of them failed.
+    def get_status(self):
+        if self.has_work():
+            return self.PENDING
+        return self.FAILED if self._failed else self.IDLE
+
+    # Do the next increment of work, if any.
+    def pump(self):
+        if self._job is None:
+            if not self._pending:
+                return
+            self._job = self._save(self._pending.pop(0))
+        try:
+            next(self._job)
+        except StopIteration:
+            self._job = None
+            self.completed += 1
+        except Exception as e:
+            # Usually an `OSError` because the file-system needs to be remounted - see `boot.py` - but anything
+            # raised by the config, e.g. by `serialize`, must not escape into the pump loop either.
+            self._job = None
+            self._failed = True
+            self.failures += 1
+            _logger.error("save failed - %s", e)
+
+    # Each step between yields is one increment.
+    def _save(self, config):
+        filename = config.get_filename()
+        temp_filename = _temp_filename(filename)
+        data = memoryview(config.serialize())
+        yield
+        try:
+            with open(temp_filename, "wb") as f:
+                yield
+                for start in range(0, len(data), self._chunk_len):
+                    f.write(data[start : start + self._chunk_len])
+                    yield
+        except Exception:
+            # Don't leave a partial file taking up what little space there is. Once the temporary file is complete,
+            # it's kept even if the rename fails as, by then, it may be the only copy of the config.
+            self._remove(temp_filename)
+            raise
+        yield
+        # CircuitPython won't rename over an existing file.
+        self._remove(filename)
+        yield
+        os.rename(temp_filename, filename)
+
+    @staticmethod
+    def _remove(filename):
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
@@ -0,0 +1,42 @@
+import asyncio
+
+from app.main import Main
+from host.async_pumpers import AsyncPumpMaster, AsyncSbusPumper, AsyncSportPumper
+
+# Host-only - runs the same stack as `Main` but with one asyncio task per bus.
+
+
+class AsyncMain(Main):
+    def __init__(self, sport_path, sbus_path, **kwargs):
+        super().__init__(
+            sport_path, sport_path, sbus_path, pump_master=AsyncPumpMaster(), **kwargs
+        )
+        self._sport_streams = None
+        self._sbus_reader = None
+
+    def _create_sport_pumper(self):
+        return AsyncSportPumper(
+            *self._sport_streams,
+            echo=self._echo,
+            slot_stats=self._slot_stats,
+            rx_buffer_len=self._sport_rx_buffer_len,
+            timed_rx_stats=self._timed_rx_stats,
+        )
+
+    def _create_sbus_pumper(self, subscriber):
+        return AsyncSbusPumper(
+            self._sbus_reader,
+            subscriber,
+            rx_buffer_len=self._sbus_rx_buffer_len,
+            timed_rx_stats=self._timed_rx_stats,
+        )
+
+    async def _run(self):
+        if self._sport_rx is not None:
+            self._sport_streams = await AsyncSportPumper.open_streams(self._sport_rx)
+        if self._sbus_rx is not None:
+            self._sbus_reader, _ = await AsyncSbusPumper.open_streams(self._sbus_rx)
+        await self.setup().run()
+
+    def run(self):
+        asyncio.run(self._run())
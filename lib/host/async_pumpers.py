@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+
+from host.serial_transport import configure_serial, open_serial_fd
+from sbus.sbus_pumper import SbusPumper
+from sport.frame import FrameEncoder
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import SportPumper, MISSED_SLOTS_METRIC
+from util import metrics
+from util.blocking_reader import BlockingReader
+from util.echo_verifier import ECHO_ERRORS_METRIC
+from util.slot_stats import SlotStats
+from util.uart_pumper import PumpMaster
+
+_logger = logging.getLogger("async_pumpers")
+
+_metrics = metrics.registry.values
+_MISSED_SLOTS = metrics.registry.counter(MISSED_SLOTS_METRIC)
+_ECHO_ERRORS = metrics.registry.counter(ECHO_ERRORS_METRIC)
+
+# Host-only - asyncio variants of the pumpers. Rather than being polled round-robin by `PumpMaster.pump_all`,
+# each bus has its own task that's woken by its `StreamReader` when data arrives.
+
+
+# Open a serial device, or pseudo-terminal, as a reader and writer pair.
+async def open_serial_streams(path, baud_rate):
+    loop = asyncio.get_running_loop()
+    fd = open_serial_fd(path)
+    configure_serial(fd, baud_rate)
+
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, "rb", 0)
+    )
+    transport, protocol = await loop.connect_write_pipe(
+        lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader()),
+        os.fdopen(os.dup(fd), "wb", 0),
+    )
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    return reader, writer
+
+
+# Adapts a `StreamWriter` to the transport interface used by `UartPumper`. Reading is done by the pumper's task
+# rather than through the transport.
+class _StreamTransport:
+    def __init__(self, writer):
+        self._writer = writer
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def readinto(self, _):
+        return None
+
+    def write(self, buffer):
+        self._writer.write(buffer)
+
+
+# Shared by the async pumpers - `_reader` must be set by the subclass. Each read is of up to the pumper's receive
+# buffer length and, if `timed_rx_stats` was set, counts as a pump for `RxStats`.
+class _AsyncPumping:
+    _chunk_time = 0
+
+    async def _read_loop(self):
+        loop = asyncio.get_running_loop()
+        read_len = len(self._rx_buffer)
+        stats = self._rx_stats
+        while True:
+            data = await self._reader.read(read_len)
+            if not data:
+                break
+            self._chunk_time = loop.time()
+            if stats.timed:
+                stats.pumped()
+            stats.received(len(data))
+            self._consume_chunk(memoryview(data))
+            # `read` doesn't yield if data is already buffered - so yield here to give the other buses a turn.
+            await asyncio.sleep(0)
+
+    async def run(self):
+        await self._read_loop()
+
+    @classmethod
+    async def open_streams(cls, path):
+        return await open_serial_streams(path, cls.BAUD_RATE)
+
+
+class AsyncSbusPumper(_AsyncPumping, SbusPumper):
+    def __init__(self, reader, subscriber, rx_buffer_len=0, timed_rx_stats=False):
+        super().__init__(
+            None,
+            subscriber,
+            transport=lambda *_: None,
+            rx_buffer_len=rx_buffer_len,
+            timed_rx_stats=timed_rx_stats,
+        )
+        self._reader = reader
+
+
+# When the physical ID of one of our publishers is seen, `_handle_publish` opens the slot and the publish task,
+# which is waiting on `_slot_open`, writes the frame. The frame is only written if the slot deadline hasn't passed.
+class AsyncSportPumper(_AsyncPumping, SportPumper):
+    # The receiver waits about 12ms after each poll - we have to have finished transmitting by then.
+    _SLOT_WINDOW = 0.012
+
+    def __init__(
+        self,
+        reader,
+        writer,
+        echo=True,
+        slot_stats=None,
+        rx_buffer_len=0,
+        timed_rx_stats=False,
+    ):
+        transport = _StreamTransport(writer)
+        super().__init__(
+            None,
+            None,
+            echo=False,
+            transport=lambda *_: transport,
+            slot_stats=slot_stats,
+            rx_buffer_len=rx_buffer_len,
+            timed_rx_stats=timed_rx_stats,
+        )
+        self._reader = reader
+        self._writer = writer
+        self._echo = echo
+        self._expected_echo = bytearray(FrameEncoder.MAX_ENCODED_LEN)
+        self._expected_echo_len = 0
+        self._echo_offset = 0
+
+        tx_time = (
+            BlockingReader.calculate_timeout(
+                self.BAUD_RATE, FrameEncoder.MAX_ENCODED_LEN
+            )
+            / 1e9
+        )
+        self._slot_budget = self._SLOT_WINDOW - tx_time
+        self._slot_open = asyncio.Event()
+        self._slot_id = 0
+        self._slot_deadline = 0
+
+    def _handle_publish(self, physical_id, i, count):
+        if physical_id not in self._publish_ids:
+            return
+
+        # If more data follows the physical ID then some other device has taken the slot or we're reading too slowly.
+        if i != count - 1:
+            if self._slot_stats:
+                self._slot_stats.not_clear(physical_id)
+            _metrics[_MISSED_SLOTS] += 1
+            _logger.error(
+                "%s slot is not clear for writing", PhysicalId.name(physical_id)
+            )
+            return
+
+        if self._slot_stats:
+            self._slot_stats.start(physical_id)
+        self._slot_id = physical_id
+        self._slot_deadline = self._chunk_time + self._slot_budget
+        self._slot_open.set()
+
+    # Wait until a slot opens, e.g. `await pumper.wait_slot_open()`, and return its physical ID.
+    async def wait_slot_open(self):
+        await self._slot_open.wait()
+        self._slot_open.clear()
+        return self._slot_id
+
+    async def _publish_loop(self):
+        loop = asyncio.get_running_loop()
+        stats = self._slot_stats
+        while True:
+            physical_id = await self.wait_slot_open()
+            if loop.time() > self._slot_deadline:
+                _logger.error("%s slot deadline missed", PhysicalId.name(physical_id))
+                _metrics[_MISSED_SLOTS] += 1
+            else:
+                write_frame = self._publish_ids[physical_id]
+                send = write_frame(self._frame_encoder.get_frame())
+                if stats:
+                    stats.mark(SlotStats.WRITE_FRAME)
+                if send:
+                    encoded_frame = self._frame_encoder.encode()
+                    if stats:
+                        stats.mark(SlotStats.ENCODE)
+                    self._write(encoded_frame)
+                    await self._writer.drain()
+            if stats:
+                stats.finish()
+
+    def _write(self, tx_buffer):
+        super()._write(tx_buffer)
+        if self._echo:
+            count = len(tx_buffer)
+            self._expected_echo[:count] = tx_buffer
+            self._expected_echo_len = count
+            self._echo_offset = 0
+
+    # Bytes that we've just transmitted are echoed back and must be checked and skipped before anything else.
+    def _consume_chunk(self, chunk):
+        count = len(chunk)
+        i = 0
+        while self._echo_offset < self._expected_echo_len and i < count:
+            expected = self._expected_echo[self._echo_offset]
+            if chunk[i] != expected:
+                _logger.error("echo - expected 0x%02X, got 0x%02X", expected, chunk[i])
+                _metrics[_ECHO_ERRORS] += 1
+                self._expected_echo_len = 0
+                break
+            self._echo_offset += 1
+            i += 1
+        if i < count:
+            super()._consume_chunk(chunk[i:])
+
+    async def run(self):
+        await asyncio.gather(self._read_loop(), self._publish_loop())
+
+
+class AsyncPumpMaster(PumpMaster):
+    # How often to check if idle background tasks have work.
+    _IDLE_INTERVAL = 0.05
+
+    async def _run_background(self, task):
+        while True:
+            if task.has_work():
+                task.pump()
+                await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(self._IDLE_INTERVAL)
+
+    async def run(self):
+        await asyncio.gather(
+            *(pumper.run() for pumper in self._pumpers),
+            *(self._run_background(task) for task in self._background)
+        )
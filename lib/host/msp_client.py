@@ -0,0 +1,95 @@
+from msp.request_decoder import MspHeaderBits
+from msp.uart_protocol import crc8_dvb_s2
+from sport.frame import Frame, FrameId
+from sport.physical_id import PhysicalId
+
+# Host-only - the client side of MSP, i.e. what the radio or a configuration tool sends, for tests, benchmarks and
+# `SportBusSimulator`.
+
+_VERSION = 1 << 5
+_FRAME_PAYLOAD_LEN = 6
+
+
+def _checksum(command, payload):
+    checksum = len(payload) ^ command
+    for b in payload:
+        checksum ^= b
+    return checksum
+
+
+# Split a request into S.Port frame payloads, numbered from `sequence`. If `corrupt` is true, the checksum is wrong.
+def encode_sport_request(command, payload, sequence=0, corrupt=False):
+    checksum = _checksum(command, payload) ^ (0xFF if corrupt else 0)
+    data = bytes([len(payload), command]) + payload + bytes([checksum])
+    chunk_len = _FRAME_PAYLOAD_LEN - 1
+    payloads = []
+    for offset in range(0, len(data), chunk_len):
+        header = _VERSION | (sequence & MspHeaderBits.SEQUENCE_MASK)
+        if offset == 0:
+            header |= MspHeaderBits.START_FLAG
+        sequence += 1
+        chunk = data[offset : offset + chunk_len]
+        payloads.append(bytes([header]) + chunk + bytes(chunk_len - len(chunk)))
+    return payloads
+
+
+# Clear the sequence numbers of response frame payloads, e.g. to compare responses that were sent at different times.
+def strip_sequence(payloads):
+    return [bytes([p[0] & ~MspHeaderBits.SEQUENCE_MASK]) + p[1:] for p in payloads]
+
+
+# A serial MSP v1 message - `direction` is `b"<"` for requests, `b">"` for responses and `b"!"` for errors.
+def encode_uart_v1(direction, command, payload):
+    header = bytes([len(payload), command])
+    return b"$M" + direction + header + payload + bytes([_checksum(command, payload)])
+
+
+def encode_uart_v2(direction, command, payload):
+    body = (
+        bytes([0])
+        + command.to_bytes(2, "little")
+        + len(payload).to_bytes(2, "little")
+        + payload
+    )
+    return b"$X" + direction + body + bytes([crc8_dvb_s2(0, body)])
+
+
+# Stands in for `SportPumper` so that a `SportCoordinator` can be driven directly, i.e. without a bus - requests
+# are passed straight to its subscriber and response frames are pulled from its publisher. The IDs of the frames
+# pulled are recorded in `frame_ids`.
+class DirectPumper:
+    def __init__(self):
+        self.publishers = {}
+        self.subscribers = {}
+        self.frame_ids = []
+
+    def add_publisher(self, physical_id, publisher):
+        self.publishers[physical_id] = publisher
+
+    def add_subscriber(self, physical_id, subscriber):
+        self.subscribers[physical_id] = subscriber
+
+    def send_request(self, command, payload, receive_id=PhysicalId.ID13, corrupt=False):
+        subscriber = self.subscribers[receive_id]
+        for frame_payload in encode_sport_request(command, payload, corrupt=corrupt):
+            frame = Frame()
+            frame.set_id(FrameId.MSP_CLIENT)
+            frame.payload[:] = frame_payload
+            subscriber(frame)
+
+    # Returns the payload of the next frame sent by `transmit_id` or `None` if there's nothing to send.
+    def next_payload(self, transmit_id=PhysicalId.ID27):
+        frame = Frame()
+        if not self.publishers[transmit_id](frame):
+            return None
+        self.frame_ids.append(frame.get_id())
+        return bytes(frame.payload)
+
+    # Returns the payloads of all the frames that `transmit_id` has to send.
+    def drain(self, transmit_id=PhysicalId.ID27):
+        payloads = []
+        payload = self.next_payload(transmit_id)
+        while payload is not None:
+            payloads.append(payload)
+            payload = self.next_payload(transmit_id)
+        return payloads
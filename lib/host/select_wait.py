@@ -0,0 +1,10 @@
+import select
+
+from util.wait_strategy import WaitStrategy
+
+
+# Host-only - a `WaitStrategy` that blocks until the stream is readable, or the timeout expires, so waiting uses no
+# CPU. This requires that the stream provides `fileno`, e.g. `host.serial_transport`.
+class SelectWait(WaitStrategy):
+    def wait(self, stream, timeout):
+        select.select([stream], [], [], timeout / 1e9 if timeout >= 0 else None)
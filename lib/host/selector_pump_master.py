@@ -0,0 +1,33 @@
+import selectors
+
+from util.uart_pumper import PumpMaster
+
+
+# Host-only - rather than continuously pumping every pumper, this waits until one or more of them has data
+# available. This requires that the pumpers' transports provide `fileno`, e.g. `host.serial_transport`.
+class SelectorPumpMaster(PumpMaster):
+    def __init__(self):
+        super().__init__()
+        self._selector = selectors.DefaultSelector()
+
+    def register(self, pumper):
+        super().register(pumper)
+        self._selector.register(pumper, selectors.EVENT_READ, pumper)
+
+    # If `timeout` is `None`, this blocks until at least one pumper is ready (unless background tasks have work).
+    def pump_all(self, timeout=None):
+        if self._has_background_work():
+            timeout = 0
+        for key, _ in self._selector.select(timeout):
+            key.data.pump()
+        for task in self._background:
+            task.pump()
+
+    def _has_background_work(self):
+        for task in self._background:
+            if task.has_work():
+                return True
+        return False
+
+    def close(self):
+        self._selector.close()
@@ -0,0 +1,93 @@
+import logging
+
+import fcntl
+import os
+import pty
+import selectors
+import termios
+import tty
+
+_logger = logging.getLogger("serial_transport")
+
+
+# Put `fd` into raw non-blocking mode at the given baud rate.
+def configure_serial(fd, baud_rate):
+    tty.setraw(fd)
+    os.set_blocking(fd, False)
+
+    speed = getattr(termios, "B{}".format(baud_rate), None)
+    # Non-standard rates, like the 100000 used by S.BUS, need `termios2` which isn't exposed by Python.
+    if speed is None:
+        _logger.warning("baud rate %d is not supported - leaving as is", baud_rate)
+        return
+    attrs = termios.tcgetattr(fd)
+    attrs[4] = speed  # ispeed
+    attrs[5] = speed  # ospeed
+    termios.tcsetattr(fd, termios.TCSANOW, attrs)
+
+
+# Host-only - a Linux stand-in for `busio.UART` over a serial device or pseudo-terminal file descriptor.
+# See `util/transport.py` for what a transport must provide.
+class SerialTransport:
+    def __init__(self, fd, baud_rate):
+        self._fd = fd
+        self._in_waiting = bytearray(4)
+        self._write_selector = selectors.DefaultSelector()
+        self._write_selector.register(fd, selectors.EVENT_WRITE)
+
+        configure_serial(fd, baud_rate)
+
+    def fileno(self):
+        return self._fd
+
+    @property
+    def in_waiting(self):
+        fcntl.ioctl(self._fd, termios.FIONREAD, self._in_waiting)
+        return int.from_bytes(self._in_waiting, "little")
+
+    # Like `busio.UART`, this returns `None` rather than 0 if no data is available.
+    def readinto(self, buffer):
+        try:
+            count = os.readv(self._fd, [buffer])
+        except BlockingIOError:
+            return None
+        return count if count else None
+
+    def write(self, buffer):
+        buffer = memoryview(buffer)
+        total = len(buffer)
+        while buffer:
+            try:
+                buffer = buffer[os.write(self._fd, buffer) :]
+            except BlockingIOError:
+                self._write_selector.select()
+        return total
+
+    def close(self):
+        self._write_selector.close()
+        os.close(self._fd)
+
+
+# A transport factory for `UartPumper`. As with pins, `tx` and `rx` are the same device path if the device is
+# used for both directions (and one of them is `None` if only one direction is needed).
+def create_serial_transport(tx, rx, baud_rate, _):
+    path = rx if rx is not None else tx
+    if tx is not None and rx is not None and tx != rx:
+        raise ValueError("TX and RX must be the same device")
+    return SerialTransport(open_serial_fd(path), baud_rate)
+
+
+def open_serial_fd(path):
+    return os.open(path, os.O_RDWR | os.O_NOCTTY)
+
+
+# Create a pseudo-terminal pair for use in testing and benchmarking. The controller end is used to simulate the
+# other party and the path of the peripheral end can be passed to `create_serial_transport`. The peripheral file
+# descriptor is returned just so that it can be held open, otherwise reads on the controller end fail once the
+# transport is closed.
+def open_pty_pair():
+    controller, peripheral = pty.openpty()
+    tty.setraw(controller)
+    tty.setraw(peripheral)
+    path = os.ttyname(peripheral)
+    return controller, peripheral, path
@@ -0,0 +1,340 @@
+from collections import deque
+
+from host.msp_client import encode_sport_request
+from msp.request_decoder import MspHeaderBits
+from sport.control_code import SportControlCode
+from sport.frame import FrameDecoder, FrameEncoder, FrameId
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import SportPumper
+
+# Host-only - a deterministic, virtual-time model of an S.Port bus for load testing `SportPumper` and whatever is
+# attached to it, e.g. `SportCoordinator`, without a real receiver. The real pumper code reads and writes through a
+# `_VirtualUart`, everything else is simulated:
+# * The receiver polls each physical ID in turn, i.e. a start byte and the ID, and then waits `slot_ns` (about 12ms
+#   on a real receiver) before the next poll. The polling order is our transmit IDs, the foreign IDs and then the
+#   MSP receive ID.
+# * Foreign sensors answer their polls with a sensor frame after `foreign_delay_ns`.
+# * An MSP client, if given, sends stop-and-wait requests, one frame per poll of the receive ID (as the receiver
+#   does for the radio), and reassembles the responses that we write.
+# * Everything written by the pumper is echoed back, as on the real half-duplex line.
+#
+# Virtual time only advances for bus traffic, our writes, `pump_ns` per pump and CPU stalls of `stall_ns` every
+# `stall_interval_ns`, so the results are the same on every run and don't depend on the host's speed. Time is
+# in nanoseconds.
+
+# 8N1 - 10 bits per byte.
+BYTE_NS = 10 * 10**9 // SportPumper.BAUD_RATE
+
+_SLOT_NS = 12 * 10**6
+
+
+# Stands in for `busio.UART` - the driver's receive buffer holds `buffer_len` bytes and anything that arrives when
+# it's full is dropped.
+class _VirtualUart:
+    def __init__(self, simulator, buffer_len):
+        self._simulator = simulator
+        self._buffer_len = buffer_len
+        self.rx = deque()
+        self.overflow_bytes = 0
+
+    def receive(self, b):
+        if len(self.rx) < self._buffer_len:
+            self.rx.append(b)
+        else:
+            self.overflow_bytes += 1
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def readinto(self, buffer):
+        rx = self.rx
+        count = len(rx) if len(rx) < len(buffer) else len(buffer)
+        if count == 0:
+            return None
+        for i in range(count):
+            buffer[i] = rx.popleft()
+        return count
+
+    def write(self, buffer):
+        self._simulator.on_write(bytes(buffer))
+
+
+class _Slot:
+    def __init__(self, physical_id, start, is_ours):
+        self.physical_id = physical_id
+        self.start = start
+        self.is_ours = is_ours
+        self.wrote = False
+
+
+# Sends one request at a time, split into S.Port frames, and reassembles the responses.
+class MspClient:
+    def __init__(self, command, payload=b""):
+        self._command = command
+        self._payload = payload
+        self._frames = deque()
+        self._sequence = 0
+        self._response_remaining = 0
+        self._response_len = 0
+        self._sent_at = 0
+        self.requests = 0
+        self.responses = 0
+        self.response_bytes = 0
+        self.errors = 0
+        self.latency_total = 0
+        self.latency_min = -1
+        self.latency_max = 0
+        self._queue_request()
+
+    def _queue_request(self):
+        payloads = encode_sport_request(self._command, self._payload, self._sequence)
+        self._sequence = (self._sequence + len(payloads)) & MspHeaderBits.SEQUENCE_MASK
+        for payload in payloads:
+            self._frames.append(bytes([FrameId.MSP_CLIENT]) + payload)
+
+    # The raw frame (frame ID and payload) to send in the next poll of the receive ID, if any.
+    def next_frame(self, now):
+        if not self._frames:
+            return None
+        frame = self._frames.popleft()
+        if not self._frames:
+            self.requests += 1
+            self._sent_at = now
+        return frame
+
+    def receive(self, payload, now):
+        header = payload[0]
+        if header & MspHeaderBits.START_FLAG:
+            if header & MspHeaderBits.ERROR_FLAG:
+                self.errors += 1
+            self._response_len = payload[1]
+            self._response_remaining = self._response_len + 1  # Including the checksum.
+            available = len(payload) - 2
+        elif self._response_remaining:
+            available = len(payload) - 1
+        else:
+            return
+        self._response_remaining -= (
+            available
+            if available < self._response_remaining
+            else self._response_remaining
+        )
+        if self._response_remaining == 0:
+            self._complete(now)
+
+    def get_average_latency(self):
+        return self.latency_total // self.responses if self.responses else 0
+
+    def _complete(self, now):
+        latency = now - self._sent_at
+        self.responses += 1
+        self.response_bytes += self._response_len
+        self.latency_total += latency
+        if self.latency_min == -1 or latency < self.latency_min:
+            self.latency_min = latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+        self._queue_request()
+
+
+class SportBusSimulator:
+    def __init__(
+        self,
+        transmit_ids=(PhysicalId.ID27,),
+        receive_id=PhysicalId.ID13,
+        foreign_ids=(),
+        msp_client=None,
+        slot_ns=_SLOT_NS,
+        foreign_delay_ns=10**6,
+        pump_ns=50 * 10**3,
+        stall_ns=0,
+        stall_interval_ns=0,
+        rx_buffer_len=0,
+    ):
+        self.now = 0
+        self._uart = None
+        self.pumper = SportPumper(
+            None,
+            None,
+            transport=self._create_uart,
+            rx_buffer_len=rx_buffer_len,
+        )
+
+        self._transmit_ids = transmit_ids
+        self._receive_id = receive_id
+        self._poll_ids = tuple(transmit_ids) + tuple(foreign_ids) + (receive_id,)
+        self._msp_client = msp_client
+        self._slot_ns = slot_ns
+        self._foreign_delay_ns = foreign_delay_ns
+        self._pump_ns = pump_ns
+        self._stall_ns = stall_ns
+        self._stall_interval_ns = stall_interval_ns
+        self._next_stall = stall_interval_ns
+
+        # `(time, byte, slot)` - `slot` is set for the start byte of each poll.
+        self._events = deque()
+        self._poll_index = 0
+        self._next_slot_start = 0
+        self._slot = None
+        self._foreign_encoder = FrameEncoder()
+        self._foreign_value = 0
+        self._frame_decoder = FrameDecoder()
+
+        self.polls = 0
+        self.hits = 0
+        self.late = 0
+        self.collisions = 0
+        self.sensor_frames = 0
+        self.foreign_frames = 0
+        self.stalls = 0
+
+    def _create_uart(self, tx, rx, baud_rate, buffer_len):
+        self._uart = _VirtualUart(self, buffer_len)
+        return self._uart
+
+    def run(self, duration_ms):
+        end = self.now + duration_ms * 10**6
+        while self.now < end:
+            self._deliver()
+            self.pumper.pump()
+            self.now += self._pump_ns
+            self._stall()
+            if not self._uart.rx:
+                self._skip_idle()
+        self._finish_slot()
+
+    def _stall(self):
+        if self._stall_interval_ns and self.now >= self._next_stall:
+            self.now += self._stall_ns
+            self.stalls += 1
+            while self._next_stall <= self.now:
+                self._next_stall += self._stall_interval_ns
+
+    # Nothing happens until the next byte arrives, or the next stall, so jump straight to it.
+    def _skip_idle(self):
+        if not self._events:
+            self._schedule_slot()
+        target = self._events[0][0]
+        if self._stall_interval_ns and self._next_stall < target:
+            target = self._next_stall
+        if target > self.now:
+            self.now = target
+
+    def _deliver(self):
+        events = self._events
+        if not events:
+            self._schedule_slot()
+        while events and events[0][0] <= self.now:
+            _, b, slot = events.popleft()
+            if slot:
+                self._finish_slot()
+                self._slot = slot
+            self._uart.receive(b)
+            if not events:
+                self._schedule_slot()
+
+    def _schedule_slot(self):
+        start = self._next_slot_start
+        physical_id = self._poll_ids[self._poll_index]
+        self._poll_index = (self._poll_index + 1) % len(self._poll_ids)
+        self._next_slot_start = start + self._slot_ns
+
+        slot = _Slot(physical_id, start, physical_id in self._transmit_ids)
+        self._add_bytes(start, bytes([SportControlCode.START, physical_id]), slot)
+
+        after_poll = start + 2 * BYTE_NS
+        if physical_id == self._receive_id:
+            frame = (
+                self._msp_client.next_frame(after_poll) if self._msp_client else None
+            )
+            if frame:
+                self._add_bytes(after_poll, self._encode(frame))
+        elif not slot.is_ours:
+            self._add_bytes(after_poll + self._foreign_delay_ns, self._foreign_frame())
+            self.foreign_frames += 1
+
+    def _add_bytes(self, start, data, slot=None):
+        for i, b in enumerate(data):
+            self._events.append((start + i * BYTE_NS, b, slot if i == 0 else None))
+
+    def _encode(self, raw):
+        encoder = self._foreign_encoder
+        encoder.get_frame().buffer[:] = raw
+        return bytes(encoder.encode())
+
+    def _foreign_frame(self):
+        self._foreign_value = (self._foreign_value + 1) & 0xFFFF
+        value = self._foreign_value.to_bytes(4, "little")
+        return self._encode(bytes([FrameId.SENSOR, 0x00, 0x01]) + value)
+
+    def _finish_slot(self):
+        slot = self._slot
+        if slot and slot.is_ours:
+            self.polls += 1
+        self._slot = None
+
+    # Called, via `_VirtualUart.write`, for everything the pumper writes.
+    def on_write(self, data):
+        start = self.now
+        self.now += len(data) * BYTE_NS
+        for b in data:
+            self._uart.receive(b)  # The echo.
+
+        slot = self._slot
+        if not slot or not slot.is_ours or slot.wrote:
+            self.collisions += 1
+        elif self.now > slot.start + self._slot_ns:
+            self.late += 1
+        else:
+            self.hits += 1
+        if slot:
+            slot.wrote = True
+
+        self._frame_decoder.reset()
+        frame, _ = self._frame_decoder.decode_into(data)
+        if not frame or frame is FrameDecoder.INVALID_FRAME:
+            return
+        if frame.get_id() == FrameId.SENSOR:
+            self.sensor_frames += 1
+        elif frame.get_id() == FrameId.MSP_SERVER and self._msp_client:
+            self._msp_client.receive(frame.payload, self.now)
+
+    def get_hit_rate(self):
+        return self.hits / self.polls if self.polls else 0
+
+    def get_overflow_bytes(self):
+        return self._uart.overflow_bytes
+
+    def dump(self):
+        seconds = self.now / 10**9
+        print(
+            "slots: polls={} hits={} ({:.1%}) late={} collisions={} stalls={} rx_overflow={}".format(
+                self.polls,
+                self.hits,
+                self.get_hit_rate(),
+                self.late,
+                self.collisions,
+                self.stalls,
+                self.get_overflow_bytes(),
+            )
+        )
+        print(
+            "frames: sensor={} ({:.1f}/s) foreign={}".format(
+                self.sensor_frames, self.sensor_frames / seconds, self.foreign_frames
+            )
+        )
+        client = self._msp_client
+        if client:
+            print(
+                "msp: requests={} responses={} errors={} latency min={:.1f}ms avg={:.1f}ms max={:.1f}ms "
+                "throughput={:.1f} bytes/s".format(
+                    client.requests,
+                    client.responses,
+                    client.errors,
+                    max(client.latency_min, 0) / 10**6,
+                    client.get_average_latency() / 10**6,
+                    client.latency_max / 10**6,
+                    client.response_bytes / seconds,
+                )
+            )
@@ -1,13 +1,56 @@
+import logging
 import sys
 
+from config.write_behind import WriteBehindSaver
+from msp.request_decoder import MSP_MAX_PAYLOAD_LEN
+from util.buffer import ReadBuffer, WriteBuffer
+
+_logger = logging.getLogger("core_commands")
+
+
+# Raised by `handle_request` for requests that can't be handled, e.g. because they're malformed - the client is
+# sent `MspError.ERROR` instead of a response. It's a `ValueError` as that's what `SportCoordinator` and
+# `MspUartPumper` catch from commands.
+class MspCommandError(ValueError):
+    pass
+
 
 class MspCommand:
+    # Set to `True` by commands whose responses depend only on the request and on state that's invalidated
+    # when it changes - see `MspResponseCache`.
+    cacheable = False
+
+    # Set to `True` by commands that take the request payload in chunks, as its frames arrive, rather than
+    # having it accumulated in a fixed buffer. The chunks are passed to `write_request`, after `start_request`,
+    # and `handle_request` or `open_response` is then passed an empty request. If the request turns out to be
+    # bad, e.g. its checksum doesn't match, `abort_request` is called instead.
+    streams_request = False
+
+    # Set to `True` by commands that produce their response lazily, a frame's worth at a time, rather than
+    # writing it to a fixed buffer in `handle_request`. `open_response` returns a source with `remaining` and
+    # `read_into` methods like `ReadBuffer`, e.g. see `MspGeneratorSource`. Streamed responses aren't cached.
+    # Later requests may be handled while the response is still being read, so the source mustn't depend on
+    # state that they could change.
+    streams_response = False
+
     def __init__(self, command_id):
         self.id = command_id
 
     def handle_request(self, request, response):
         raise NotImplementedError("write_response")
 
+    def start_request(self, length):
+        raise NotImplementedError("start_request")
+
+    def write_request(self, chunk):
+        raise NotImplementedError("write_request")
+
+    def abort_request(self):
+        pass
+
+    def open_response(self, request):
+        raise NotImplementedError("open_response")
+
     @staticmethod
     def _write_with_length(response, b):
         response.write_u8(len(b))
@@ -17,6 +60,8 @@ class MspCommand:
 class MspApiVersionCommand(MspCommand):
     COMMAND_API_VERSION = 1
 
+    cacheable = True
+
     # This is distinct from the version encoded in the header byte of MSP frames.
     _PROTOCOL_VERSION = 0
 
@@ -34,17 +79,100 @@ class MspApiVersionCommand(MspCommand):
         response.write_u8(self._VERSION_MINOR)
 
 
+# If a `WriteBehindSaver` is provided, the configs are saved in the background and the response is sent
+# immediately, otherwise they're saved synchronously which may cause transmission slots to be missed.
+# A failed save is reported with `MspError.ERROR` - for background saves, that's in response to the next request,
+# which also retries the save.
 class MspSaveAllCommand(MspCommand):
     COMMAND_SAVE_ALL = 250
 
-    def __init__(self, configs):
+    def __init__(self, configs, saver=None):
         super().__init__(self.COMMAND_SAVE_ALL)
         self._configs = configs
+        self._saver = saver
 
     def handle_request(self, *_):
+        if self._saver:
+            if self._saver.request_save(self._configs):
+                raise MspCommandError("previous save failed")
+            return
+
         try:
             for c in self._configs:
                 c.save()
         except OSError as e:
             # File-system probably needs to be remounted - see `boot.py`.
             sys.print_exception(e)
+            raise MspCommandError("save failed")
+
+    # `WriteBehindSaver.IDLE`, `PENDING` or `FAILED` - synchronous saves are always complete.
+    def get_save_status(self):
+        return self._saver.get_status() if self._saver else WriteBehindSaver.IDLE
+
+
+# From Betaflight - the request is a sequence of command IDs. Each command is run with an empty request and
+# its response is written prefixed with its length (0 for commands that aren't run). Stops once a response won't fit.
+# As in Betaflight, only commands that take no action are run, here those that are `cacheable` - anything else,
+# e.g. MSP_SAVE_ALL, gets an empty response, as do unknown commands and commands whose handler fails.
+#
+# Not in Betaflight - if the request starts with `_WITH_PAYLOADS` then each command ID is followed by a length
+# and a request payload. This allows commands that take arguments, e.g. MSP_VTX_TABLE_BAND, to be batched.
+# A length that goes past the end of the request results in an error.
+class MspMultipleCommand(MspCommand):
+    COMMAND_MULTIPLE_MSP = 230
+
+    # It only runs cacheable commands so its response, like theirs, only changes when the cache is invalidated.
+    cacheable = True
+
+    _WITH_PAYLOADS = 0  # Betaflight doesn't use 0 as a command ID.
+    _EMPTY_PAYLOAD = memoryview(b"")
+
+    # `commands` is the same command ID to command dictionary that's passed to `SportCoordinator`.
+    def __init__(self, commands):
+        super().__init__(self.COMMAND_MULTIPLE_MSP)
+        self._commands = commands
+        self._request = ReadBuffer()
+        self._response = WriteBuffer(length=MSP_MAX_PAYLOAD_LEN)
+
+    def handle_request(self, request, response):
+        with_payloads = (
+            request.has_remaining() and request.peek_u8() == self._WITH_PAYLOADS
+        )
+        if with_payloads:
+            request.read_u8()
+
+        while request.has_remaining():
+            command_id = request.read_u8()
+            if with_payloads:
+                if not request.has_remaining():
+                    raise MspCommandError("missing payload length")
+                length = request.read_u8()
+                if not request.has_remaining(length):
+                    raise MspCommandError("payload length past end of request")
+                payload = request.read(length)
+            else:
+                payload = self._EMPTY_PAYLOAD
+
+            self._response.reset_offset()
+            command = self._commands.get(command_id)
+            if command is None:
+                pass
+            # Nesting would overwrite the request and response buffers that are in use.
+            elif command is self or not command.cacheable or command.streams_request:
+                _logger.warning("command %d not allowed in a batch", command_id)
+            else:
+                self._handle(command, payload)
+
+            reply = self._response.get_buffer()
+            if response.remaining() < len(reply) + 1:
+                break
+            self._write_with_length(response, reply)
+
+    def _handle(self, command, payload):
+        self._request.set_buffer(payload)
+        try:
+            command.handle_request(self._request, self._response)
+        except (IndexError, ValueError) as e:
+            # E.g. its payload was too short - leave its response empty.
+            _logger.warning("command %d failed in a batch - %s", command.id, e)
+            self._response.reset_offset()
@@ -1,73 +1,91 @@
 import logging
 
-from msp.command.core import MspCommand
+from msp.command.core import MspCommand, MspCommandError
+from msp.schema import MspSchema, U8, U16
 
 _logger = logging.getLogger("vtx_commands")
 
 
+# Read the 1-based offset, of a band or level, that starts the request and check that it's in the table.
+def _read_offset(request, count, name):
+    if not request.has_remaining():
+        raise MspCommandError("no {} given".format(name))
+    offset = request.read_u8()
+    if not 1 <= offset <= count:
+        raise MspCommandError("{} {} out of range".format(name, offset))
+    return offset
+
+
 class MspVtxConfigCommand(MspCommand):
     COMMAND_VTX_CONFIG = 88
 
-    # Note: CircuitPython doesn't support '?' as the format character for booleans.
-    _STRUCT_FORMAT = "<BBBBBHBBHBBBB"
+    cacheable = True
+
+    _RESPONSE = MspSchema(
+        (
+            ("type", U8),
+            ("band", U8),
+            ("channel", U8),
+            ("power", U8),
+            ("pit_mode", U8),
+            ("freq", U16),
+            ("ready", U8),
+            ("low_power_disarm", U8),
+            ("pit_mode_freq", U16),
+            ("use_vtx_table", U8),
+            ("table.band_count", U8),
+            ("table.channel_count", U8),
+            ("table.level_count", U8),
+        )
+    )
 
     def __init__(self, config):
         super().__init__(self.COMMAND_VTX_CONFIG)
         self.config = config
 
     def handle_request(self, _, response):
-        response.pack_into(
-            self._STRUCT_FORMAT,
-            self.config.type,
-            self.config.band,
-            self.config.channel,
-            self.config.power,
-            int(self.config.pit_mode),
-            self.config.freq,
-            int(self.config.ready),
-            self.config.low_power_disarm,
-            self.config.pit_mode_freq,
-            self.config.use_vtx_table,
-            self.config.table.band_count,
-            self.config.table.channel_count,
-            self.config.table.level_count,
-        )
+        self._RESPONSE.pack_attributes(response, self.config)
 
 
 class MspVtxTableBandCommand(MspCommand):
     COMMAND_VTX_TABLE_BAND = 137
 
+    cacheable = True
+
     def __init__(self, config):
         super().__init__(self.COMMAND_VTX_TABLE_BAND)
         self._config = config
 
     def handle_request(self, request, response):
-        offset = request.read_u8()
-        band = self._config.table.bands_list[offset - 1]
+        table = self._config.table
+        offset = _read_offset(request, table.band_count, "band")
+        band = offset - 1
 
         response.write_u8(offset)
-        self._write_with_length(response, band.name)
-        response.write_u8(band.letter)
-        response.write_u8(int(band.is_factory_band))
-        response.write_u8(len(band.frequencies))
-        for f in band.frequencies:
-            response.write_u16(f)
+        self._write_with_length(response, table.get_band_name(band))
+        response.write_u8(table.get_band_letter(band))
+        response.write_u8(int(table.is_factory_band(band)))
+        response.write_u8(table.get_frequency_count(band))
+        response.write(table.get_frequencies(band))
 
 
 class MspVtxTablePowerLevelCommand(MspCommand):
     COMMAND_VTX_TABLE_POWER_LEVEL = 138
 
+    cacheable = True
+
     def __init__(self, config):
         super().__init__(self.COMMAND_VTX_TABLE_POWER_LEVEL)
         self._config = config
 
     def handle_request(self, request, response):
-        offset = request.read_u8()
-        level = self._config.table.levels_list[offset - 1]
+        table = self._config.table
+        offset = _read_offset(request, table.level_count, "level")
+        level = offset - 1
 
         response.write_u8(offset)
-        response.write_u16(level.value)
-        self._write_with_length(response, level.label)
+        response.write_u16(table.get_level_value(level))
+        self._write_with_length(response, table.get_level_label(level))
 
 
 class MspSetVtxConfigCommand(MspCommand):
@@ -76,15 +94,46 @@ class MspSetVtxConfigCommand(MspCommand):
     _BAND_CHANNEL_ENCODED = 0x3F
     _MAX_FREQUENCY_MHZ = 5999
 
+    # The request is of variable length - each group of fields after the first is optional.
+    _REQUEST = MspSchema(
+        (("frequency", U16),),
+        (("power", U8), ("pit_mode", U8)),
+        (("low_power_disarm", U8),),
+        (("pit_mode_freq", U16),),
+        (("band", U8), ("channel", U8), ("freq", U16)),
+        (
+            ("band_count", U8),
+            ("channel_count", U8),
+            ("level_count", U8),
+            ("clear_table", U8),
+        ),
+    )
+
+    # Fields that are copied directly to the config, if present.
+    _CONFIG_FIELDS = _REQUEST.indexes(
+        "power", "pit_mode", "low_power_disarm", "pit_mode_freq"
+    )
+    _BAND = _REQUEST.index("band")
+    _BAND_COUNT = _REQUEST.index("band_count")
+
     def __init__(self, config):
         super().__init__(self.COMMAND_SET_VTX_CONFIG)
         self._config = config
 
-    # MspSetVtxConfigCommand is a bit unusual in that the incoming request is of variable length.
     def handle_request(self, request, _):
+        self._update(request)
+        self._config.changed()
+
+    def _update(self, request):
         c = self._config
 
-        frequency = request.read_u16()
+        values = self._REQUEST.unpack(request)
+        if values is None:
+            _logger.warning("ignoring empty request")
+            return
+        count = len(values)
+
+        frequency = values[0]
 
         if frequency <= self._BAND_CHANNEL_ENCODED:
             band = (frequency >> 3) + 1
@@ -93,45 +142,24 @@ class MspSetVtxConfigCommand(MspCommand):
         elif frequency <= self._MAX_FREQUENCY_MHZ:
             c.set_frequency(freq=frequency)
 
-        if not request.has_remaining(2):
-            return
-
-        c.power = request.read_u8()
-        c.pit_mode = request.read_u8()
-
-        if not request.has_remaining():
-            return
-
-        c.low_power_disarm = request.read_u8()
-
-        if not request.has_remaining(2):
-            return
-
-        c.pit_mode_freq = request.read_u16()
-
-        if not request.has_remaining(4):
-            return
+        for index, name in self._CONFIG_FIELDS:
+            if index < count:
+                setattr(c, name, values[index])
 
         # Above band and channel can be encoded in the frequency value.
         # Here band, channel and frequency are unencoded and will overwrite the values set above.
-        band = request.read_u8()
-        channel = request.read_u8()
-        frequency = request.read_u16()
-
-        c.set_frequency(band=band, channel=channel, freq=frequency)
-
-        if not request.has_remaining(4):
-            return
-
-        band_count = request.read_u8()
-        channel_count = request.read_u8()
-        level_count = request.read_u8()
-        clear_table = request.read_u8() == 0
-
-        _logger.warning(
-            "ignoring table resize values - bands=%d, channels=%d, levels=%d, clear=%s",
-            band_count,
-            channel_count,
-            level_count,
-            clear_table,
-        )
+        if self._BAND < count:
+            band, channel, frequency = values[self._BAND : self._BAND + 3]
+            c.set_frequency(band=band, channel=channel, freq=frequency)
+
+        if self._BAND_COUNT < count:
+            band_count, channel_count, level_count, clear_table = values[
+                self._BAND_COUNT :
+            ]
+            _logger.warning(
+                "ignoring table resize values - bands=%d, channels=%d, levels=%d, clear=%s",
+                band_count,
+                channel_count,
+                level_count,
+                clear_table == 0,
+            )
@@ -1,10 +1,16 @@
 import logging
 
+from util import metrics
 from util.buffer import ReadBuffer, WriteBuffer
 from util.util import ffs
 
 _logger = logging.getLogger("response_encoder")
 
+PACKET_LOSS_METRIC = "msp.packet_loss"
+
+_metrics = metrics.registry.values
+_PACKET_LOSS = metrics.registry.counter(PACKET_LOSS_METRIC)
+
 
 class MspHeaderBits:
     START_FLAG = 0x10
@@ -13,6 +19,10 @@ class MspHeaderBits:
     SEQUENCE_MASK = 0x0F  # Used in incoming messages only.
 
 
+# MSP v1 has a single length byte.
+MSP_MAX_PAYLOAD_LEN = 255
+
+
 class MspError:
     VERSION_MISMATCH = 0
     CHECKSUM = 1
@@ -35,19 +45,27 @@ class MspRequestResult:
 
 
 # Decode one or more Sport frames into an MSP request.
+#
+# Normally the request payload is accumulated in a buffer but, if `get_stream` returns a stream for the request's
+# command ID, the payload is passed to the stream's `write_request` in chunks as frames arrive instead - see
+# `MspCommand.streams_request`. Either way the checksum is accumulated as the payload arrives.
 class MspRequestDecoder:
-    _BUFFER_LEN = 64  # TODO: how long are the actual incoming requests?
+    _BUFFER_LEN = MSP_MAX_PAYLOAD_LEN
 
     _VERSION = 1
     _VER_SHIFT = ffs(MspHeaderBits.VERSION_MASK)
 
-    def __init__(self):
+    def __init__(self, get_stream=None):
+        self._get_stream = get_stream
         self._frame_payload = ReadBuffer()
         self._request = WriteBuffer(length=self._BUFFER_LEN)
         self._result = MspRequestResult()
         self._command = -1
         self._started = False
         self._last_seq = -1
+        self._stream = None
+        self._payload_remaining = 0
+        self._checksum = 0
 
     # All frames start with a header byte.
     # The header is 8 bits - vvvsnnnn - 3 version bit, 1 start bit and 4 sequence number bits.
@@ -74,40 +92,78 @@ class MspRequestDecoder:
         is_start = header & MspHeaderBits.START_FLAG
 
         if is_start:
-            self._request.reset_offset()
-            self._request.set_length(self._frame_payload.read_u8())
+            self._abort_stream()
+            length = self._frame_payload.read_u8()
             self._command = self._frame_payload.read_u8()
-
-            self._started = True
+            self._start(length)
         elif not self._started:
             _logger.warning("ignoring frame %s", request_payload)
             return None
         elif seq_number != (self._last_seq + 1) & MspHeaderBits.SEQUENCE_MASK:
             _logger.error("packet loss between %d and %d", self._last_seq, seq_number)
+            _metrics[_PACKET_LOSS] += 1
             self._started = False
+            self._abort_stream()
             return None
 
         self._last_seq = seq_number
 
         frame_remaining = self._frame_payload.remaining()
-        request_remaining = self._request.remaining()
-        remaining = min(frame_remaining, request_remaining)
-        self._request.write(self._frame_payload.read(remaining))
+        payload_remaining = self._payload_remaining
+        remaining = min(frame_remaining, payload_remaining)
+        self._consume(remaining)
 
         # Either the frame was totally consumed (and we need more of them) or it has the final checksum byte.
         if not self._frame_payload.has_remaining():
             return None
 
         self._started = False
-
-        request_payload = self._request.get_buffer()
-        checksum = len(request_payload) ^ self._command
-
-        for b in request_payload:
-            checksum ^= b
+        stream = self._stream
+        self._stream = None
 
         # Compare the expected checksum with the actual checksum.
-        if checksum != self._frame_payload.read_u8():
+        if self._checksum != self._frame_payload.read_u8():
+            if stream:
+                stream.abort_request()
             return self._result.set(self._command, error=MspError.CHECKSUM)
 
-        return self._result.set(self._command, payload=request_payload)
+        if stream:
+            return self._result.set(self._command)
+
+        return self._result.set(self._command, payload=self._request.get_buffer())
+
+    def _start(self, length):
+        self._started = True
+        self._payload_remaining = length
+        self._checksum = length ^ self._command
+        self._stream = self._get_stream(self._command) if self._get_stream else None
+        if self._stream:
+            self._stream.start_request(length)
+        else:
+            self._request.reset_offset()
+            self._request.set_length(length)
+
+    # Pass on the next `length` bytes of payload, from the current frame, and add them to the checksum.
+    def _consume(self, length):
+        self._payload_remaining -= length
+        if self._stream:
+            chunk = self._frame_payload.read(length)
+            self._stream.write_request(chunk)
+            buffer = chunk
+            start = 0
+        else:
+            start = self._request.get_offset()
+            self._frame_payload.read_into(self._request, length)
+            buffer = self._request.get_buffer(use_offset=False)
+
+        checksum = self._checksum
+        end = start + length
+        while start < end:
+            checksum ^= buffer[start]
+            start += 1
+        self._checksum = checksum
+
+    def _abort_stream(self):
+        if self._stream:
+            self._stream.abort_request()
+            self._stream = None
@@ -0,0 +1,45 @@
+from msp.response_encoder import MspResponseEncoder
+from sport.frame import Frame
+
+
+# Caches responses, keyed on command ID and request payload, as the sequence of ready-to-send frame payloads.
+# Only commands marked `cacheable` should be cached and anything that changes the state the responses were
+# generated from must call `invalidate`.
+class MspResponseCache:
+    def __init__(self, max_entries=32):
+        self._max_entries = max_entries
+        self._entries = {}
+        self._encoder = MspResponseEncoder()
+        self._frame = Frame()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(command_id, payload):
+        return command_id, bytes(payload)
+
+    # Returns the cached frames or `None`.
+    def get(self, command_id, payload):
+        frames = self._entries.get(self._key(command_id, payload))
+        if frames is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return frames
+
+    # Encode the response into frames, cache them and return them.
+    def put(self, command_id, payload, response):
+        self._encoder.set_command(command_id, response)
+        frames = self._encoder.encode_frames(self._frame)
+
+        # Rather than tracking usage, simply start again if the cache is full.
+        if len(self._entries) >= self._max_entries:
+            self._entries.clear()
+        self._entries[self._key(command_id, payload)] = frames
+        return frames
+
+    def invalidate(self, *_):
+        if self._entries:
+            self._entries.clear()
+            self.invalidations += 1
@@ -1,48 +1,100 @@
-from msp.request_decoder import MspHeaderBits
+from msp.request_decoder import MspHeaderBits, MSP_MAX_PAYLOAD_LEN
 from sport.frame import FrameId
 from util.buffer import WriteBuffer, ReadBuffer
 from util.util import loop
 
 
 # Encode an MSP response into one or more Sport frames.
+#
+# The response is read from a source, a frame's worth at a time, as each frame is encoded. A source is anything
+# with `remaining` and `read_into` methods like `ReadBuffer` - see `set_source` and `MspCommand.open_response`.
 class MspResponseEncoder:
-    _BUFFER_LEN = 64  # TODO: see how long responses typically are.
+    _BUFFER_LEN = MSP_MAX_PAYLOAD_LEN
 
     def __init__(self):
         self._sequence = loop(0x10)
         self._command = 0
         self._is_error = False
+        self._is_first = True
+        self._checksum = 0
 
-        self._response = ReadBuffer()
+        self._response = None
+        self._buffer_source = ReadBuffer()
         self._error_buffer = memoryview(bytearray(1))
 
+        # Pre-encoded frame payloads - see `MspResponseCache`.
+        self._frames = None
+        self._frames_offset = 0
+
         self._frame_payload = WriteBuffer()
 
     @staticmethod
     def create_response_buffer():
         return WriteBuffer(length=MspResponseEncoder._BUFFER_LEN)
 
-    def _reset(self, command, buffer, is_error):
+    def _reset(self, command, source, is_error):
         self._command = command
         self._is_error = is_error
-        self._response.set_buffer(buffer)
+        self._is_first = True
+        self._response = source
+        self._frames = None
 
     def set_error(self, error, command):
         self._error_buffer[0] = error
-        self._reset(command, self._error_buffer, is_error=True)
+        self._buffer_source.set_buffer(self._error_buffer)
+        self._reset(command, self._buffer_source, is_error=True)
 
     def set_command(self, command, buffer):
-        self._reset(command, buffer, is_error=False)
+        self._buffer_source.set_buffer(buffer)
+        self._reset(command, self._buffer_source, is_error=False)
+
+    def get_command(self):
+        return self._command
+
+    # Returns the source passed to `set_source`, if that's what's being encoded, otherwise `None`.
+    def get_source(self):
+        if self._frames is not None or self._response is self._buffer_source:
+            return None
+        return self._response
+
+    # Stream the response from `source`, which must provide exactly `source.remaining()` bytes. `encode` raises
+    # `ValueError` if `source` fails to do so, as will `read_into` of `MspGeneratorSource`.
+    def set_source(self, command, source):
+        if source.remaining() > MSP_MAX_PAYLOAD_LEN:
+            raise ValueError("response too long")
+        self._reset(command, source, is_error=False)
+
+    # Send frame payloads that have already been encoded - only the sequence number needs to be updated.
+    def set_frames(self, frames):
+        self._frames = frames
+        self._frames_offset = 0
+
+    def _encode_frames(self, frame):
+        payload = frame.payload
+        frames = self._frames
+        start = self._frames_offset
+        end = start + len(payload)
+        # Copy byte-by-byte rather than via a slice to avoid allocating.
+        for i in range(len(payload)):
+            payload[i] = frames[start + i]
+        payload[0] = (payload[0] & ~MspHeaderBits.SEQUENCE_MASK) | next(self._sequence)
+        self._frames_offset = end
+        return end < len(self._frames)
 
     def encode(self, frame):
         frame.set_id(FrameId.MSP_SERVER)
+
+        if self._frames is not None:
+            return self._encode_frames(frame)
+
         self._frame_payload.set_buffer(frame.payload)
 
         header = next(self._sequence)
         response_remaining = self._response.remaining()
 
         # Write the start header if this is the frame of a given response.
-        if self._response.get_offset() == 0:
+        if self._is_first:
+            self._is_first = False
             # Unlike the request, there's no version included in the header byte.
             # And the command isn't included as the third byte (but it is factored into the checksum).
             header |= MspHeaderBits.START_FLAG
@@ -50,19 +102,27 @@ class MspResponseEncoder:
                 header |= MspHeaderBits.ERROR_FLAG
             self._frame_payload.write_u8(header)
             self._frame_payload.write_u8(response_remaining)
+            self._checksum = self._command ^ response_remaining
         else:
             self._frame_payload.write_u8(header)
 
         frame_remaining = self._frame_payload.remaining()
         remaining = min(frame_remaining, response_remaining)
 
-        self._frame_payload.write(self._response.read(remaining))
+        # The checksum is accumulated as the response is read so that it never needs to be held in full.
+        start = self._frame_payload.get_offset()
+        self._response.read_into(self._frame_payload, remaining)
+        payload = frame.payload
+        checksum = self._checksum
+        end = start + remaining
+        while start < end:
+            checksum ^= payload[start]
+            start += 1
+        self._checksum = checksum
 
         if response_remaining >= frame_remaining:
             return True
 
-        checksum = self._calculate_checksum(self._command, self._response.get_buffer())
-
         self._frame_payload.write_u8(checksum)
 
         # Pad out the rest of the frame - the value doesn't matter but 0 looks nicer when debugging.
@@ -71,11 +131,12 @@ class MspResponseEncoder:
 
         return False  # No more to come.
 
-    @staticmethod
-    def _calculate_checksum(command, buf):
-        checksum = command ^ len(buf)
-
-        for b in buf:
-            checksum ^= b
-
-        return checksum
+    # Encode the whole response, using `frame` as scratch space, and return the frame payloads, e.g. to be sent
+    # later with `set_frames`.
+    def encode_frames(self, frame):
+        frames = bytearray()
+        more = True
+        while more:
+            more = self.encode(frame)
+            frames.extend(frame.payload)
+        return bytes(frames)
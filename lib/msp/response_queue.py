@@ -0,0 +1,55 @@
+from msp.response_encoder import MspResponseEncoder
+from sport.frame import Frame
+
+
+# Holds responses that are waiting for an earlier response to finish being sent. Requests that arrive while the
+# queue is full are dropped and counted in `overflows`. Most responses are held as ready-to-send frame payloads,
+# as the buffer they were written to is reused, but streamed responses are held as their source and, as when
+# they're not queued, only read a frame at a time as they're sent.
+class MspResponseQueue:
+    def __init__(self, max_len=4):
+        self._max_len = max_len
+        self._responses = []
+        self._frame = Frame()
+
+        # Queued responses are created and encoded with these, as those used for sending are still in use.
+        self.encoder = MspResponseEncoder()
+        self.response_buffer = MspResponseEncoder.create_response_buffer()
+
+        self.queued = 0
+        self.overflows = 0
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._responses)
+
+    def is_full(self):
+        return len(self._responses) >= self._max_len
+
+    def overflow(self):
+        self.overflows += 1
+
+    # Queue `frames` or, if not given, the response currently set on `encoder`.
+    def put(self, frames=None):
+        if frames is None:
+            encoder = self.encoder
+            source = encoder.get_source()
+            if source is None:
+                frames = encoder.encode_frames(self._frame)
+            else:
+                frames = (encoder.get_command(), source)
+        self._responses.append(frames)
+        self.queued += 1
+        if len(self._responses) > self.max_depth:
+            self.max_depth = len(self._responses)
+
+    # Set `encoder` up to send the oldest response. Returns `False` if the queue is empty.
+    def pop_into(self, encoder):
+        if not self._responses:
+            return False
+        response = self._responses.pop(0)
+        if isinstance(response, tuple):
+            encoder.set_source(*response)
+        else:
+            encoder.set_frames(response)
+        return True
@@ -0,0 +1,31 @@
+# A response source, for `MspCommand.open_response`, whose content is produced lazily by `generator`. The
+# generator yields chunks, e.g. `bytes` or `memoryview` slices, that must add up to exactly `length` bytes -
+# `read_into` raises `ValueError` if they come up short or if the last chunk goes past `length`.
+class MspGeneratorSource:
+    def __init__(self, length, generator):
+        self._remaining = length
+        self._generator = generator
+        self._chunk = b""
+        self._chunk_offset = 0
+
+    def remaining(self):
+        return self._remaining
+
+    # Copy `length` bytes to `buffer`, a `WriteBuffer`, pulling chunks from the generator as needed.
+    def read_into(self, buffer, length):
+        self._remaining -= length
+        while length > 0:
+            available = len(self._chunk) - self._chunk_offset
+            if available == 0:
+                try:
+                    self._chunk = next(self._generator)
+                except StopIteration:
+                    raise ValueError("response source ended early")
+                self._chunk_offset = 0
+                continue
+            count = length if length < available else available
+            buffer.write(self._chunk, self._chunk_offset, count)
+            self._chunk_offset += count
+            length -= count
+        if self._remaining == 0 and self._chunk_offset < len(self._chunk):
+            raise ValueError("response source overran")
@@ -0,0 +1,67 @@
+import struct
+
+# Field types - these are `struct` format characters.
+U8 = "B"
+U16 = "H"
+U32 = "I"
+
+
+# Declares the fixed layout of an MSP request or response payload once, as groups of `(name, type)` fields.
+# The first group is required, the others are optional trailing groups - each group is only present if all
+# the groups before it are, e.g. see `MspSetVtxConfigCommand`.
+#
+# The schema is compiled, when created, to a `struct` format and length for each number of groups present
+# so that a payload is decoded or encoded with a single `struct` call.
+#
+# For `pack_attributes`, names are attribute paths, e.g. "table.band_count".
+class MspSchema:
+    def __init__(self, *groups):
+        assert len(groups) > 0
+
+        self.names = tuple(name for group in groups for name, _ in group)
+        self._paths = tuple(tuple(name.split(".")) for name in self.names)
+
+        # The format and length of each of the possible prefixes, i.e. first group, first and second groups
+        # and so on.
+        self._formats = []
+        self._lengths = []
+        fmt = "<"
+        for group in groups:
+            fmt += "".join(field_type for _, field_type in group)
+            self._formats.append(fmt)
+            self._lengths.append(struct.calcsize(fmt))
+
+        self.length = self._lengths[-1]
+
+    # The position of the field in the tuples returned by `unpack`.
+    def index(self, name):
+        return self.names.index(name)
+
+    # Returns `(index, name)` pairs for the given fields, e.g. for copying unpacked values with `setattr`.
+    def indexes(self, *names):
+        return tuple((self.index(name), name) for name in names)
+
+    # Returns a tuple of the values of all the groups that are present, i.e. use `len` to see which optional
+    # fields were included, or `None` if the request is too short to contain the required fields.
+    def unpack(self, request):
+        remaining = request.remaining()
+        i = len(self._lengths) - 1
+        while i >= 0 and self._lengths[i] > remaining:
+            i -= 1
+        if i < 0:
+            return None
+        return request.unpack_from(self._formats[i])
+
+    # All fields, including optional ones, are written.
+    def pack(self, response, *values):
+        response.pack_into(self._formats[-1], *values)
+
+    # Write the fields with the values of the corresponding attributes of `obj`.
+    def pack_attributes(self, response, obj):
+        response.pack_into(self._formats[-1], *[self._get(obj, p) for p in self._paths])
+
+    @staticmethod
+    def _get(obj, path):
+        for name in path:
+            obj = getattr(obj, name)
+        return obj
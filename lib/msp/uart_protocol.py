@@ -0,0 +1,220 @@
+import logging
+
+from msp.request_decoder import MspRequestResult, MSP_MAX_PAYLOAD_LEN
+from util import metrics
+
+_logger = logging.getLogger("msp_uart")
+
+CHECKSUM_ERRORS_METRIC = "msp_uart.checksum_errors"
+
+_metrics = metrics.registry.values
+_CHECKSUM_ERRORS = metrics.registry.counter(CHECKSUM_ERRORS_METRIC)
+
+# MSP framing as used over a direct serial link, rather than S.Port - see
+# https://github.com/betaflight/betaflight/blob/master/src/main/msp/msp_serial.c
+#
+# v1: '$' 'M' direction, length (u8), command (u8), payload, checksum (XOR of length, command and payload).
+# v2: '$' 'X' direction, flags (u8), command (u16), length (u16), payload, CRC8 DVB-S2 of everything after the
+#     direction.
+# Direction is '<' for requests, '>' for responses and '!' for error responses. v1 jumbo frames aren't supported.
+
+
+class MspVersion:
+    V1 = 1
+    V2 = 2
+
+
+class _Char:
+    START = ord("$")
+    V1 = ord("M")
+    V2 = ord("X")
+    REQUEST = ord("<")
+    RESPONSE = ord(">")
+    ERROR = ord("!")
+
+
+def _create_crc_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0xD5) if crc & 0x80 else (crc << 1)
+            crc &= 0xFF
+        table[i] = crc
+    return bytes(table)
+
+
+_CRC_TABLE = _create_crc_table()
+
+
+def crc8_dvb_s2(crc, buffer, start=0, end=-1):
+    if end == -1:
+        end = len(buffer)
+    table = _CRC_TABLE
+    while start < end:
+        crc = table[crc ^ buffer[start]]
+        start += 1
+    return crc
+
+
+class _State:
+    IDLE = 0
+    VERSION = 1
+    DIRECTION = 2
+    HEADER = 3
+    PAYLOAD = 4
+    CHECKSUM = 5
+
+
+class MspUartDecoder:
+    _V1_HEADER_LEN = 2  # Length and command.
+    _V2_HEADER_LEN = 5  # Flags, command and length.
+
+    _BUFFER_LEN = MSP_MAX_PAYLOAD_LEN
+
+    def __init__(self):
+        self._payload = bytearray(self._BUFFER_LEN)
+        self._payload_view = memoryview(self._payload)
+        self._header = bytearray(self._V2_HEADER_LEN)
+        self._result = MspRequestResult()
+        self._state = _State.IDLE
+        self._header_len = 0
+        self._offset = 0
+        self._length = 0
+        self._command = 0
+        self._checksum = 0
+        self.version = MspVersion.V1
+
+    # Decode bytes from `buffer`, starting at `start`, until a request is complete or the buffer is exhausted.
+    # Returns `(request, consumed)` where `request` is an `MspRequestResult` or `None`. Requests with bad
+    # checksums, or that are too long, are logged and dropped.
+    def decode_into(self, buffer, start=0):
+        count = len(buffer)
+        i = start
+        while i < count:
+            state = self._state
+            if state == _State.PAYLOAD:
+                # Copy as much of the payload as is available in one go.
+                n = self._length - self._offset
+                if n > count - i:
+                    n = count - i
+                end = self._offset + n
+                self._payload_view[self._offset : end] = buffer[i : i + n]
+                self._offset = end
+                i += n
+                if end == self._length:
+                    self._state = _State.CHECKSUM
+                continue
+
+            b = buffer[i]
+            i += 1
+            if state == _State.IDLE:
+                if b == _Char.START:
+                    self._state = _State.VERSION
+            elif state == _State.VERSION:
+                self._start_version(b)
+            elif state == _State.DIRECTION:
+                self._state = _State.HEADER if b == _Char.REQUEST else _State.IDLE
+            elif state == _State.HEADER:
+                self._header[self._offset] = b
+                self._offset += 1
+                if self._offset == self._header_len:
+                    self._parse_header()
+            else:
+                self._state = _State.IDLE
+                if self._check(b):
+                    payload = self._payload_view[: self._length]
+                    return self._result.set(self._command, payload), i - start
+        return None, i - start
+
+    def _start_version(self, b):
+        if b == _Char.V1:
+            self.version = MspVersion.V1
+            self._header_len = self._V1_HEADER_LEN
+        elif b == _Char.V2:
+            self.version = MspVersion.V2
+            self._header_len = self._V2_HEADER_LEN
+        else:
+            self._state = _State.IDLE
+            return
+        self._offset = 0
+        self._state = _State.DIRECTION
+
+    def _parse_header(self):
+        h = self._header
+        if self.version == MspVersion.V1:
+            self._length = h[0]
+            self._command = h[1]
+        else:
+            self._command = h[1] | (h[2] << 8)
+            self._length = h[3] | (h[4] << 8)
+
+        if self._length > self._BUFFER_LEN:
+            _logger.error(
+                "dropping command %d - payload too long (%d)",
+                self._command,
+                self._length,
+            )
+            self._state = _State.IDLE
+            return
+
+        self._offset = 0
+        self._state = _State.PAYLOAD if self._length > 0 else _State.CHECKSUM
+
+    def _check(self, checksum):
+        if self.version == MspVersion.V1:
+            expected = self._length ^ self._command
+            for i in range(self._length):
+                expected ^= self._payload[i]
+        else:
+            expected = crc8_dvb_s2(0, self._header, 0, self._V2_HEADER_LEN)
+            expected = crc8_dvb_s2(expected, self._payload, 0, self._length)
+
+        if expected != checksum:
+            _logger.error("dropping command %d - checksum mismatch", self._command)
+            _metrics[_CHECKSUM_ERRORS] += 1
+            return False
+        return True
+
+
+class MspUartEncoder:
+    _V1_OVERHEAD = 6  # '$', 'M', direction, length, command and checksum.
+    _V2_OVERHEAD = 9  # '$', 'X', direction, flags, command (2), length (2) and CRC.
+
+    def __init__(self):
+        self._buffer = bytearray(MSP_MAX_PAYLOAD_LEN + self._V2_OVERHEAD)
+        self._view = memoryview(self._buffer)
+
+    # Returns a view of the encoded response - it's only valid until the next call.
+    def encode(self, version, command, payload, is_error=False):
+        b = self._buffer
+        length = len(payload)
+        b[0] = _Char.START
+        b[2] = _Char.ERROR if is_error else _Char.RESPONSE
+
+        if version == MspVersion.V1:
+            b[1] = _Char.V1
+            b[3] = length
+            b[4] = command
+            start = 5
+        else:
+            b[1] = _Char.V2
+            b[3] = 0  # Flags.
+            b[4] = command & 0xFF
+            b[5] = command >> 8
+            b[6] = length & 0xFF
+            b[7] = length >> 8
+            start = 8
+
+        end = start + length
+        self._view[start:end] = payload
+
+        if version == MspVersion.V1:
+            checksum = 0
+            for i in range(3, end):
+                checksum ^= b[i]
+        else:
+            checksum = crc8_dvb_s2(0, b, 3, end)
+        b[end] = checksum
+
+        return self._view[: end + 1]
@@ -0,0 +1,92 @@
+import logging
+
+from msp.response_encoder import MspResponseEncoder
+from msp.uart_protocol import MspUartDecoder, MspUartEncoder
+from util.uart_pumper import UartPumper
+
+_logger = logging.getLogger("msp_uart_pumper")
+
+
+# Serves MSP v1 and v2 requests on a direct serial link, e.g. a UART or USB serial connection to a configuration
+# tool, using the same command dictionary as `SportCoordinator`. Each response is written in full as soon as the
+# request is complete, rather than one 6-byte frame per S.Port polling cycle.
+class MspUartPumper(UartPumper):
+    DEFAULT_BAUD_RATE = 115200
+
+    _EMPTY_PAYLOAD = memoryview(b"")
+
+    def __init__(
+        self,
+        tx,
+        rx,
+        commands,
+        baud_rate=DEFAULT_BAUD_RATE,
+        response_cache=None,
+        transport=None,
+    ):
+        super().__init__(tx, rx, baud_rate, transport=transport)
+        self._commands = commands
+        self._response_cache = response_cache
+        self._decoder = MspUartDecoder()
+        self._encoder = MspUartEncoder()
+        self._response = MspResponseEncoder.create_response_buffer()
+
+    def _consume_chunk(self, chunk):
+        decode_into = self._decoder.decode_into
+        count = len(chunk)
+        i = 0
+        while i < count:
+            request, consumed = decode_into(chunk, i)
+            i += consumed
+            if request:
+                self._handle_request(request)
+
+    def _handle_request(self, request):
+        version = self._decoder.version
+        command = self._commands.get(request.command_id)
+
+        if command is None:
+            _logger.error("no handler registered for command %d", request.command_id)
+            self._write_error(version, request.command_id)
+            return
+
+        payload = request.payload
+        response = self._response
+        response.reset_offset()
+
+        # The request has already been read in full so streaming commands get it in one chunk.
+        if command.streams_request:
+            buffer = payload.get_buffer(use_offset=False)
+            command.start_request(len(buffer))
+            command.write_request(buffer)
+            payload.set_buffer(self._EMPTY_PAYLOAD)
+
+        # As in `SportCoordinator`, a bad request or a streamed response that goes wrong results in an error.
+        failed = False
+        try:
+            if command.streams_response:
+                source = command.open_response(payload)
+                source.read_into(response, source.remaining())
+            else:
+                command.handle_request(payload, response)
+        except ValueError as e:
+            _logger.error("response to command %d failed - %s", command.id, e)
+            failed = True
+
+        # As in `SportCoordinator`, any command that isn't cacheable may have changed state.
+        if self._response_cache and not command.cacheable:
+            self._response_cache.invalidate()
+
+        if failed:
+            self._write_error(version, command.id)
+        else:
+            self._write(
+                self._encoder.encode(version, command.id, response.get_buffer())
+            )
+
+    def _write_error(self, version, command_id):
+        self._write(
+            self._encoder.encode(
+                version, command_id, self._EMPTY_PAYLOAD, is_error=True
+            )
+        )
@@ -0,0 +1,78 @@
+from collections import namedtuple
+
+import numpy as np
+
+from sbus.sbus_decoder import CHANNEL_TABLE, SbusFrame
+
+# Host-only - decodes recorded S.BUS captures in bulk using NumPy rather than byte-by-byte like `SbusDecoder`.
+# `offsets` gives the position of each frame's start byte within the capture.
+SbusCapture = namedtuple(
+    "SbusCapture", ["offsets", "channels", "lost_frame", "failsafe"]
+)
+
+# These match the values used by `SbusDecoder`.
+_START_BYTE = 0x0F
+_END_BYTE = 0x00
+_FRAME_LEN = 25
+_FLAGS_OFFSET = 23
+_CH_COUNT = 18
+_CH16_FLAG = 0x01
+_CH17_FLAG = 0x02
+_LOST_FRAME_FLAG = 0x04
+_FAILSAFE_FLAG = 0x08
+
+
+# Find the offsets of the frames in `data`. A frame is a start byte with an end byte 24 bytes later. As there's
+# no checksum, a start byte within a frame may also look like the start of a frame - such overlapping candidates
+# are resolved, like `SbusDecoder`, by taking the earliest and skipping anything that overlaps it.
+def find_frames(data):
+    data = np.frombuffer(data, dtype=np.uint8)
+    if len(data) < _FRAME_LEN:
+        return np.empty(0, dtype=np.intp)
+
+    last = len(data) - _FRAME_LEN + 1
+    candidates = np.flatnonzero(
+        (data[:last] == _START_BYTE) & (data[_FRAME_LEN - 1 :] == _END_BYTE)
+    )
+
+    # Usually frames are back-to-back and no resolution is needed.
+    if np.all(np.diff(candidates) >= _FRAME_LEN):
+        return candidates
+
+    offsets = []
+    next_free = 0
+    for offset in candidates.tolist():
+        if offset >= next_free:
+            offsets.append(offset)
+            next_free = offset + _FRAME_LEN
+    return np.array(offsets, dtype=np.intp)
+
+
+# Decode all the frames in `data`, which can be anything supporting the buffer protocol, e.g. `bytes` or `mmap`.
+def decode_capture(data):
+    offsets = find_frames(data)
+    data = np.frombuffer(data, dtype=np.uint8)
+
+    # Gather the frames into an (N, 25) array, then widen so that three bytes can be combined per channel.
+    frames = data[offsets[:, np.newaxis] + np.arange(_FRAME_LEN)]
+    payload = frames[:, 1:_FLAGS_OFFSET + 1].astype(np.uint32)
+
+    channels = np.empty((len(offsets), _CH_COUNT), dtype=np.uint16)
+    for ch, (start, shift) in enumerate(CHANNEL_TABLE):
+        combined = (
+            payload[:, start]
+            | (payload[:, start + 1] << 8)
+            | (payload[:, start + 2] << 16)
+        )
+        channels[:, ch] = (combined >> shift) & 0x7FF
+
+    flags = frames[:, _FLAGS_OFFSET]
+
+    # Channels 16 and 17 are either fully on or fully off.
+    channels[:, 16] = np.where(flags & _CH16_FLAG, SbusFrame.LEVEL_MAX, 0)
+    channels[:, 17] = np.where(flags & _CH17_FLAG, SbusFrame.LEVEL_MAX, 0)
+
+    lost_frame = (flags & _LOST_FRAME_FLAG) != 0
+    failsafe = (flags & _FAILSAFE_FLAG) != 0
+
+    return SbusCapture(offsets, channels, lost_frame, failsafe)
@@ -2,7 +2,7 @@ import array
 import logging
 
 from util.buffer import WriteBuffer
-from util.util import repeat, ByteOrder
+from util.util import repeat
 
 _logger = logging.getLogger("sbus_decoder")
 
@@ -21,10 +21,24 @@ class SbusFrame:
         self.failsafe = False
 
 
+# Channels are 11 bits, usually they're split over two bytes, e.g. 5 bits in one byte and 6 in the next.
+# But at points they're split over 3 bytes, e.g. 2 bits, 8 bits and 1 bit. Rather than tracking this while
+# parsing, this table gives the payload offset of the first byte and the shift needed for each channel.
+# Reading three bytes is always safe - the third byte for the last channel is the flags byte.
+CHANNEL_TABLE = tuple(((ch * 11) >> 3, (ch * 11) & 0x07) for ch in range(16))
+
+
 # See `sbus-notes.md` for more details on S.BUS.
+# `framing_errors` counts bytes having to be skipped to find a start byte, once the first frame has been found,
+# and, in `decode_into`, frames with an invalid end byte. Frames are decoded regardless but either usually means
+# bytes were lost.
 class SbusDecoder:
     _START_BYTE = 0x0F
+    # S.BUS2 uses 0x04, 0x14, 0x24 and 0x34 as end bytes.
+    _END_BYTE = 0x00
+    _END_BYTE_2 = 0x04
     _BUFFER_LEN = 23
+    _FRAME_REMAINDER = _BUFFER_LEN + 1  # Everything after the start byte, i.e. the payload and end byte.
     _CH16_FLAG = 0x01
     _CH17_FLAG = 0x02
     _LOST_FRAME_FLAG = 0x04
@@ -34,6 +48,8 @@ class SbusDecoder:
         self._payload = WriteBuffer(length=self._BUFFER_LEN)
         self._frame = SbusFrame()
         self._searching = True
+        self._synced = False
+        self.framing_errors = 0
 
     def decode(self, b):
         if self._searching:
@@ -42,42 +58,82 @@ class SbusDecoder:
                 self._searching = False
             else:
                 _logger.warning("ignoring 0x%02X", b)
+                self._skipped()
         elif self._payload.has_remaining():
             self._payload.write_u8(b)
         else:
+            # The end byte is only checked by `decode_into`.
             self._searching = True
-            return self._parse()
+            self._synced = True
+            return self._parse(self._payload.get_buffer(), 0)
 
         return None
 
-    def _parse(self):
-        buffer = self._payload.get_buffer()
+    # Decode bytes from `buffer`, starting at `start`, until a frame is completed or the buffer is exhausted.
+    # Returns the completed frame (or `None`) and the number of bytes consumed. Frames that lie entirely within
+    # `buffer` are parsed in place, only frames that are split across buffers are copied.
+    def decode_into(self, buffer, start=0):
+        end = len(buffer)
+        i = start
 
-        ch = 0
-        start = 0
-        shift = 0
+        if self._searching:
+            while i < end and buffer[i] != self._START_BYTE:
+                i += 1
+            if i != start:
+                _logger.warning("ignoring %d bytes", i - start)
+                self._skipped()
+            if i == end:
+                return None, i - start
+            i += 1
+            if end - i >= self._FRAME_REMAINDER:
+                self._check_end(buffer[i + self._BUFFER_LEN])
+                self._parse(buffer, i)
+                return self._frame, i + self._FRAME_REMAINDER - start
+            self._payload.reset_offset()
+            self._searching = False
+
+        # Continue a frame that's split across buffers.
+        count = min(self._payload.remaining(), end - i)
+        self._payload.write(buffer, i, count)
+        i += count
+
+        # Either more payload is needed or just the end byte.
+        if i == end:
+            return None, i - start
+
+        self._searching = True
+        self._check_end(buffer[i])
+        self._parse(self._payload.get_buffer(), 0)
+        return self._frame, i + 1 - start
+
+    # Bytes before the first start byte are just the tail of a frame that was in progress when we started.
+    def _skipped(self):
+        if self._synced:
+            self.framing_errors += 1
+
+    def _check_end(self, b):
+        self._synced = True
+        if b != self._END_BYTE and (b & 0x0F) != self._END_BYTE_2:
+            _logger.warning("invalid end byte 0x%02X", b)
+            self.framing_errors += 1
 
-        def from_bytes(b):
-            int.from_bytes(b, ByteOrder.LITTLE)
+    # Parse the payload starting at `offset` in `buffer`.
+    def _parse(self, buffer, offset):
+        channels = self._frame.channels
 
-        # Channels are 11 bits, usually they're split over two bytes, e.g. 5 bits in one byte and 6 in the next.
-        # But at points they're split over 3 bytes, e.g. 2 bits, 8 bits and 1 bit.
-        while start < 21:
-            b = buffer[start : start + 3]
-            self._frame.channels[ch] = (from_bytes(b) >> shift) & 0x7FF
+        ch = 0
+        for start, shift in CHANNEL_TABLE:
+            i = offset + start
+            channels[ch] = (
+                (buffer[i] | (buffer[i + 1] << 8) | (buffer[i + 2] << 16)) >> shift
+            ) & 0x7FF
             ch += 1
-            if shift >= 5:
-                start += 2
-                shift -= 5  # I.e. `shift += (3 - 8)`.
-            else:
-                start += 1
-                shift += 3
 
-        last = buffer[22]
+        last = buffer[offset + 22]
 
         # Channels 16 and 17 are either fully on or fully off.
-        self._frame.channels[16] = SbusFrame.LEVEL_MAX if last & self._CH16_FLAG else 0
-        self._frame.channels[17] = SbusFrame.LEVEL_MAX if last & self._CH17_FLAG else 0
+        channels[16] = SbusFrame.LEVEL_MAX if last & self._CH16_FLAG else 0
+        channels[17] = SbusFrame.LEVEL_MAX if last & self._CH17_FLAG else 0
 
         self._frame.lost_frame = last & self._LOST_FRAME_FLAG != 0
         self._frame.failsafe = last & self._FAILSAFE_FLAG != 0
@@ -1,19 +1,52 @@
 from sbus.sbus_decoder import SbusDecoder
+from util import metrics
 from util.uart_pumper import UartPumper
 
+LOST_FRAMES_METRIC = "sbus.lost_frames"
+FRAMING_ERRORS_METRIC = "sbus.framing_errors"
+FAILSAFE_METRIC = "sbus.failsafe"
+
+_metrics = metrics.registry.values
+_LOST_FRAMES = metrics.registry.counter(LOST_FRAMES_METRIC)
+_FRAMING_ERRORS = metrics.registry.counter(FRAMING_ERRORS_METRIC)
+_FAILSAFE = metrics.registry.gauge(FAILSAFE_METRIC)
+
 
 class SbusPumper(UartPumper):
     # S.BUS uses its own rate rather than one of the common ones like 115200.
-    _BAUD_RATE = 100000
+    BAUD_RATE = 100000
 
-    def __init__(self, rx, subscriber):
-        super().__init__(None, rx, self._BAUD_RATE)
+    # See `UartPumper` for `rx_buffer_len` and `timed_rx_stats`.
+    def __init__(
+        self, rx, subscriber, transport=None, rx_buffer_len=0, timed_rx_stats=False
+    ):
+        super().__init__(
+            None,
+            rx,
+            self.BAUD_RATE,
+            transport=transport,
+            rx_buffer_len=rx_buffer_len,
+            timed_rx_stats=timed_rx_stats,
+        )
         self._decoder = SbusDecoder()
         self._subscriber = subscriber
 
-    def _consume(self, b, _):
-        frame = self._decoder.decode(b)
-        if frame:
-            self._subscriber(frame)
-
-
+    def _consume_chunk(self, chunk):
+        decoder = self._decoder
+        decode_into = decoder.decode_into
+        framing_errors = decoder.framing_errors
+        count = len(chunk)
+        i = 0
+        while i < count:
+            frame, consumed = decode_into(chunk, i)
+            i += consumed
+            if frame:
+                if frame.lost_frame:
+                    _metrics[_LOST_FRAMES] += 1
+                _metrics[_FAILSAFE] = 1 if frame.failsafe else 0
+                self._subscriber(frame)
+        # Framing errors are the visible symptom of bytes lost to an overflow.
+        if decoder.framing_errors != framing_errors:
+            errors = decoder.framing_errors - framing_errors
+            self._rx_stats.gap(errors)
+            _metrics[_FRAMING_ERRORS] += errors
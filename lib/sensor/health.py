@@ -0,0 +1,46 @@
+from msp.request_decoder import PACKET_LOSS_METRIC
+from sbus.sbus_pumper import (
+    LOST_FRAMES_METRIC,
+    FRAMING_ERRORS_METRIC,
+    FAILSAFE_METRIC,
+)
+from sensor.sensor import Sensor
+from sensor.sensor_id import SensorId
+from sport.frame import CHECKSUM_ERRORS_METRIC
+from sport.sport_pumper import MISSED_SLOTS_METRIC
+from util import metrics
+from util.echo_verifier import ECHO_ERRORS_METRIC
+from util.metrics import MetricsRegistry
+
+# Bus-health metrics, see `util/metrics.py`, reported as DIY sensors so that the radio logs them alongside the
+# flight. The IDs are consecutive from `SensorId.DIY_FIRST` - the sensors will need to be named on the radio.
+# The names come from the modules that update the metrics, so a typo is an import error rather than a sensor that
+# silently reports zero. They're registered here too, so the sensors also work with a separate registry.
+HEALTH_METRICS = (
+    (CHECKSUM_ERRORS_METRIC, MetricsRegistry.COUNTER),
+    (MISSED_SLOTS_METRIC, MetricsRegistry.COUNTER),
+    (PACKET_LOSS_METRIC, MetricsRegistry.COUNTER),
+    (LOST_FRAMES_METRIC, MetricsRegistry.COUNTER),
+    (FRAMING_ERRORS_METRIC, MetricsRegistry.COUNTER),
+    (FAILSAFE_METRIC, MetricsRegistry.GAUGE),
+    (ECHO_ERRORS_METRIC, MetricsRegistry.COUNTER),
+)
+
+# How the health sensors are scheduled, see `SensorScheduler`. The counters rarely change, so they're only sent when
+# they do, at most once a second, and otherwise every 10s so that the radio's log still shows them. This leaves
+# most slots for the other sensors.
+HEALTH_SCHEDULE = {"rate": 1, "threshold": 0, "max_interval": 10000}
+
+
+def _create_sensor(sensor_id, values, index):
+    return Sensor(sensor_id, lambda: values[index])
+
+
+# `health_metrics` are `(name, kind)` pairs.
+def create_health_sensors(registry=metrics.registry, health_metrics=HEALTH_METRICS):
+    return [
+        _create_sensor(
+            SensorId.DIY_FIRST + i, registry.values, registry.register(name, kind)
+        )
+        for i, (name, kind) in enumerate(health_metrics)
+    ]
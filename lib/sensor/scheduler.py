@@ -0,0 +1,114 @@
+import time
+
+from sensor.sensor import SensorEncoder
+from util.util import loop
+
+
+def _now_ms():
+    return time.monotonic_ns() // 1000000
+
+
+# A scheduler decides which sensor, if any, is written to a given frame. `write_frame` returns `True` if the
+# frame should be sent.
+
+
+# Gives every sensor an equal share of the slots.
+class RoundRobinScheduler:
+    def __init__(self, sensors):
+        self._sensors = (sensors[i] for i in loop(len(sensors))) if sensors else None
+
+    def write_frame(self, frame):
+        if self._sensors:
+            SensorEncoder.encode(next(self._sensors), frame)
+            return True
+        return False
+
+
+# Scheduling settings for a sensor:
+# * `rate` - the maximum number of times per second that the sensor is sent, 0 means no limit.
+# * `weight` - the sensor's share of the slots relative to other sensors of the same priority.
+# * `priority` - sensors with a higher priority are always sent in preference to those with a lower one.
+# * `threshold` - if not `None`, the sensor is only sent if its value has changed by more than this amount...
+# * `max_interval` - ...or if it hasn't been sent for this many milliseconds (0 means never send unchanged values).
+class ScheduledSensor:
+    _VIRTUAL_SCALE = 1 << 16
+
+    def __init__(
+        self, sensor, rate=0, weight=1, priority=0, threshold=None, max_interval=0
+    ):
+        self.sensor = sensor
+        self.priority = priority
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.interval = 1000 // rate if rate else 0
+        self.cost = self._VIRTUAL_SCALE // weight
+        self.virtual_time = 0
+        self.next_due = 0
+        self.last_sent = 0
+        self.last_value = None
+
+
+# Chooses between sensors using weighted fair queuing - each sensor has a virtual time that advances by an amount
+# inversely proportional to its weight each time it's sent, and the eligible sensor with the highest priority
+# and then the lowest virtual time is sent next. A sensor isn't eligible if sending it would exceed its rate or,
+# if it has a threshold, its value hasn't changed enough.
+class SensorScheduler:
+    def __init__(self, clock=_now_ms):
+        self._entries = []
+        self._clock = clock
+        self._virtual_time = 0
+
+    def add(self, sensor, **kwargs):
+        entry = ScheduledSensor(sensor, **kwargs)
+        self._entries.append(entry)
+        return entry
+
+    def _select(self, now):
+        best = None
+        for entry in self._entries:
+            if now < entry.next_due:
+                continue
+            if (
+                best is None
+                or entry.priority > best.priority
+                or (
+                    entry.priority == best.priority
+                    and entry.virtual_time < best.virtual_time
+                )
+            ):
+                best = entry
+        return best
+
+    def write_frame(self, frame):
+        now = self._clock()
+
+        # Each pass either finds a sensor to send or makes one ineligible, so this is bounded by the sensor count.
+        while True:
+            entry = self._select(now)
+            if entry is None:
+                return False
+
+            value = entry.sensor.get_value()
+
+            if self._is_unchanged(entry, value, now):
+                # Check again after the sensor's interval (or the next time around if it has no rate limit).
+                entry.next_due = now + max(entry.interval, 1)
+                continue
+
+            start = max(entry.virtual_time, self._virtual_time)
+            self._virtual_time = start
+            entry.virtual_time = start + entry.cost
+            entry.next_due = now + entry.interval
+            entry.last_sent = now
+            entry.last_value = value
+
+            SensorEncoder.encode_value(entry.sensor.id, value, frame)
+            return True
+
+    @staticmethod
+    def _is_unchanged(entry, value, now):
+        if entry.threshold is None or entry.last_value is None:
+            return False
+        if entry.max_interval and now - entry.last_sent >= entry.max_interval:
+            return False
+        return abs(value - entry.last_value) <= entry.threshold
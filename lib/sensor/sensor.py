@@ -1,21 +1,21 @@
-import struct
-
 from sport.frame import FrameId
+from util.buffer import WriteBuffer
 
 
 class SensorEncoder:
-    _STRUCT_FORMAT = "<HI"
+    _payload = WriteBuffer()
 
     @staticmethod
     def encode(sensor, frame):
+        SensorEncoder.encode_value(sensor.id, sensor.get_value(), frame)
+
+    @staticmethod
+    def encode_value(sensor_id, value, frame):
         frame.set_id(FrameId.SENSOR)
-        struct.pack_into(
-            SensorEncoder._STRUCT_FORMAT,
-            frame.payload,
-            0,
-            sensor.id,
-            sensor.get_value(),
-        )
+        payload = SensorEncoder._payload
+        payload.set_buffer(frame.payload)
+        payload.write_u16(sensor_id)
+        payload.write_u32(value)
 
 
 class Sensor:
@@ -1,45 +1,119 @@
 import logging
-from sensor.sensor import SensorEncoder
+from sensor.scheduler import RoundRobinScheduler
+from msp.response_cache import MspResponseCache
 from msp.response_encoder import MspResponseEncoder
+from msp.response_queue import MspResponseQueue
 
 from msp.request_decoder import MspRequestDecoder, MspError
 from sport.frame import FrameId
 from sport.physical_id import PhysicalId
-from util.util import loop
 
 _logger = logging.getLogger("exchange")
 
 
+# What a transmit ID is used for:
+# * `SHARED` - MSP responses if there are any, otherwise sensors.
+# * `MSP` - MSP responses only, the slot is left unused if there's nothing to send.
+# * `SENSORS` - sensors only.
+class TransmitRole:
+    SHARED = 0
+    MSP = 1
+    SENSORS = 2
+
+
 class SportCoordinator:
     _DEFAULT_TRANSMIT_ID = PhysicalId.ID27
     _DEFAULT_RECEIVE_ID = PhysicalId.ID13
+    _DEFAULT_MAX_QUEUED_RESPONSES = 4
 
+    # Each transmit ID gets its own slot in the receiver's polling cycle so, by default, one ID is used for
+    # everything but `transmit_roles` can map several IDs to their `TransmitRole`, e.g. see `dedicated_msp_roles`.
     def __init__(
-        self, pumper, transmit_id=_DEFAULT_TRANSMIT_ID, receive_id=_DEFAULT_RECEIVE_ID
+        self,
+        pumper,
+        transmit_id=_DEFAULT_TRANSMIT_ID,
+        receive_id=_DEFAULT_RECEIVE_ID,
+        transmit_roles=None,
+        max_queued_responses=_DEFAULT_MAX_QUEUED_RESPONSES,
     ):
-        pumper.add_publisher(transmit_id, self._write_frame)
+        if transmit_roles is None:
+            transmit_roles = {transmit_id: TransmitRole.SHARED}
+        if receive_id in transmit_roles:
+            raise ValueError("receive ID is also a transmit ID")
+
+        writers = {
+            TransmitRole.SHARED: self._write_frame,
+            TransmitRole.MSP: self._write_msp_frame,
+            TransmitRole.SENSORS: self._write_sensor_frame,
+        }
+        for physical_id, role in transmit_roles.items():
+            pumper.add_publisher(physical_id, writers[role])
+
         pumper.add_subscriber(receive_id, self._receive)
-        self._msp_request_decoder = MspRequestDecoder()
+        self._msp_request_decoder = MspRequestDecoder(self._get_request_stream)
         self._msp_response_encoder = MspResponseEncoder()
         self._msp_response_buffer = MspResponseEncoder.create_response_buffer()
+        self._msp_response_queue = MspResponseQueue(max_queued_responses)
         self._send_msp_response = False
-        self._sensors = None
+        self._response_cache = None
+        self._scheduler = None
         self._commands = {}
 
+    # Dedicate `msp_id` to MSP responses and spread sensors over `sensor_ids`. Sensors are still sent using `msp_id`
+    # when there's no MSP response to send, unless `share_msp_id` is false.
+    # Note: the Betaflight Lua scripts expect MSP responses to come from ID27, i.e. `_DEFAULT_TRANSMIT_ID`.
+    @staticmethod
+    def dedicated_msp_roles(msp_id, sensor_ids, share_msp_id=True):
+        roles = {physical_id: TransmitRole.SENSORS for physical_id in sensor_ids}
+        roles[msp_id] = TransmitRole.SHARED if share_msp_id else TransmitRole.MSP
+        return roles
+
+    # Sensors are sent in turn - use `set_scheduler` for more control, e.g. with `SensorScheduler`.
     def set_sensors(self, sensors):
-        self._sensors = (sensors[i] for i in loop(len(sensors)))
+        self._scheduler = RoundRobinScheduler(sensors)
+
+    def set_scheduler(self, scheduler):
+        self._scheduler = scheduler
 
     def set_commands(self, commands):
         self._commands = commands
 
+    # Responses to commands marked `cacheable` are cached. Any other command may change state, so the cache is
+    # invalidated after such commands. Anything else that changes state must also call `cache.invalidate`.
+    def set_response_cache(self, cache):
+        self._response_cache = cache
+
+    def get_response_cache(self):
+        return self._response_cache
+
+    # See `MspResponseQueue` for its metrics.
+    def get_response_queue(self):
+        return self._msp_response_queue
+
     # If there's MSP response data to send then send it, otherwise send sensor data.
     def _write_frame(self, frame):
-        if self._send_msp_response:
-            self._send_msp_response = self._msp_response_encoder.encode(frame)
-            return True
-        elif self._sensors:
-            SensorEncoder.encode(next(self._sensors), frame)
-            return True
+        return self._write_msp_frame(frame) or self._write_sensor_frame(frame)
+
+    def _write_msp_frame(self, frame):
+        if not self._send_msp_response:
+            return False
+        encoder = self._msp_response_encoder
+        try:
+            more = encoder.encode(frame)
+        except ValueError as e:
+            # The response's source broke its promise, e.g. it ended early. The start frame has probably already
+            # gone so replace the rest of the response with an error, which the client will take as a new response.
+            self._log_response_failure(encoder.get_command(), e)
+            encoder.set_error(MspError.ERROR, encoder.get_command())
+            more = encoder.encode(frame)
+        if not more:
+            # Move on to the next queued response, if any.
+            self._send_msp_response = self._msp_response_queue.pop_into(encoder)
+        return True
+
+    def _write_sensor_frame(self, frame):
+        if self._scheduler:
+            return self._scheduler.write_frame(frame)
         return False
 
     def _receive(self, frame):
@@ -47,37 +121,91 @@ class SportCoordinator:
             _logger.warning("ignoring frame with ID 0x%02X", frame.get_id())
             return
 
-        if self._send_msp_response:
-            _logger.warning(
-                "MSP frame received while still sending previous response - discarding old response"
-            )
-            self._send_msp_response = False
-
         request = self._msp_request_decoder.decode(frame.payload)
 
         if request:
             self._handle_msp_request(request)
 
+    # Requests that complete while an earlier response is still being sent are handled immediately, so that
+    # commands take effect in order, and their responses are queued and sent as soon as the earlier one is done.
     def _handle_msp_request(self, request):
-        # A complete MSP request has been received - now to create the response...
-        self._send_msp_response = True
+        if not self._send_msp_response:
+            encoder = self._msp_response_encoder
+            frames = self._prepare_msp_response(
+                request, encoder, self._msp_response_buffer
+            )
+            if frames is not None:
+                encoder.set_frames(frames)
+            self._send_msp_response = True
+            return
+
+        queue = self._msp_response_queue
+        if queue.is_full():
+            _logger.warning(
+                "MSP response queue full - discarding request for command %d",
+                request.command_id,
+            )
+            queue.overflow()
+            return
 
+        queue.put(
+            self._prepare_msp_response(request, queue.encoder, queue.response_buffer)
+        )
+
+    # Set up `encoder` to send the response to the request or, if the response is cached, return its frames.
+    def _prepare_msp_response(self, request, encoder, buffer):
         # There was something basic wrong with the request.
         if request.error is not None:
-            self._msp_response_encoder.set_error(request.error, request.command_id)
-            return
+            encoder.set_error(request.error, request.command_id)
+            return None
 
         command = self._commands.get(request.command_id)
 
         # We don't know how to handle this command.
         if command is None:
             _logger.error("no handler registered for command %d", request.command_id)
-            self._msp_response_encoder.set_error(MspError.ERROR, request.command_id)
-            return
-
-        # Create a response to the command, including the payload generated by the command handler.
-        self._msp_response_buffer.reset_offset()
-        command.handle_request(request.payload, self._msp_response_buffer)
-        self._msp_response_encoder.set_command(
-            command.id, self._msp_response_buffer.get_buffer()
-        )
+            encoder.set_error(MspError.ERROR, request.command_id)
+            return None
+
+        cache = self._response_cache
+        # Commands signal bad requests, and streamed responses that go wrong, with `ValueError`, e.g. see
+        # `MspCommandError`.
+        try:
+            if command.streams_response:
+                encoder.set_source(command.id, command.open_response(request.payload))
+            elif cache and command.cacheable:
+                payload = request.payload.get_buffer(use_offset=False)
+                frames = cache.get(command.id, payload)
+                if frames is None:
+                    frames = cache.put(
+                        command.id,
+                        payload,
+                        self._create_response(command, request, buffer),
+                    )
+                return frames
+            else:
+                encoder.set_command(
+                    command.id, self._create_response(command, request, buffer)
+                )
+        except ValueError as e:
+            self._log_response_failure(command.id, e)
+            encoder.set_error(MspError.ERROR, command.id)
+
+        if cache and not command.cacheable:
+            cache.invalidate()
+        return None
+
+    @staticmethod
+    def _log_response_failure(command_id, e):
+        _logger.error("response to command %d failed - %s", command_id, e)
+
+    def _get_request_stream(self, command_id):
+        command = self._commands.get(command_id)
+        return command if command is not None and command.streams_request else None
+
+    # Create a response to the command, including the payload generated by the command handler.
+    @staticmethod
+    def _create_response(command, request, buffer):
+        buffer.reset_offset()
+        command.handle_request(request.payload, buffer)
+        return buffer.get_buffer()
@@ -1,9 +1,15 @@
 import logging
 from sport.control_code import SportControlCode as Code
+from util import metrics
 from util.buffer import WriteBuffer
 
 _logger = logging.getLogger("frame")
 
+CHECKSUM_ERRORS_METRIC = "sport.checksum_errors"
+
+_metrics = metrics.registry.values
+_CHECKSUM_ERRORS = metrics.registry.counter(CHECKSUM_ERRORS_METRIC)
+
 
 class FrameId:
     MSP_CLIENT = 0x30
@@ -15,7 +21,8 @@ class Frame:
     _FRAME_LEN = 7  # 1 byte frame ID and 6 bytes of payload.
 
     def __init__(self):
-        self.buffer = memoryview(bytearray(self._FRAME_LEN))
+        self.raw = bytearray(self._FRAME_LEN)
+        self.buffer = memoryview(self.raw)
         self.payload = self.buffer[1 : self._FRAME_LEN]  # First byte is the frame_id.
 
     def get_id(self):
@@ -39,6 +46,10 @@ class FrameDecoder:
         self._checksum_total = 0
         self._escaping = False
 
+    # True if any bytes have been received since the last `reset`.
+    def has_started(self):
+        return self._decoded.get_offset() > 0 or self._escaping
+
     def decode(self, b):
         if b == Code.ESCAPE:
             self._escaping = True
@@ -54,40 +65,120 @@ class FrameDecoder:
             return None
 
         # We've received the complete frame so validate and return it.
+        return self._validate()
 
+    def _validate(self):
         if not Checksum.validate(self._checksum_total):
             _logger.error("invalid checksum")
+            _metrics[_CHECKSUM_ERRORS] += 1
             return self.INVALID_FRAME
 
         return self._frame
 
+    # Decode bytes from `buffer`, starting at `start`, until the frame is complete or the buffer is exhausted.
+    # Returns the frame (or `INVALID_FRAME` or `None` if more is needed) and the number of bytes consumed.
+    # Runs of unescaped bytes are copied straight into the frame. Decoding stops, without consuming it,
+    # at a start byte as this can only mean that the frame was truncated.
+    def decode_into(self, buffer, start=0):
+        end = len(buffer)
+        i = start
+        decoded = self._decoded
+
+        while i < end:
+            b = buffer[i]
+            if self._escaping:
+                self._escaping = False
+                b ^= Code.ESCAPE_XOR
+            elif b == Code.ESCAPE:
+                self._escaping = True
+                i += 1
+                continue
+            elif b == Code.START:
+                break
+            else:
+                # Find the run of bytes that can be copied as is, summing them as we go.
+                run_end = min(end, i + decoded.remaining())
+                total = 0
+                j = i
+                while j < run_end:
+                    b = buffer[j]
+                    if b == Code.ESCAPE or b == Code.START:
+                        break
+                    total += b
+                    j += 1
+                if j > i:
+                    decoded.write(buffer, i, j - i)
+                    self._checksum_total += total
+                    i = j
+                    continue
+                # The frame is full and the next byte is the checksum.
+                b = buffer[i]
+
+            i += 1
+            self._checksum_total += b
+
+            if decoded.has_remaining():
+                decoded.write_u8(b)
+            else:
+                return self._validate(), i - start
+
+        return None, i - start
+
 
 class FrameEncoder:
-    _BUFFER_LEN = 16  # Worst case: frame ID + payload + checksum = 8 and every byte is doubled by escaping.
+    # Worst case: frame ID + payload + checksum = 8 and every byte is doubled by escaping.
+    MAX_ENCODED_LEN = 16
+
+    # MicroPython doesn't support searching a `bytearray` for an `int` but does support searching for a sub-sequence.
+    _START_SEQ = bytes([Code.START])
+    _ESCAPE_SEQ = bytes([Code.ESCAPE])
 
     def __init__(self):
         self._frame = Frame()
-        self._encoded = WriteBuffer(length=self._BUFFER_LEN)
+        self._encoded = bytearray(self.MAX_ENCODED_LEN)
+        self._encoded_view = memoryview(self._encoded)
 
     def get_frame(self):
         return self._frame
 
-    def _append(self, b):
-        if b == Code.ESCAPE or b == Code.START:
-            self._encoded.write_u8(Code.ESCAPE)
-            b ^= Code.ESCAPE_XOR
-        self._encoded.write_u8(b)
-
     def encode(self):
-        self._encoded.reset_offset()
-
-        for b in self._frame.buffer:
-            self._append(b)
-
-        total = sum(self._frame.buffer)
-        self._append(Checksum.calculate(total))
-
-        return self._encoded.get_buffer()
+        raw = self._frame.raw
+        encoded = self._encoded
+
+        # Usually nothing needs escaping and the frame can be copied as is.
+        if self._START_SEQ not in raw and self._ESCAPE_SEQ not in raw:
+            length = len(raw)
+            encoded[0:length] = raw
+            checksum = Checksum.calculate(sum(raw))
+        else:
+            length, checksum = self._escape(raw, encoded)
+
+        if checksum == Code.ESCAPE or checksum == Code.START:
+            encoded[length] = Code.ESCAPE
+            encoded[length + 1] = checksum ^ Code.ESCAPE_XOR
+            length += 2
+        else:
+            encoded[length] = checksum
+            length += 1
+
+        return self._encoded_view[:length]
+
+    # Copy `raw` to `encoded`, escaping as needed, and calculate the checksum as the bytes are copied.
+    @staticmethod
+    def _escape(raw, encoded):
+        length = 0
+        checksum = 0
+        for b in raw:
+            checksum += b
+            if checksum > 0xFF:
+                checksum = (checksum & 0xFF) + 1  # End-around carry.
+            if b == Code.ESCAPE or b == Code.START:
+                encoded[length] = Code.ESCAPE
+                length += 1
+                b ^= Code.ESCAPE_XOR
+            encoded[length] = b
+            length += 1
+        return length, 0xFF - checksum
 
 
 class Checksum:
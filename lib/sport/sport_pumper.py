@@ -3,10 +3,17 @@ from sport.control_code import SportControlCode
 
 from sport.frame import FrameDecoder, FrameEncoder
 from sport.physical_id import PhysicalId
+from util import metrics
+from util.slot_stats import SlotStats
 from util.uart_pumper import UartPumper
 
 _logger = logging.getLogger("sport_pumper")
 
+MISSED_SLOTS_METRIC = "sport.missed_slots"
+
+_metrics = metrics.registry.values
+_MISSED_SLOTS = metrics.registry.counter(MISSED_SLOTS_METRIC)
+
 
 # The Sport bus is managed by the FrSky receiver. It cycles through a sequence of physical IDs, transmitting an
 # invitation for each ID in turn to transmit. It pauses for about 12ms after each invite, giving the device with the
@@ -19,10 +26,37 @@ _logger = logging.getLogger("sport_pumper")
 # each time its given an opportunity to transmit, e.g. it might transmit a current value one time, voltage the next
 # and temperature the next.
 class SportPumper(UartPumper):
-    _BAUD_RATE = 57600
+    BAUD_RATE = 57600
 
-    def __init__(self, tx, rx):
-        super().__init__(tx, rx, self._BAUD_RATE, echo=True)
+    # `echo` should only be false if the transport doesn't echo transmitted bytes back, e.g. a pseudo-terminal.
+    # If `slot_stats` is provided, the time taken by each stage of publishing is recorded - see `SlotStats`.
+    # `wait` determines how the pumper waits for the echo of what it transmits - see `UartPumper` for this and
+    # for `rx_buffer_len` and `timed_rx_stats`.
+    # Truncated frames, i.e. a start byte arriving mid-frame, and frames with invalid checksums, from the devices
+    # we subscribe to, are counted as gaps in the pumper's `RxStats`.
+    def __init__(
+        self,
+        tx,
+        rx,
+        echo=True,
+        transport=None,
+        slot_stats=None,
+        wait=None,
+        rx_buffer_len=0,
+        timed_rx_stats=False,
+    ):
+        super().__init__(
+            tx,
+            rx,
+            self.BAUD_RATE,
+            echo=echo,
+            transport=transport,
+            wait=wait,
+            rx_buffer_len=rx_buffer_len,
+            timed_rx_stats=timed_rx_stats,
+            max_write_len=FrameEncoder.MAX_ENCODED_LEN,
+        )
+        self._slot_stats = slot_stats
         self._frame_decoder = FrameDecoder()
         self._frame_encoder = FrameEncoder()
         self._frame_listener = None
@@ -35,41 +69,80 @@ class SportPumper(UartPumper):
 
     def add_publisher(self, physical_id, publisher):
         self._publish_ids[physical_id] = publisher
+        if self._slot_stats:
+            self._slot_stats.add_id(physical_id)
+
+    def get_slot_stats(self):
+        return self._slot_stats
 
-    def _consume(self, b, is_clear):
-        if b == SportControlCode.START:
-            self._has_physical_id = False
-        elif not self._has_physical_id:
-            self._has_physical_id = True
-            physical_id = b
-            # Check if we want to listen for data published by another device during this slot.
-            self._frame_listener = self._subscribe_ids.get(physical_id)
-            if self._frame_listener:
-                self._frame_decoder.reset()
+    def dump_slot_stats(self):
+        if self._slot_stats:
+            self._slot_stats.dump(PhysicalId.name)
+
+    def _consume_chunk(self, chunk):
+        count = len(chunk)
+        i = 0
+        while i < count:
+            b = chunk[i]
+            if b == SportControlCode.START:
+                self._has_physical_id = False
+                # A frame that's still in progress was truncated - the decoder resyncs on the start byte.
+                # If nothing was received, the device just didn't use its slot.
+                if self._frame_listener:
+                    self._frame_listener = None
+                    if self._frame_decoder.has_started():
+                        self._rx_stats.gap()
+            elif not self._has_physical_id:
+                self._has_physical_id = True
+                physical_id = b
+                # Check if we want to listen for data published by another device during this slot.
+                self._frame_listener = self._subscribe_ids.get(physical_id)
+                if self._frame_listener:
+                    self._frame_decoder.reset()
+                else:
+                    # Check if we want to publish data during this slot.
+                    self._handle_publish(physical_id, i, count)
+            elif self._frame_listener:
+                frame, consumed = self._frame_decoder.decode_into(chunk, i)
+                if frame:
+                    if frame is not FrameDecoder.INVALID_FRAME:
+                        self._frame_listener(frame)
+                    else:
+                        self._rx_stats.gap()
+                    self._frame_listener = None
+                # As `b` isn't a start byte, at least one byte is always consumed.
+                i += consumed
+                continue
             else:
-                # Check if we want to publish data during this slot.
-                self._handle_publish(physical_id, is_clear)
-        elif self._frame_listener:
-            frame = self._frame_decoder.decode(b)
-            if frame:
-                if frame is not FrameDecoder.INVALID_FRAME:
-                    self._frame_listener(frame)
-                self._frame_listener = None
-        else:
-            _logger.debug("ignoring 0x%02X", b)
+                _logger.debug("ignoring 0x%02X", b)
+            i += 1
 
-    def _handle_publish(self, physical_id, is_clear):
+    # `i` and `count` locate the physical ID byte within the current chunk - see `UartPumper._is_clear`.
+    def _handle_publish(self, physical_id, i, count):
         write_frame = self._publish_ids.get(physical_id)
 
         if not write_frame:
             return
 
-        if is_clear():
+        stats = self._slot_stats
+
+        if self._is_clear(i, count):
+            if stats:
+                stats.start(physical_id)
             send = write_frame(self._frame_encoder.get_frame())
+            if stats:
+                stats.mark(SlotStats.WRITE_FRAME)
             if send:
                 encoded_frame = self._frame_encoder.encode()
+                if stats:
+                    stats.mark(SlotStats.ENCODE)
                 self._write(encoded_frame)
+            if stats:
+                stats.finish()
         else:
+            if stats:
+                stats.not_clear(physical_id)
+            _metrics[_MISSED_SLOTS] += 1
             # This could happen if we're reading too slowly or if some other device has stolen this slot.
             _logger.error(
                 "%s slot is not clear for writing", PhysicalId.name(physical_id)
@@ -1,23 +1,31 @@
 import time
 
+from util.wait_strategy import SpinWait
 
-# Use to do a blocking read (with timeout) on a non-blocking stream.
+
+# Use to do a blocking read (with timeout) on a non-blocking stream. A `timeout` of 0 means wait indefinitely.
+# How it waits between reads is determined by `wait`, a `WaitStrategy` - by default it busy-waits.
 class BlockingReader:
-    def __init__(self, timeout=0):
+    def __init__(self, timeout=0, wait=None):
         self._timeout = timeout
+        self._wait = wait if wait else SpinWait()
         self._buffer = bytearray(1)
 
     def read(self, stream):
         start = time.monotonic_ns()
+        self._wait.start()
         while True:
             count = stream.readinto(self._buffer)
             # None means a timeout. A `count` of 0 should never really happen.
             if count is not None:
                 return self._buffer[0] if count == 1 else None
             elif self._timeout != 0:
-                diff = time.monotonic_ns() - start
-                if diff > self._timeout:
+                remaining = self._timeout - (time.monotonic_ns() - start)
+                if remaining < 0:
                     return None
+                self._wait.wait(stream, remaining)
+            else:
+                self._wait.wait(stream, -1)
 
     # Calculate a timeout (in nanoseconds) based on a multiple of the transmission
     # time for a byte at a given baud rate (assuming 8 data bits and one stop bit).
@@ -3,12 +3,23 @@ import struct
 from util.util import ByteOrder
 
 
+# The typed accessors below don't allocate - they're used for every MSP frame and sensor value.
+# Reads assemble values from individual bytes rather than using `struct.unpack_from` as that allocates a tuple
+# (values of up to 30 bits are small ints in CircuitPython, so don't allocate either). Writes use
+# `struct.pack_into` which doesn't allocate.
 class Buffer:
     def __init__(self, *, buffer=None, length=-1, byte_order=ByteOrder.LITTLE):
         self._buffer = None
         self._length = 0
         self._offset = 0
         self._byte_order = byte_order
+        self._little = byte_order == ByteOrder.LITTLE
+
+        prefix = "<" if self._little else ">"
+        self._u16_format = prefix + "H"
+        self._u32_format = prefix + "I"
+        self._i16_format = prefix + "h"
+        self._i32_format = prefix + "i"
 
         if buffer is not None:
             self.set_buffer(buffer, length)
@@ -48,8 +59,32 @@ class ReadBuffer(Buffer):
         self._offset += 1
         return v
 
+    def peek_u8(self):
+        return self._buffer[self._offset]
+
     def read_u16(self):
-        return int.from_bytes(self.read(2), self._byte_order)
+        b = self._buffer
+        i = self._offset
+        self._offset = i + 2
+        if self._little:
+            return b[i] | (b[i + 1] << 8)
+        return (b[i] << 8) | b[i + 1]
+
+    def read_u32(self):
+        b = self._buffer
+        i = self._offset
+        self._offset = i + 4
+        if self._little:
+            return b[i] | (b[i + 1] << 8) | (b[i + 2] << 16) | (b[i + 3] << 24)
+        return (b[i] << 24) | (b[i + 1] << 16) | (b[i + 2] << 8) | b[i + 3]
+
+    def read_i16(self):
+        v = self.read_u16()
+        return v - 0x10000 if v & 0x8000 else v
+
+    def read_i32(self):
+        v = self.read_u32()
+        return v - 0x100000000 if v & 0x80000000 else v
 
     def read(self, length=-1):
         if length == -1:
@@ -58,6 +93,19 @@ class ReadBuffer(Buffer):
         self._offset += length
         return self._buffer[start : self._offset]
 
+    # Copy `length` bytes (by default all remaining bytes) to `buffer`, a `WriteBuffer`, without allocating.
+    def read_into(self, buffer, length=-1):
+        if length == -1:
+            length = self.remaining()
+        buffer.copy_from(self._buffer, self._offset, length)
+        self._offset += length
+
+    # Read a record described by a `struct` format, e.g. "<BBH", and return its values as a tuple.
+    def unpack_from(self, fmt):
+        values = struct.unpack_from(fmt, self._buffer, self._offset)
+        self._offset += struct.calcsize(fmt)
+        return values
+
 
 class WriteBuffer(Buffer):
     def write_u8(self, v):
@@ -65,7 +113,20 @@ class WriteBuffer(Buffer):
         self._offset += 1
 
     def write_u16(self, v):
-        self.write(v.to_bytes(2, self._byte_order))
+        struct.pack_into(self._u16_format, self._buffer, self._offset, v)
+        self._offset += 2
+
+    def write_u32(self, v):
+        struct.pack_into(self._u32_format, self._buffer, self._offset, v)
+        self._offset += 4
+
+    def write_i16(self, v):
+        struct.pack_into(self._i16_format, self._buffer, self._offset, v)
+        self._offset += 2
+
+    def write_i32(self, v):
+        struct.pack_into(self._i32_format, self._buffer, self._offset, v)
+        self._offset += 4
 
     def write(self, buffer, offset=0, length=-1):
         if length == -1:
@@ -75,6 +136,18 @@ class WriteBuffer(Buffer):
         end = offset + length
         self._buffer[start : self._offset] = buffer[offset:end]
 
+    # Like `write` but without allocating - `write` slices `buffer`. The copy is byte-by-byte, which for the few
+    # bytes of a S.Port frame is cheaper than allocating a slice.
+    def copy_from(self, buffer, offset, length):
+        dst = self._buffer
+        j = self._offset
+        end = offset + length
+        while offset < end:
+            dst[j] = buffer[offset]
+            offset += 1
+            j += 1
+        self._offset = j
+
     def pack_into(self, fmt, *values):
         struct.pack_into(fmt, self._buffer, self._offset, *values)
         self._offset += struct.calcsize(fmt)
@@ -0,0 +1,136 @@
+import logging
+import time
+
+from util import metrics
+from util.blocking_reader import BlockingReader
+from util.wait_strategy import SpinWait
+
+_logger = logging.getLogger("echo_verifier")
+
+ECHO_ERRORS_METRIC = "echo.errors"
+
+_metrics = metrics.registry.values
+_ECHO_ERRORS = metrics.registry.counter(ECHO_ERRORS_METRIC)
+
+
+# On a half-duplex bus, like S.Port, every byte written on the TX pin is echoed back on the RX pin. The echo of a
+# whole write is read with one deadline, rather than a blocking read per byte, and then compared in one pass.
+# The full span is always consumed, even if it doesn't match, so that the RX stream stays aligned for the next slot.
+#
+# The deadline allows for the transmission time of the span plus `slack` bytes. Statistics are accumulated in the
+# public attributes below - times are in microseconds. Between reads, it waits as determined by `wait`, a
+# `WaitStrategy` - by default it busy-waits.
+class EchoVerifier:
+    def __init__(self, baud_rate, max_len, slack=4, wait=None):
+        self._byte_timeout = BlockingReader.calculate_timeout(baud_rate, 1)
+        self._slack = slack
+        self._wait = wait if wait else SpinWait()
+        self._buffer = bytearray(max_len)
+        self._view = memoryview(self._buffer)
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.bytes = 0
+        self.reads = 0
+        self.mismatches = 0
+        self.mismatched_bytes = 0
+        self.timeouts = 0
+        self.missing_bytes = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    # Read the echo of `tx_buffer` from `stream` and return true if it was received in full and matched.
+    def verify(self, stream, tx_buffer):
+        count = len(tx_buffer)
+        if count > len(self._buffer):
+            raise ValueError("echo span too long")
+
+        start = time.monotonic_ns()
+        deadline = start + self._byte_timeout * (count + self._slack)
+        view = self._view
+        wait = self._wait
+        wait.start()
+        received = 0
+        reads = 0
+        while received < count:
+            n = stream.readinto(view[received:count])
+            reads += 1
+            if n:
+                received += n
+                continue
+            remaining = deadline - time.monotonic_ns()
+            if remaining < 0:
+                break
+            # Wait for the outstanding bytes' transmission time, at most.
+            timeout = self._byte_timeout * (count - received)
+            wait.wait(stream, timeout if timeout < remaining else remaining)
+
+        elapsed = (time.monotonic_ns() - start) // 1000
+        self.frames += 1
+        self.bytes += received
+        self.reads += reads
+        self.total_us += elapsed
+        if elapsed > self.max_us:
+            self.max_us = elapsed
+
+        buffer = self._buffer
+        mismatched = 0
+        first = -1
+        i = 0
+        while i < received:
+            if buffer[i] != tx_buffer[i]:
+                if first == -1:
+                    first = i
+                mismatched += 1
+            i += 1
+
+        ok = True
+        if mismatched or received < count:
+            _metrics[_ECHO_ERRORS] += 1
+        if mismatched:
+            self.mismatches += 1
+            self.mismatched_bytes += mismatched
+            _logger.error(
+                "echo - expected 0x%02X, got 0x%02X at %d (%d of %d bytes differ)",
+                tx_buffer[first],
+                buffer[first],
+                first,
+                mismatched,
+                count,
+            )
+            ok = False
+        if received < count:
+            self.timeouts += 1
+            self.missing_bytes += count - received
+            _logger.error("echo - timed out after %d of %d bytes", received, count)
+            ok = False
+        return ok
+
+    # Returns (frames, bytes, mismatches, timeouts, avg_us, max_us).
+    def get_summary(self):
+        avg = self.total_us // self.frames if self.frames else 0
+        return (
+            self.frames,
+            self.bytes,
+            self.mismatches,
+            self.timeouts,
+            avg,
+            self.max_us,
+        )
+
+    def dump(self):
+        print(
+            "echo: frames={} bytes={} reads={} mismatches={} ({} bytes) timeouts={} ({} bytes missing) "
+            "avg={}us max={}us".format(
+                self.frames,
+                self.bytes,
+                self.reads,
+                self.mismatches,
+                self.mismatched_bytes,
+                self.timeouts,
+                self.missing_bytes,
+                self.total_us // self.frames if self.frames else 0,
+                self.max_us,
+            )
+        )
@@ -0,0 +1,73 @@
+from array import array
+
+from util.util import repeat
+
+
+# Counters and gauges for field visibility into bus health, e.g. checksum failures and lost frames, that would
+# otherwise only be logged. Values live in one preallocated array - modules look up a metric's index once, at
+# import, and then updating it in a hot path is just an indexed add with no allocation:
+#
+#     _values = metrics.registry.values
+#     CHECKSUM_ERRORS_METRIC = "sport.checksum_errors"
+#     _CHECKSUM_ERRORS = metrics.registry.counter(CHECKSUM_ERRORS_METRIC)
+#     ...
+#     _values[_CHECKSUM_ERRORS] += 1
+#
+# Registering a name that's already registered returns the existing index, so the order in which modules are
+# imported doesn't matter. The owning module exports each name as a `..._METRIC` constant for anything that reads
+# the metric, e.g. `sensor/health.py`. Values are C `long`s - 32-bit on the board and usually 64-bit on a host.
+# On the board, storing a value past the maximum silently truncates it, so a counter wraps around to negative
+# after 2^31 - 1 (CPython raises `OverflowError` instead). Even at one error per S.Port slot (~12ms), that takes
+# the best part of a year.
+class MetricsRegistry:
+    COUNTER = 0
+    GAUGE = 1
+
+    def __init__(self, capacity=32):
+        self.values = array("l", repeat(0, capacity))
+        self._indexes = {}
+        self._names = []
+        self._kinds = bytearray(capacity)
+
+    def counter(self, name):
+        return self.register(name, self.COUNTER)
+
+    def gauge(self, name):
+        return self.register(name, self.GAUGE)
+
+    def register(self, name, kind):
+        index = self._indexes.get(name)
+        if index is not None:
+            if self._kinds[index] != kind:
+                raise ValueError(
+                    "{} is already registered as another kind".format(name)
+                )
+            return index
+        index = len(self._names)
+        if index == len(self.values):
+            raise ValueError("too many metrics")
+        self._indexes[name] = index
+        self._names.append(name)
+        self._kinds[index] = kind
+        return index
+
+    def index(self, name):
+        return self._indexes[name]
+
+    def get(self, name):
+        return self.values[self._indexes[name]]
+
+    # Counters are zeroed, gauges keep their current values.
+    def reset(self):
+        values = self.values
+        for index in range(len(self._names)):
+            if self._kinds[index] == self.COUNTER:
+                values[index] = 0
+
+    def dump(self):
+        for index, name in enumerate(self._names):
+            print("{}: {}".format(name, self.values[index]))
+
+
+# The registry used by the rest of the stack.
+registry = MetricsRegistry()
@@ -0,0 +1,86 @@
+import time
+
+from util.blocking_reader import BlockingReader
+
+
+# Receive-side health of a pumper, to spot overflows and to size receive buffers from data rather than guesswork.
+# * Every read is counted and `max_fill` is the most bytes returned by a single read. A read that fills the whole
+#   receive buffer (`full_reads`) suggests that more was waiting and may have been dropped.
+# * Gaps are reported by the pumper's protocol, e.g. S.BUS framing errors or S.Port resyncs. These are the
+#   visible symptom of bytes lost to an overflow.
+# * If `timed` is true, the interval between consecutive pumps is also measured (this calls `time.monotonic_ns`
+#   on every pump so it's off by default). `overflow_risks` counts intervals long enough for more than a buffer's
+#   worth of bytes to arrive at the baud rate. Note: with `SelectorPumpMaster`, pumpers are only pumped when data
+#   is available so idle time inflates the intervals - use `max_fill` there.
+class RxStats:
+    _MIN_BUFFER_LEN = 16
+
+    def __init__(self, baud_rate, buffer_len, timed=False):
+        self._byte_time = BlockingReader.calculate_timeout(baud_rate, 1)
+        self.buffer_len = buffer_len
+        self.timed = timed
+        self.reset()
+
+    def reset(self):
+        self.reads = 0
+        self.bytes = 0
+        self.max_fill = 0
+        self.full_reads = 0
+        self.gaps = 0
+        self.max_interval_us = 0
+        self.overflow_risks = 0
+        self._last_pump = 0
+
+    def received(self, count):
+        self.reads += 1
+        self.bytes += count
+        if count > self.max_fill:
+            self.max_fill = count
+        if count >= self.buffer_len:
+            self.full_reads += 1
+
+    def gap(self, count=1):
+        self.gaps += count
+
+    # Only called if `timed` is true.
+    def pumped(self):
+        now = time.monotonic_ns()
+        last = self._last_pump
+        self._last_pump = now
+        if last == 0:
+            return
+        interval = now - last
+        if interval // 1000 > self.max_interval_us:
+            self.max_interval_us = interval // 1000
+        if interval > self._byte_time * self.buffer_len:
+            self.overflow_risks += 1
+
+    # The smallest power of two that holds `margin` times the most bytes seen, or that could arrive in the longest
+    # pump interval, so far.
+    def recommend_buffer_len(self, margin=2):
+        worst = self.max_fill
+        arrivable = self.max_interval_us * 1000 // self._byte_time + 1
+        if self.timed and arrivable > worst:
+            worst = arrivable
+        needed = worst * margin
+        length = self._MIN_BUFFER_LEN
+        while length < needed:
+            length <<= 1
+        return length
+
+    def dump(self, name):
+        print(
+            "{}: reads={} bytes={} max_fill={}/{} full_reads={} gaps={} max_interval={}us overflow_risks={} "
+            "recommended_buffer_len={}".format(
+                name,
+                self.reads,
+                self.bytes,
+                self.max_fill,
+                self.buffer_len,
+                self.full_reads,
+                self.gaps,
+                self.max_interval_us,
+                self.overflow_risks,
+                self.recommend_buffer_len(),
+            )
+        )
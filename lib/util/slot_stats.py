@@ -0,0 +1,127 @@
+import array
+import time
+
+from util.util import repeat
+
+
+class _IdStats:
+    def __init__(self, bucket_count):
+        self.histogram = array.array("L", repeat(0, bucket_count))
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.total = 0
+        self.min = -1
+        self.max = 0
+        self.not_clear = 0
+        histogram = self.histogram
+        for i in range(len(histogram)):
+            histogram[i] = 0
+
+
+# Records how long each stage of publishing a frame takes, relative to when the physical ID byte was processed.
+# Durations are in microseconds. The most recent slots are kept in a ring buffer and, per physical ID, the
+# min/avg/max and a histogram of the total time taken are accumulated. Everything is preallocated, apart from
+# the stats for each physical ID which are allocated when the ID is added.
+class SlotStats:
+    PHYSICAL_ID = 0
+    WRITE_FRAME = 1
+    ENCODE = 2
+    WRITE = 3
+    ECHO = 4
+
+    _STAGE_COUNT = 5
+    _NOT_REACHED = -1
+
+    def __init__(self, capacity=64, bucket_us=500, bucket_count=26):
+        self._capacity = capacity
+        self._bucket_us = bucket_us
+        self._bucket_count = bucket_count
+        self._ids = bytearray(capacity)
+        self._durations = array.array("l", repeat(0, capacity * self._STAGE_COUNT))
+        self._next = 0
+        self._size = 0
+        self._start = 0
+        self._physical_id = 0
+        self._record = 0
+        self._id_stats = {}
+
+    def add_id(self, physical_id):
+        self._id_stats[physical_id] = _IdStats(self._bucket_count)
+
+    def start(self, physical_id):
+        self._start = time.monotonic_ns()
+        self._physical_id = physical_id
+        self._record = self._next * self._STAGE_COUNT
+        durations = self._durations
+        for i in range(self._record, self._record + self._STAGE_COUNT):
+            durations[i] = self._NOT_REACHED
+        durations[self._record] = 0
+
+    def mark(self, stage):
+        self._durations[self._record + stage] = (
+            time.monotonic_ns() - self._start
+        ) // 1000
+
+    # Record that the slot couldn't be used - see `SportPumper._handle_publish`.
+    def not_clear(self, physical_id):
+        self._id_stats[physical_id].not_clear += 1
+
+    def finish(self):
+        elapsed = (time.monotonic_ns() - self._start) // 1000
+
+        self._ids[self._next] = self._physical_id
+        self._next = (self._next + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+        stats = self._id_stats[self._physical_id]
+        stats.count += 1
+        stats.total += elapsed
+        if stats.min == -1 or elapsed < stats.min:
+            stats.min = elapsed
+        if elapsed > stats.max:
+            stats.max = elapsed
+        bucket = min(elapsed // self._bucket_us, self._bucket_count - 1)
+        stats.histogram[bucket] += 1
+
+    # Returns (count, min, avg, max, not_clear) for the total time taken by slots for the given physical ID.
+    def get_summary(self, physical_id):
+        s = self._id_stats[physical_id]
+        avg = s.total // s.count if s.count else 0
+        return s.count, max(s.min, 0), avg, s.max, s.not_clear
+
+    def get_histogram(self, physical_id):
+        return self._id_stats[physical_id].histogram
+
+    # Yields the physical ID and the per-stage durations of the recorded slots, oldest first.
+    def get_recent(self):
+        first = (self._next - self._size) % self._capacity
+        for n in range(self._size):
+            i = (first + n) % self._capacity
+            start = i * self._STAGE_COUNT
+            yield self._ids[i], self._durations[start : start + self._STAGE_COUNT]
+
+    # Forget the recorded slots and zero the stats of each physical ID, keeping the IDs that have been added.
+    def reset(self):
+        self._next = 0
+        self._size = 0
+        self._record = 0
+        for stats in self._id_stats.values():
+            stats.reset()
+
+    def dump(self, name=lambda physical_id: "0x{:02X}".format(physical_id)):
+        for physical_id in self._id_stats:
+            count, lo, avg, hi, not_clear = self.get_summary(physical_id)
+            print(
+                "{}: count={} min={}us avg={}us max={}us not_clear={}".format(
+                    name(physical_id), count, lo, avg, hi, not_clear
+                )
+            )
+            histogram = self.get_histogram(physical_id)
+            print(
+                "    histogram ({}us buckets): {}".format(
+                    self._bucket_us, " ".join(str(c) for c in histogram)
+                )
+            )
@@ -0,0 +1,17 @@
+# A transport is anything that provides the subset of `busio.UART` used by `UartPumper`, i.e. a non-blocking
+# `readinto` that returns `None` if no data is available, `write` and `in_waiting`. Transports that can be
+# waited on, e.g. with `selectors` on Linux, also provide `fileno`.
+# A transport factory takes the TX and RX pins (or their equivalent), the baud rate and the receive buffer length.
+
+
+# `busio` is only imported when needed so that the rest of the stack can run where it isn't available.
+def create_busio_transport(tx, rx, baud_rate, buffer_len):
+    import busio
+
+    return busio.UART(
+        tx,
+        rx,
+        baudrate=baud_rate,
+        timeout=0,
+        receiver_buffer_size=buffer_len,
+    )
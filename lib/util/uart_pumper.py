@@ -1,8 +1,9 @@
 import logging
 
-import busio
-
-from util.blocking_reader import BlockingReader
+from util.echo_verifier import EchoVerifier
+from util.rx_stats import RxStats
+from util.slot_stats import SlotStats
+from util.transport import create_busio_transport
 
 _logger = logging.getLogger("uart_pumper")
 
@@ -10,47 +11,95 @@ _logger = logging.getLogger("uart_pumper")
 class UartPumper:
     _RX_BUFFER_LEN = 32
 
-    def __init__(self, tx, rx, baud_rate, echo=False):
-        self._uart = busio.UART(
-            tx,
-            rx,
-            baudrate=baud_rate,
-            timeout=0,
-            receiver_buffer_size=self._RX_BUFFER_LEN,
+    # `transport` is a factory for the underlying UART - see `util/transport.py`.
+    # `wait` is the `WaitStrategy` used while waiting for echoed bytes - see `util/wait_strategy.py`.
+    # `rx_buffer_len` overrides the default size of both the driver's receive buffer and the buffer it's read into,
+    # e.g. as recommended by `RxStats`. If `timed_rx_stats` is true, pump intervals are also measured.
+    # `max_write_len` is the longest span passed to `_write`, i.e. the longest echo, and defaults to the receive
+    # buffer size - it's independent of `rx_buffer_len` as the echo is read into a buffer of its own.
+    def __init__(
+        self,
+        tx,
+        rx,
+        baud_rate,
+        echo=False,
+        transport=None,
+        wait=None,
+        rx_buffer_len=0,
+        timed_rx_stats=False,
+        max_write_len=0,
+    ):
+        if transport is None:
+            transport = create_busio_transport
+        buffer_len = rx_buffer_len if rx_buffer_len else self._RX_BUFFER_LEN
+        self._uart = transport(tx, rx, baud_rate, buffer_len)
+        self._rx_buffer = bytearray(buffer_len)
+        self._rx_view = memoryview(self._rx_buffer)
+        self._rx_stats = RxStats(baud_rate, buffer_len, timed_rx_stats)
+        if not max_write_len:
+            max_write_len = buffer_len
+        self._echo_verifier = (
+            EchoVerifier(baud_rate, max_write_len, wait=wait) if echo else None
         )
-        self._rx_buffer = bytearray(self._RX_BUFFER_LEN)
-        self._blocking_reader = self.create_blocking_reader(baud_rate) if echo else None
+        self._slot_stats = None
+
+        # State for the per-byte `_consume` shim - `is_clear` is bound once here rather than per call to `pump`.
+        self._shim_index = 0
+        self._shim_count = 0
+        self._shim_is_clear = self._is_shim_clear
 
-    @staticmethod
-    def create_blocking_reader(baud_rate):
-        timeout = BlockingReader.calculate_timeout(baud_rate, factor=4)
-        return BlockingReader(timeout)
+    # Returns `None` if the transport doesn't echo transmitted bytes.
+    def get_echo_verifier(self):
+        return self._echo_verifier
 
     def _write(self, tx_buffer):
         self._uart.write(tx_buffer)
+        if self._slot_stats:
+            self._slot_stats.mark(SlotStats.WRITE)
         self._consume_echo(tx_buffer)
+        if self._slot_stats:
+            self._slot_stats.mark(SlotStats.ECHO)
 
     # Consume the bytes that have just been written on the TX pin and echoed on the RX pin.
     def _consume_echo(self, tx_buffer):
-        if self._blocking_reader:
-            for b in tx_buffer:
-                echo = self._blocking_reader.read(self._uart)
-                if echo != b:
-                    _logger.error("echo - expected 0x%02X, got 0x%02X", b, echo)
-                    return
+        if self._echo_verifier:
+            self._echo_verifier.verify(self._uart, tx_buffer)
+
+    def get_rx_stats(self):
+        return self._rx_stats
+
+    # Allows pumpers to be registered with `selectors` if the transport supports it.
+    def fileno(self):
+        return self._uart.fileno()
 
     def pump(self):
         count = self._uart.readinto(self._rx_buffer)
+        stats = self._rx_stats
+        if stats.timed:
+            stats.pumped()
         if count:
-            i = 0
-            last = count - 1
-
-            def is_clear():
-                return i == last and self._uart.in_waiting == 0
-
-            while i < count:
-                self._consume(self._rx_buffer[i], is_clear)
-                i += 1
+            stats.received(count)
+            self._consume_chunk(self._rx_view[:count])
+
+    # The line is clear if `i` is the index of the last byte of a chunk of `count` bytes and nothing more has arrived.
+    def _is_clear(self, i, count):
+        return i == count - 1 and self._uart.in_waiting == 0
+
+    # Subclasses should override this to process everything read by a single `readinto` in one call.
+    # By default, it falls back to calling `_consume` for each byte.
+    def _consume_chunk(self, chunk):
+        consume = self._consume
+        is_clear = self._shim_is_clear
+        count = len(chunk)
+        self._shim_count = count
+        i = 0
+        while i < count:
+            self._shim_index = i
+            consume(chunk[i], is_clear)
+            i += 1
+
+    def _is_shim_clear(self):
+        return self._is_clear(self._shim_index, self._shim_count)
 
     def _consume(self, b, is_clear):
         raise NotImplementedError("_consume")
@@ -60,10 +109,18 @@ class UartPumper:
 class PumpMaster:
     def __init__(self):
         self._pumpers = []
+        self._background = []
 
     def register(self, pumper):
         self._pumpers.append(pumper)
 
+    # Background tasks do a small increment of work each time they're pumped, after all the pumpers have been
+    # pumped. They must provide `pump` and `has_work`, e.g. see `WriteBehindSaver`.
+    def register_background(self, task):
+        self._background.append(task)
+
     def pump_all(self):
         for pumper in self._pumpers:
             pumper.pump()
+        for task in self._background:
+            task.pump()
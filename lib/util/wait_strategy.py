@@ -0,0 +1,54 @@
+import time
+
+
+# How to wait when a non-blocking read has returned nothing but more data is expected, e.g. the echo of a
+# transmitted frame - see `BlockingReader` and `EchoVerifier`. Callers call `start` before each blocking operation
+# and `wait` each time a read comes up empty. `timeout` is the longest, in nanoseconds, that the caller wants to
+# wait before trying again, i.e. the expected transmission time of the outstanding bytes capped by any deadline,
+# or -1 if there's no limit.
+class WaitStrategy:
+    def start(self):
+        pass
+
+    def wait(self, stream, timeout):
+        raise NotImplementedError("wait")
+
+
+# Busy-wait - the lowest latency but nothing else runs while waiting.
+class SpinWait(WaitStrategy):
+    def wait(self, stream, timeout):
+        pass
+
+
+# Spin for `spin_count` empty reads, i.e. while the data is probably just about to arrive, and then call
+# `on_yield` for each further empty read. On the board, `on_yield` can do other work, e.g. pump the S.BUS reader,
+# which would otherwise be starved. By default it's `time.sleep(0)` which gives the runtime a chance to run.
+class SpinYieldWait(WaitStrategy):
+    def __init__(self, spin_count=8, on_yield=None):
+        self._spin_count = spin_count
+        self._on_yield = on_yield if on_yield else self._sleep
+        self._spins = 0
+
+    def start(self):
+        self._spins = 0
+
+    def wait(self, stream, timeout):
+        if self._spins < self._spin_count:
+            self._spins += 1
+        else:
+            self._on_yield()
+
+    @staticmethod
+    def _sleep():
+        time.sleep(0)
+
+
+# Sleep for the expected transmission time of the outstanding bytes, or one byte time at `baud_rate` if there's
+# no limit. Note: on the board, `time.sleep` has a resolution of about a millisecond.
+class SleepWait(WaitStrategy):
+    def __init__(self, baud_rate):
+        # 8 data bits and one stop bit - see `BlockingReader.calculate_timeout`.
+        self._byte_time = 9 * pow(10, 9) // baud_rate
+
+    def wait(self, stream, timeout):
+        time.sleep((timeout if timeout >= 0 else self._byte_time) / 1e9)
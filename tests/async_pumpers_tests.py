@@ -0,0 +1,144 @@
+import asyncio
+import os
+import select
+import unittest
+
+from host.async_pumpers import AsyncSportPumper
+from host.serial_transport import open_pty_pair
+from sensor.sensor import SensorEncoder
+from sport.control_code import SportControlCode
+from sport.frame import FrameEncoder
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import MISSED_SLOTS_METRIC
+from util import metrics
+from util.echo_verifier import ECHO_ERRORS_METRIC
+
+_PUBLISH_ID = PhysicalId.ID27
+_SUBSCRIBE_ID = PhysicalId.ID13
+
+
+def _encode_sensor(sensor_id, value):
+    encoder = FrameEncoder()
+    SensorEncoder.encode_value(sensor_id, value, encoder.get_frame())
+    return bytes(encoder.encode())
+
+
+def _poll(physical_id):
+    return bytes([SportControlCode.START, physical_id])
+
+
+_FRAME = _encode_sensor(0x5900, 42)
+_OTHER_FRAME = _encode_sensor(0x5901, 7)
+
+
+# A pumper whose slots have always closed by the time the publish task gets to them.
+class _LatePumper(AsyncSportPumper):
+    _SLOT_WINDOW = 0
+
+
+# The pumper reads and writes the peripheral end of a pseudo-terminal and the tests play the receiver, and the
+# echo of what's transmitted, on the controller end.
+class AsyncSportPumperTests(unittest.IsolatedAsyncioTestCase):
+    _TIMEOUT = 1
+
+    async def asyncSetUp(self):
+        self.controller, peripheral, path = open_pty_pair()
+        self.addCleanup(os.close, peripheral)
+        self.addCleanup(os.close, self.controller)
+        self.reader, self.writer = await AsyncSportPumper.open_streams(path)
+        self.published = 0
+        self.received = []
+
+    async def asyncTearDown(self):
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.writer.close()
+
+    def _start(self, cls=AsyncSportPumper, **kwargs):
+        def publish(frame):
+            self.published += 1
+            SensorEncoder.encode_value(0x5900, 42, frame)
+            return True
+
+        pumper = cls(self.reader, self.writer, **kwargs)
+        pumper.add_publisher(_PUBLISH_ID, publish)
+        pumper.add_subscriber(
+            _SUBSCRIBE_ID, lambda frame: self.received.append(bytes(frame.payload))
+        )
+        self.task = asyncio.create_task(pumper.run())
+        return pumper
+
+    async def _until(self, predicate):
+        deadline = asyncio.get_running_loop().time() + self._TIMEOUT
+        while not predicate():
+            self.assertLess(asyncio.get_running_loop().time(), deadline)
+            await asyncio.sleep(0.001)
+
+    async def _send(self, data):
+        os.write(self.controller, data)
+        # Give the read task a chance to consume the data as a chunk of its own.
+        await asyncio.sleep(0.01)
+
+    # Read what the pumper transmits.
+    async def _transmitted(self, length):
+        loop = asyncio.get_running_loop()
+        data = b""
+        while len(data) < length:
+            await self._until(lambda: select.select([self.controller], [], [], 0)[0])
+            data += await loop.run_in_executor(
+                None, os.read, self.controller, length - len(data)
+            )
+        return data
+
+    @staticmethod
+    def _delta(name, before):
+        return metrics.registry.get(name) - before
+
+    async def test_echo_skipped(self):
+        self._start()
+        echo_errors = metrics.registry.get(ECHO_ERRORS_METRIC)
+        await self._send(_poll(_PUBLISH_ID))
+        self.assertEqual(_FRAME, await self._transmitted(len(_FRAME)))
+
+        # The echo can arrive split over several chunks and be followed by other traffic.
+        await self._send(_FRAME[:3])
+        await self._send(_FRAME[3:] + _poll(_SUBSCRIBE_ID) + _OTHER_FRAME)
+        await self._until(lambda: self.received)
+        self.assertEqual(0, self._delta(ECHO_ERRORS_METRIC, echo_errors))
+        self.assertEqual(b"\x01\x59\x07\x00\x00\x00", self.received[0])
+
+    async def test_echo_mismatch(self):
+        self._start()
+        echo_errors = metrics.registry.get(ECHO_ERRORS_METRIC)
+        await self._send(_poll(_PUBLISH_ID))
+        await self._transmitted(len(_FRAME))
+
+        # The echo never arrives, so the expected echo is abandoned and the poll that's received instead is handled.
+        await self._send(_poll(_PUBLISH_ID))
+        self.assertEqual(1, self._delta(ECHO_ERRORS_METRIC, echo_errors))
+        self.assertEqual(_FRAME, await self._transmitted(len(_FRAME)))
+        self.assertEqual(2, self.published)
+
+    async def test_slot_deadline(self):
+        self._start(_LatePumper)
+        missed_slots = metrics.registry.get(MISSED_SLOTS_METRIC)
+        await self._send(_poll(_PUBLISH_ID))
+        await self._until(lambda: self._delta(MISSED_SLOTS_METRIC, missed_slots))
+        await asyncio.sleep(0.01)
+        # Nothing is written once the slot has closed.
+        self.assertEqual(0, self.published)
+        self.assertEqual([], select.select([self.controller], [], [], 0)[0])
+
+    async def test_rx_settings(self):
+        pumper = self._start(rx_buffer_len=4, timed_rx_stats=True)
+        stats = pumper._rx_stats
+        await self._send(_poll(_SUBSCRIBE_ID) + _OTHER_FRAME)
+        await self._until(lambda: self.received)
+        # Reads are limited to the buffer length and each one is timed as a pump.
+        self.assertEqual(4, stats.max_fill)
+        self.assertGreater(stats.full_reads, 0)
+        self.assertNotEqual(0, stats._last_pump)
+
+
+if __name__ == '__main__':
+    unittest.main()
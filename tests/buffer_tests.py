@@ -0,0 +1,140 @@
+import tracemalloc
+import unittest
+
+from msp.request_decoder import MspRequestDecoder
+from msp.response_encoder import MspResponseEncoder
+from sensor.sensor import SensorEncoder
+from sport.frame import Frame
+from util.buffer import ReadBuffer, WriteBuffer
+from util.util import ByteOrder
+
+
+class BufferTests(unittest.TestCase):
+    def _round_trip(self, byte_order):
+        write = WriteBuffer(length=16, byte_order=byte_order)
+        write.write_u16(0xBEEF)
+        write.write_u32(0xDEADBEEF)
+        write.write_i16(-2)
+        write.write_i32(-70000)
+        self.assertEqual(12, write.get_offset())
+
+        read = ReadBuffer(buffer=write.get_buffer(), byte_order=byte_order)
+        self.assertEqual(0xBEEF, read.read_u16())
+        self.assertEqual(0xDEADBEEF, read.read_u32())
+        self.assertEqual(-2, read.read_i16())
+        self.assertEqual(-70000, read.read_i32())
+        self.assertFalse(read.has_remaining())
+        return bytes(write.get_buffer())
+
+    def test_little_endian(self):
+        data = self._round_trip(ByteOrder.LITTLE)
+        self.assertEqual(b"\xef\xbe", data[:2])
+
+    def test_big_endian(self):
+        data = self._round_trip(ByteOrder.BIG)
+        self.assertEqual(b"\xbe\xef", data[:2])
+
+    def test_read_into(self):
+        read = ReadBuffer(buffer=memoryview(b"abcdef"))
+        write = WriteBuffer(length=8)
+        write.write_u8(ord("x"))
+        read.read_u8()
+        read.read_into(write, 3)
+        self.assertEqual(b"xbcd", bytes(write.get_buffer()))
+        read.read_into(write)
+        self.assertEqual(b"xbcdef", bytes(write.get_buffer()))
+        self.assertFalse(read.has_remaining())
+
+    def test_copy_from(self):
+        write = WriteBuffer(length=8)
+        write.write_u8(ord("x"))
+        write.copy_from(b"abcdef", 2, 3)
+        self.assertEqual(b"xcde", bytes(write.get_buffer()))
+
+    def test_unpack_from(self):
+        read = ReadBuffer(buffer=memoryview(b"\x01\x02\x03\x04\x05"))
+        read.read_u8()
+        self.assertEqual((2, 0x0403), read.unpack_from("<BH"))
+        self.assertEqual(5, read.read_u8())
+
+
+# CPython boxes most ints and allocates in places that CircuitPython doesn't, so rather than counting
+# allocations, these tests check that the peak traced memory while handling a frame is no more than a little
+# higher than while calling a function that does nothing. The slack covers CPython's own small, short-lived
+# objects, e.g. the iterator `min` creates over its arguments, but not a memoryview slice, which is what a
+# regression would most likely add.
+class AllocationTests(unittest.TestCase):
+    _PAYLOAD_LEN = 40
+    _TOLERANCE = 64
+
+    def setUp(self):
+        self.frame = Frame()
+        tracemalloc.start()
+
+    def tearDown(self):
+        tracemalloc.stop()
+
+    @staticmethod
+    def _peak(fn):
+        # Run once first, e.g. to populate the `struct` format cache.
+        fn()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        return peak - current
+
+    def _assert_no_allocations(self, fn):
+        self.assertLessEqual(self._peak(fn), self._peak(lambda: None) + self._TOLERANCE)
+
+    def test_tolerance(self):
+        view = memoryview(bytearray(8))
+        with self.assertRaises(AssertionError):
+            self._assert_no_allocations(lambda: view[1:3])
+
+    def test_accessors(self):
+        read = ReadBuffer(buffer=memoryview(bytearray(8)))
+        write = WriteBuffer(length=10)
+        view = memoryview(b"abcd")
+
+        def access():
+            read.reset_offset()
+            write.reset_offset()
+            read.read_u16()
+            read.read_i16()
+            write.write_u16(0x1234)
+            write.write_i16(-2)
+            read.read_into(write, 4)
+            write.copy_from(view, 2, 2)
+
+        self._assert_no_allocations(access)
+
+    def test_request_frames(self):
+        decoder = MspRequestDecoder()
+        start = memoryview(bytearray([0x30, self._PAYLOAD_LEN, 89, 0, 0, 0]))
+        frames = [
+            memoryview(bytearray([0x20 | seq, 0, 0, 0, 0, 0])) for seq in range(1, 8)
+        ]
+        decoder.decode(start)
+        frame = iter(frames)
+        # Frames that complete a request return a result that references a slice of the request.
+        self._assert_no_allocations(lambda: decoder.decode(next(frame)))
+
+    def test_response_frames(self):
+        encoder = MspResponseEncoder()
+        response = encoder.create_response_buffer()
+        for i in range(self._PAYLOAD_LEN):
+            response.write_u8(i)
+        encoder.set_command(88, response.get_buffer())
+        encoder.encode(self.frame)
+        # As above, the final frame, with the checksum, isn't included.
+        self._assert_no_allocations(lambda: encoder.encode(self.frame))
+
+    def test_sensor_frames(self):
+        self._assert_no_allocations(
+            lambda: SensorEncoder.encode_value(0x0210, 1234, self.frame)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
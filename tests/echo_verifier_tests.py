@@ -0,0 +1,64 @@
+import unittest
+
+from util.echo_verifier import EchoVerifier
+from util.uart_pumper import UartPumper
+
+from helpers import FakeUart
+
+_BAUD_RATE = 57600
+_FRAME = bytes(range(0x10, 0x20))
+_NEXT = b"\x7e\x1b"
+
+
+# Whatever follows the echo, e.g. the next physical ID, is queued along with it and must be left in place.
+class EchoVerifierTests(unittest.TestCase):
+    def _write(self, uart):
+        pumper = UartPumper(
+            None, None, _BAUD_RATE, echo=True, transport=lambda *_: uart
+        )
+        pumper._write(_FRAME)
+        return pumper.get_echo_verifier()
+
+    def test_match(self):
+        uart = FakeUart(echo=True, follow=_NEXT)
+        verifier = self._write(uart)
+        self.assertEqual((1, len(_FRAME), 0, 0), verifier.get_summary()[:4])
+        self.assertEqual(1, verifier.reads)
+        self.assertEqual(_NEXT, uart.rx)
+
+    def test_trickle(self):
+        uart = FakeUart(echo=True, trickle=3, follow=_NEXT)
+        verifier = self._write(uart)
+        self.assertEqual((1, len(_FRAME), 0, 0), verifier.get_summary()[:4])
+        self.assertEqual(6, verifier.reads)
+        self.assertEqual(_NEXT, uart.rx)
+
+    def test_mismatch_consumes_span(self):
+        uart = FakeUart(echo=True, corrupt=(2, 9), follow=_NEXT)
+        verifier = self._write(uart)
+        self.assertEqual(1, verifier.mismatches)
+        self.assertEqual(2, verifier.mismatched_bytes)
+        self.assertEqual(len(_FRAME), verifier.bytes)
+        self.assertEqual(_NEXT, uart.rx)
+
+    def test_timeout(self):
+        uart = FakeUart()
+        verifier = self._write(uart)
+        self.assertEqual(1, verifier.timeouts)
+        self.assertEqual(len(_FRAME), verifier.missing_bytes)
+        self.assertEqual(0, verifier.bytes)
+
+    def test_too_long(self):
+        verifier = EchoVerifier(_BAUD_RATE, 4)
+        with self.assertRaises(ValueError):
+            verifier.verify(FakeUart(echo=True), _FRAME)
+
+    def test_no_echo(self):
+        pumper = UartPumper(
+            None, None, _BAUD_RATE, echo=False, transport=lambda *_: FakeUart(echo=True)
+        )
+        self.assertIsNone(pumper.get_echo_verifier())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# Fakes shared by the tests.
+
+
+# Stands in for `busio.UART`, or a transport from `util/transport.py`. Everything written is captured in `tx` and,
+# if `echo` is true, echoed back as on a half-duplex line, with the bytes at the indexes in `corrupt` inverted.
+# `follow` is received straight after each write, e.g. the next poll, so it's available as soon as the write is.
+# `readinto` returns at most `trickle` bytes at a time, if given, as if they were still arriving.
+class FakeUart:
+    def __init__(self, buffer_len=0, echo=False, trickle=0, corrupt=(), follow=b""):
+        self.buffer_len = buffer_len
+        self.echo = echo
+        self.trickle = trickle
+        self.corrupt = corrupt
+        self.follow = follow
+        self.rx = b""
+        self.tx = b""
+
+    @property
+    def in_waiting(self):
+        return len(self.rx)
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self.rx))
+        if self.trickle:
+            count = min(count, self.trickle)
+        if count == 0:
+            return None
+        buffer[:count] = self.rx[:count]
+        self.rx = self.rx[count:]
+        return count
+
+    def write(self, buffer):
+        self.tx += bytes(buffer)
+        if self.echo:
+            echo = bytearray(buffer)
+            for i in self.corrupt:
+                echo[i] ^= 0xFF
+            self.rx += echo
+        self.rx += self.follow
+
+
+# A transport factory that creates a `FakeUart`, with the given arguments, and appends it to `uarts`.
+def fake_transport(uarts, **kwargs):
+    def create(tx, rx, baud_rate, buffer_len):
+        uart = FakeUart(buffer_len, **kwargs)
+        uarts.append(uart)
+        return uart
+
+    return create
+
+
+# Feed `data` to the pumper, pumping until it's all consumed.
+def pump_all(pumper, uart, data):
+    uart.rx += data
+    while uart.rx:
+        pumper.pump()
@@ -0,0 +1,175 @@
+import tracemalloc
+import unittest
+
+from msp.request_decoder import MspRequestDecoder, PACKET_LOSS_METRIC
+from sbus.sbus_pumper import SbusPumper, LOST_FRAMES_METRIC, FAILSAFE_METRIC
+from sensor.health import HEALTH_METRICS, HEALTH_SCHEDULE, create_health_sensors
+from sensor.scheduler import SensorScheduler
+from sensor.sensor import Sensor
+from sensor.sensor import SensorEncoder
+from sensor.sensor_id import SensorId
+from sport.frame import Frame, FrameDecoder, CHECKSUM_ERRORS_METRIC
+from util import metrics
+from util.metrics import MetricsRegistry
+from util.util import ByteOrder
+
+from helpers import FakeUart
+
+# Flags byte 0x0C - lost frame and failsafe.
+_SBUS_FRAME = b"\x0f" + bytes(range(0x20, 0x36)) + b"\x0c\x00"
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def test_register(self):
+        registry = MetricsRegistry(capacity=2)
+        a = registry.counter("a")
+        b = registry.gauge("b")
+        self.assertEqual(a, registry.counter("a"))
+        self.assertNotEqual(a, b)
+        with self.assertRaises(ValueError):
+            registry.counter("b")
+        with self.assertRaises(ValueError):
+            registry.counter("c")
+
+    def test_reset(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("counter")
+        gauge = registry.gauge("gauge")
+        registry.values[counter] += 3
+        registry.values[gauge] = 7
+        self.assertEqual(3, registry.get("counter"))
+        registry.reset()
+        self.assertEqual(0, registry.get("counter"))
+        self.assertEqual(7, registry.get("gauge"))
+
+    def test_no_allocations(self):
+        registry = MetricsRegistry()
+        values = registry.values
+        index = registry.counter("counter")
+
+        def increment():
+            values[index] += 1
+
+        def peak(fn):
+            fn()
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            return peak - current
+
+        tracemalloc.start()
+        try:
+            self.assertEqual(peak(lambda: None), peak(increment))
+        finally:
+            tracemalloc.stop()
+
+
+# These use the shared registry so look at changes rather than absolute values.
+class MetricsSourceTests(unittest.TestCase):
+    def _delta(self, name, fn):
+        before = metrics.registry.get(name)
+        fn()
+        return metrics.registry.get(name) - before
+
+    def test_sport_checksum(self):
+        decoder = FrameDecoder()
+        frame = b"\x10\x00\x04\x01\x02\x03\x04\x00"  # Bad checksum.
+        self.assertEqual(
+            1, self._delta(CHECKSUM_ERRORS_METRIC, lambda: decoder.decode_into(frame))
+        )
+
+    def test_msp_packet_loss(self):
+        decoder = MspRequestDecoder()
+        # A start frame for a 10 byte request and then a continuation frame with the wrong sequence number.
+        self.assertEqual(
+            1,
+            self._delta(
+                PACKET_LOSS_METRIC,
+                lambda: (
+                    decoder.decode(memoryview(b"\x30\x0a\x01\x00\x00\x00")),
+                    decoder.decode(memoryview(b"\x22\x00\x00\x00\x00\x00")),
+                ),
+            ),
+        )
+
+    def test_sbus(self):
+        uart = FakeUart()
+        pumper = SbusPumper(None, lambda _: None, transport=lambda *_: uart)
+        uart.rx = _SBUS_FRAME + _SBUS_FRAME
+        self.assertEqual(
+            2, self._delta(LOST_FRAMES_METRIC, lambda: (pumper.pump(), pumper.pump()))
+        )
+        self.assertEqual(1, metrics.registry.get(FAILSAFE_METRIC))
+        uart.rx = _SBUS_FRAME[:-2] + b"\x00\x00"
+        pumper.pump()
+        self.assertEqual(0, metrics.registry.get(FAILSAFE_METRIC))
+
+
+class HealthSensorTests(unittest.TestCase):
+    def test_sensors(self):
+        registry = MetricsRegistry()
+        sensors = create_health_sensors(registry)
+        self.assertEqual(len(HEALTH_METRICS), len(sensors))
+        self.assertEqual(SensorId.DIY_FIRST, sensors[0].id)
+        self.assertEqual(SensorId.DIY_FIRST + len(HEALTH_METRICS) - 1, sensors[-1].id)
+
+        registry.values[registry.index(PACKET_LOSS_METRIC)] += 5
+        sensor = sensors[[name for name, _ in HEALTH_METRICS].index(PACKET_LOSS_METRIC)]
+        frame = Frame()
+        SensorEncoder.encode(sensor, frame)
+        self.assertEqual(
+            sensor.id, int.from_bytes(frame.payload[0:2], ByteOrder.LITTLE)
+        )
+        self.assertEqual(5, int.from_bytes(frame.payload[2:6], ByteOrder.LITTLE))
+
+    def test_shared_registry(self):
+        # The sensors read the same values that the modules update.
+        sensors = create_health_sensors()
+        values = metrics.registry.values
+        index = metrics.registry.index(CHECKSUM_ERRORS_METRIC)
+        values[index] += 1
+        self.assertEqual(values[index], sensors[0].get_value())
+
+    def test_schedule(self):
+        now = [0]
+        scheduler = SensorScheduler(lambda: now[0])
+        registry = MetricsRegistry()
+        scheduler.add(Sensor(0x0210, lambda: 1))
+        scheduler.add(Sensor(0x0211, lambda: 2))
+        for sensor in create_health_sensors(registry):
+            scheduler.add(sensor, **HEALTH_SCHEDULE)
+
+        # 15s of slots, 12ms apart, with a burst of checksum errors part way through.
+        frame = Frame()
+        sent = []
+        checksum_slots = []
+        for slot in range(1250):
+            if slot == 500:
+                registry.values[registry.index(CHECKSUM_ERRORS_METRIC)] += 3
+            if scheduler.write_frame(frame):
+                sensor_id = int.from_bytes(frame.payload[0:2], ByteOrder.LITTLE)
+                sent.append(sensor_id)
+                if sensor_id == SensorId.DIY_FIRST:
+                    checksum_slots.append(slot)
+            now[0] += 12
+
+        # Each health sensor is sent at the start and then again after 10s - apart from checksum errors which are
+        # sent when they change instead.
+        health = [i for i in sent if i >= SensorId.DIY_FIRST]
+        self.assertEqual(2 * len(HEALTH_METRICS), len(health))
+        self.assertEqual(2, len(checksum_slots))
+        self.assertLess(checksum_slots[1] - 500, 10)
+        self.assertEqual(
+            len(sent) - len(health), sent.count(0x0210) + sent.count(0x0211)
+        )
+
+    def test_names_registered_by_owners(self):
+        # Each health metric is one that's actually updated, i.e. registered by the module that owns it.
+        for name, kind in HEALTH_METRICS:
+            index = metrics.registry.index(name)
+            self.assertEqual(index, metrics.registry.register(name, kind))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+
+from config.vtx import VtxConfig
+from host.msp_client import DirectPumper
+from msp.command.core import (
+    MspApiVersionCommand,
+    MspCommandError,
+    MspMultipleCommand,
+    MspSaveAllCommand,
+)
+from msp.command.vtx import (
+    MspSetVtxConfigCommand,
+    MspVtxConfigCommand,
+    MspVtxTableBandCommand,
+    MspVtxTablePowerLevelCommand,
+)
+from msp.request_decoder import MspError
+from msp.response_encoder import MspResponseEncoder
+from sport.coordinator import SportCoordinator
+from util.buffer import ReadBuffer
+
+_API_VERSION = MspApiVersionCommand.COMMAND_API_VERSION
+_VTX_CONFIG = MspVtxConfigCommand.COMMAND_VTX_CONFIG
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+_LEVEL = MspVtxTablePowerLevelCommand.COMMAND_VTX_TABLE_POWER_LEVEL
+_MULTIPLE = MspMultipleCommand.COMMAND_MULTIPLE_MSP
+_SAVE_ALL = MspSaveAllCommand.COMMAND_SAVE_ALL
+_SET_VTX_CONFIG = MspSetVtxConfigCommand.COMMAND_SET_VTX_CONFIG
+
+
+class _Config:
+    def __init__(self):
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+
+class MspMultipleCommandTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        commands = [
+            MspApiVersionCommand(),
+            MspVtxConfigCommand(self.config),
+            MspVtxTableBandCommand(self.config),
+            MspVtxTablePowerLevelCommand(self.config),
+            MspSetVtxConfigCommand(self.config),
+        ]
+        self.saved_config = _Config()
+        commands.append(MspSaveAllCommand([self.saved_config]))
+        self.commands = {c.id: c for c in commands}
+        self.multiple = MspMultipleCommand(self.commands)
+        self.commands[self.multiple.id] = self.multiple
+
+    def _handle(self, command_id, payload):
+        response = MspResponseEncoder.create_response_buffer()
+        request = ReadBuffer(buffer=memoryview(payload))
+        self.commands[command_id].handle_request(request, response)
+        return bytes(response.get_buffer())
+
+    def _with_length(self, command_id, payload=b""):
+        reply = self._handle(command_id, payload)
+        return bytes([len(reply)]) + reply
+
+    def _table_sync_request(self):
+        table = self.config.table
+        payload = bytearray([0])
+        for band in range(1, table.band_count + 1):
+            payload += bytes([_BAND, 1, band])
+        for level in range(1, table.level_count + 1):
+            payload += bytes([_LEVEL, 1, level])
+        return bytes(payload)
+
+    def _table_sync_expected(self):
+        table = self.config.table
+        expected = b""
+        for band in range(1, table.band_count + 1):
+            expected += self._with_length(_BAND, bytes([band]))
+        for level in range(1, table.level_count + 1):
+            expected += self._with_length(_LEVEL, bytes([level]))
+        return expected
+
+    def test_command_ids(self):
+        # Unknown commands, and nested MSP_MULTIPLE_MSP, get an empty response.
+        response = self._handle(
+            _MULTIPLE, bytes([_API_VERSION, 99, _VTX_CONFIG, _MULTIPLE])
+        )
+        expected = (
+            self._with_length(_API_VERSION)
+            + b"\x00"
+            + self._with_length(_VTX_CONFIG)
+            + b"\x00"
+        )
+        self.assertEqual(expected, response)
+
+    def test_nested(self):
+        response = self._handle(_MULTIPLE, bytes([0, _MULTIPLE, 1, _API_VERSION]))
+        self.assertEqual(b"\x00", response)
+
+    def test_state_changing_commands_not_run(self):
+        band, channel = self.config.band, self.config.channel
+        response = self._handle(
+            _MULTIPLE, bytes([_SAVE_ALL, _SET_VTX_CONFIG, _API_VERSION])
+        )
+        self.assertEqual(b"\x00\x00" + self._with_length(_API_VERSION), response)
+        self.assertEqual(0, self.saved_config.saves)
+        self.assertEqual((band, channel), (self.config.band, self.config.channel))
+
+        # Even with a payload.
+        response = self._handle(_MULTIPLE, bytes([0, _SET_VTX_CONFIG, 2, 0x08, 0x00]))
+        self.assertEqual(b"\x00", response)
+        self.assertEqual((band, channel), (self.config.band, self.config.channel))
+
+    def test_payload_past_end(self):
+        with self.assertRaises(MspCommandError):
+            self._handle(_MULTIPLE, bytes([0, _BAND, 1, 1, _BAND, 5, 1]))
+        with self.assertRaises(MspCommandError):
+            self._handle(_MULTIPLE, bytes([0, _BAND]))
+
+    def test_payload_too_short(self):
+        # The band command needs a payload - it gets an empty response rather than failing the batch.
+        response = self._handle(_MULTIPLE, bytes([0, _BAND, 0, _API_VERSION, 0]))
+        self.assertEqual(b"\x00" + self._with_length(_API_VERSION), response)
+
+    def test_with_payloads(self):
+        response = self._handle(_MULTIPLE, self._table_sync_request())
+        self.assertEqual(self._table_sync_expected(), response)
+
+    def test_truncated(self):
+        # Responses that don't fit are left out.
+        payload = bytes([_VTX_CONFIG]) * 40
+        response = self._handle(_MULTIPLE, payload)
+        reply = self._with_length(_VTX_CONFIG)
+        count = MspResponseEncoder.create_response_buffer().remaining() // len(reply)
+        self.assertEqual(reply * count, response)
+
+    # Send the request, over several frames, and reassemble the response.
+    def _exchange(self, payload):
+        pumper = DirectPumper()
+        coordinator = SportCoordinator(pumper)
+        coordinator.set_commands(self.commands)
+        pumper.send_request(_MULTIPLE, payload)
+        payloads = pumper.drain()
+        data = b"".join(p[1:] for p in payloads)
+        return payloads[0][0], data[1 : 1 + data[0]]
+
+    def test_table_sync_exchange(self):
+        _, data = self._exchange(self._table_sync_request())
+        self.assertEqual(self._table_sync_expected(), data)
+
+    def test_payload_past_end_exchange(self):
+        header, data = self._exchange(bytes([0, _BAND, 9, 1]))
+        self.assertTrue(header & 0x20)  # The error flag.
+        self.assertEqual(bytes([MspError.ERROR]), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
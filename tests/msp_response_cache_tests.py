@@ -0,0 +1,98 @@
+import unittest
+
+from config.vtx import VtxConfig
+from host.msp_client import DirectPumper, strip_sequence
+from msp.command.core import MspMultipleCommand
+from msp.command.vtx import MspSetVtxConfigCommand, MspVtxTableBandCommand
+from msp.response_cache import MspResponseCache
+from msp.response_encoder import MspResponseEncoder
+from sport.coordinator import SportCoordinator
+from sport.frame import Frame, FrameId
+from util.buffer import ReadBuffer
+
+
+class MspResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        self.cache = MspResponseCache()
+        self.config.add_listener(self.cache.invalidate)
+        commands = [
+            MspVtxTableBandCommand(self.config),
+            MspSetVtxConfigCommand(self.config),
+        ]
+
+        commands = {c.id: c for c in commands}
+        multiple = MspMultipleCommand(commands)
+        commands[multiple.id] = multiple
+
+        self.pumper = DirectPumper()
+        self.coordinator = SportCoordinator(self.pumper)
+        self.coordinator.set_commands(commands)
+        self.coordinator.set_response_cache(self.cache)
+
+    # Send a request and return the payloads of the response frames.
+    def _request(self, command, payload):
+        self.pumper.send_request(command, payload)
+        payloads = self.pumper.drain()
+        self.assertEqual({FrameId.MSP_SERVER}, set(self.pumper.frame_ids))
+        return payloads
+
+    # Encode the response directly, i.e. without the cache.
+    def _expected(self, command, payload):
+        response = MspResponseEncoder.create_response_buffer()
+        command.handle_request(ReadBuffer(buffer=memoryview(payload)), response)
+        encoder = MspResponseEncoder()
+        encoder.set_command(command.id, response.get_buffer())
+        frame = Frame()
+        payloads = []
+        more = True
+        while more:
+            more = encoder.encode(frame)
+            payloads.append(bytes(frame.payload))
+        return payloads
+
+    def test_hit(self):
+        command = MspVtxTableBandCommand(self.config)
+        expected = strip_sequence(self._expected(command, b"\x01"))
+
+        first = self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+        second = self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+
+        self.assertEqual(expected, strip_sequence(first))
+        self.assertEqual(expected, strip_sequence(second))
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual(1, self.cache.hits)
+
+        # Sequence numbers continue from one response to the next.
+        self.assertEqual((first[-1][0] + 1) & 0x0F, second[0][0] & 0x0F)
+
+    def test_different_payloads(self):
+        self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+        self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x02")
+        self.assertEqual(2, self.cache.misses)
+
+    def test_invalidation(self):
+        self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+        # Set band 1, channel 2.
+        self._request(MspSetVtxConfigCommand.COMMAND_SET_VTX_CONFIG, b"\x01\x00")
+        self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+        self.assertEqual(2, self.cache.misses)
+        self.assertEqual(0, self.cache.hits)
+
+        self.config.changed()
+        self._request(MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND, b"\x01")
+        self.assertEqual(3, self.cache.misses)
+
+    def test_multiple_keeps_cache(self):
+        band = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+        multiple = MspMultipleCommand.COMMAND_MULTIPLE_MSP
+        self._request(band, b"\x01")
+        # A batch of table reads, as sent to sync the VTX table, doesn't change anything.
+        self._request(multiple, bytes([0, band, 1, 1, band, 1, 2]))
+        self._request(band, b"\x01")
+        self.assertEqual(0, self.cache.invalidations)
+        self.assertEqual(1, self.cache.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
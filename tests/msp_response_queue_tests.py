@@ -0,0 +1,84 @@
+import unittest
+
+from config.vtx import VtxConfig
+from host.msp_client import DirectPumper, strip_sequence
+from msp.command.vtx import MspVtxTableBandCommand, MspVtxTablePowerLevelCommand
+from msp.response_cache import MspResponseCache
+from msp.response_encoder import MspResponseEncoder
+from sport.coordinator import SportCoordinator
+from sport.frame import Frame
+from util.buffer import ReadBuffer
+
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+_LEVEL = MspVtxTablePowerLevelCommand.COMMAND_VTX_TABLE_POWER_LEVEL
+
+
+class MspResponseQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        self.commands = {
+            _BAND: MspVtxTableBandCommand(self.config),
+            _LEVEL: MspVtxTablePowerLevelCommand(self.config),
+        }
+        self._create_coordinator()
+
+    def _create_coordinator(self, **kwargs):
+        self.pumper = DirectPumper()
+        self.coordinator = SportCoordinator(self.pumper, **kwargs)
+        self.coordinator.set_commands(self.commands)
+
+    # Encode the responses directly, ignoring sequence numbers.
+    def _expected(self, *requests):
+        payloads = []
+        for command_id, payload in requests:
+            response = MspResponseEncoder.create_response_buffer()
+            command = self.commands[command_id]
+            command.handle_request(ReadBuffer(buffer=memoryview(payload)), response)
+            encoder = MspResponseEncoder()
+            encoder.set_command(command_id, response.get_buffer())
+            frames = encoder.encode_frames(Frame())
+            payloads.extend(frames[i : i + 6] for i in range(0, len(frames), 6))
+        return strip_sequence(payloads)
+
+    def _check_pipelined(self):
+        requests = [(_BAND, b"\x01"), (_BAND, b"\x02"), (_LEVEL, b"\x01")]
+        self.pumper.send_request(*requests[0])
+        first = self.pumper.next_payload()
+        # The remaining requests arrive while the first response is still being sent.
+        self.pumper.send_request(*requests[1])
+        self.pumper.send_request(*requests[2])
+        payloads = [first] + self.pumper.drain()
+
+        self.assertEqual(self._expected(*requests), strip_sequence(payloads))
+        for previous, current in zip(payloads, payloads[1:]):
+            self.assertEqual((previous[0] + 1) & 0x0F, current[0] & 0x0F)
+
+        queue = self.coordinator.get_response_queue()
+        self.assertEqual(2, queue.queued)
+        self.assertEqual(2, queue.max_depth)
+        self.assertEqual(0, len(queue))
+
+    def test_pipelined(self):
+        self._check_pipelined()
+
+    def test_pipelined_cached(self):
+        self.coordinator.set_response_cache(MspResponseCache())
+        self._check_pipelined()
+
+    def test_overflow(self):
+        self._create_coordinator(max_queued_responses=1)
+        self.pumper.send_request(_BAND, b"\x01")
+        self.pumper.next_payload()
+        self.pumper.send_request(_BAND, b"\x02")
+        self.pumper.send_request(_BAND, b"\x03")
+        payloads = self.pumper.drain()
+
+        queue = self.coordinator.get_response_queue()
+        self.assertEqual(1, queue.queued)
+        self.assertEqual(1, queue.overflows)
+        expected = self._expected((_BAND, b"\x01"), (_BAND, b"\x02"))
+        self.assertEqual(expected[1:], strip_sequence(payloads))
+
+
+if __name__ == '__main__':
+    unittest.main()
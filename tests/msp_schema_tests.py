@@ -0,0 +1,90 @@
+import struct
+import unittest
+
+from config.vtx import VtxConfig
+from msp.command.vtx import MspSetVtxConfigCommand
+from msp.schema import MspSchema, U8, U16
+from util.buffer import ReadBuffer, WriteBuffer
+
+
+class _Point:
+    def __init__(self):
+        self.x = 1
+        self.y = 0x0302
+
+
+class _Outer:
+    def __init__(self):
+        self.point = _Point()
+        self.z = 4
+
+
+def _request(fmt, *values):
+    return ReadBuffer(buffer=memoryview(struct.pack(fmt, *values)))
+
+
+class MspSchemaTests(unittest.TestCase):
+    _SCHEMA = MspSchema(
+        (("a", U16),),
+        (("b", U8), ("c", U8)),
+        (("d", U16),),
+    )
+
+    def test_unpack_optional_groups(self):
+        schema = self._SCHEMA
+        self.assertIsNone(schema.unpack(_request("<B", 1)))
+        self.assertEqual((1,), schema.unpack(_request("<H", 1)))
+        # A partial group is ignored.
+        self.assertEqual((1,), schema.unpack(_request("<HB", 1, 2)))
+        self.assertEqual((1, 2, 3), schema.unpack(_request("<HBB", 1, 2, 3)))
+        self.assertEqual((1, 2, 3, 4), schema.unpack(_request("<HBBH", 1, 2, 3, 4)))
+        self.assertEqual(6, schema.length)
+        self.assertEqual(3, schema.index("d"))
+
+    def test_pack(self):
+        schema = MspSchema((("point.x", U8), ("point.y", U16), ("z", U8)))
+        response = WriteBuffer(length=8)
+        schema.pack_attributes(response, _Outer())
+        self.assertEqual(b"\x01\x02\x03\x04", bytes(response.get_buffer()))
+
+        response.reset_offset()
+        schema.pack(response, 5, 6, 7)
+        self.assertEqual(b"\x05\x06\x00\x07", bytes(response.get_buffer()))
+
+
+class MspSetVtxConfigCommandTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        self.command = MspSetVtxConfigCommand(self.config)
+
+    def _handle(self, fmt, *values):
+        self.command.handle_request(_request(fmt, *values), None)
+
+    def test_encoded_band_channel(self):
+        # Band 2, channel 3.
+        self._handle("<H", (1 << 3) | 2)
+        self.assertEqual((2, 3), (self.config.band, self.config.channel))
+        self.assertEqual(self.config.table.get_freq(1, 2), self.config.freq)
+
+    def test_optional_fields(self):
+        self._handle("<HBBBH", 5801, 3, 0, 1, 5600)
+        c = self.config
+        self.assertEqual((0, 5801), (c.band, c.freq))
+        self.assertEqual(
+            (3, 0, 1, 5600), (c.power, c.pit_mode, c.low_power_disarm, c.pit_mode_freq)
+        )
+
+    def test_unencoded_band_channel(self):
+        self._handle("<HBBBHBBH", 5801, 2, 1, 0, 0, 2, 1, 0)
+        c = self.config
+        self.assertEqual((2, 1, c.table.get_freq(1, 0)), (c.band, c.channel, c.freq))
+        self.assertEqual(2, c.power)
+
+    def test_empty_request(self):
+        freq = self.config.freq
+        self._handle("<B", 1)
+        self.assertEqual(freq, self.config.freq)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import unittest
+
+from host.msp_client import DirectPumper, strip_sequence
+from msp.command.core import MspCommand
+from msp.request_decoder import MspError
+from msp.response_encoder import MspResponseEncoder
+from msp.response_source import MspGeneratorSource
+from sport.coordinator import SportCoordinator
+from sport.frame import Frame
+
+_STREAM_RESPONSE = 200
+_STREAM_REQUEST = 201
+_STREAM_SHORT = 202
+_STREAM_LONG = 203
+_STREAM_TOO_LONG = 204
+
+_RESPONSE = bytes(i & 0xFF for i in range(250))
+
+
+class _StreamResponseCommand(MspCommand):
+    streams_response = True
+
+    def __init__(self):
+        super().__init__(_STREAM_RESPONSE)
+
+    def open_response(self, _):
+        # Odd sized chunks so that chunks straddle frames.
+        chunks = (_RESPONSE[i : i + 7] for i in range(0, len(_RESPONSE), 7))
+        return MspGeneratorSource(len(_RESPONSE), chunks)
+
+
+# Streams chunks that don't add up to the declared length.
+class _BadStreamCommand(MspCommand):
+    streams_response = True
+
+    def __init__(self, command_id, length, chunks):
+        super().__init__(command_id)
+        self._length = length
+        self._chunks = chunks
+
+    def open_response(self, _):
+        return MspGeneratorSource(self._length, iter(self._chunks))
+
+
+class _StreamRequestCommand(MspCommand):
+    streams_request = True
+
+    def __init__(self):
+        super().__init__(_STREAM_REQUEST)
+        self.chunks = []
+        self.aborted = False
+        self.handled = None
+
+    def start_request(self, length):
+        self.length = length
+
+    def write_request(self, chunk):
+        self.chunks.append(bytes(chunk))
+
+    def abort_request(self):
+        self.aborted = True
+
+    def handle_request(self, request, response):
+        self.handled = b"".join(self.chunks)
+        response.write_u8(len(self.handled))
+
+
+class MspStreamingTests(unittest.TestCase):
+    def setUp(self):
+        self.request_command = _StreamRequestCommand()
+        commands = [
+            _StreamResponseCommand(),
+            self.request_command,
+            _BadStreamCommand(_STREAM_SHORT, 20, [_RESPONSE[:12]]),
+            _BadStreamCommand(_STREAM_LONG, 20, [_RESPONSE[:12], _RESPONSE[:12]]),
+            _BadStreamCommand(_STREAM_TOO_LONG, 300, [_RESPONSE, _RESPONSE]),
+        ]
+        self.pumper = DirectPumper()
+        self.coordinator = SportCoordinator(self.pumper)
+        self.coordinator.set_commands({c.id: c for c in commands})
+
+    @staticmethod
+    def _expected(command, payload):
+        encoder = MspResponseEncoder()
+        encoder.set_command(command, memoryview(payload))
+        frames = encoder.encode_frames(Frame())
+        return [frames[i : i + 6] for i in range(0, len(frames), 6)]
+
+    def test_streamed_response(self):
+        self.pumper.send_request(_STREAM_RESPONSE, b"")
+        self.assertEqual(
+            self._expected(_STREAM_RESPONSE, _RESPONSE), self.pumper.drain()
+        )
+
+    def test_streamed_request(self):
+        payload = bytes(range(100))
+        self.pumper.send_request(_STREAM_REQUEST, payload)
+        self.assertEqual(payload, self.request_command.handled)
+        # The payload arrives a frame at a time.
+        self.assertEqual(5, max(len(chunk) for chunk in self.request_command.chunks))
+        self.assertEqual(self._expected(_STREAM_REQUEST, b"\x64"), self.pumper.drain())
+
+    def test_streamed_request_bad_checksum(self):
+        self.pumper.send_request(_STREAM_REQUEST, bytes(range(20)), corrupt=True)
+        self.assertTrue(self.request_command.aborted)
+        self.assertIsNone(self.request_command.handled)
+
+    def _assert_error_response(self, command, payloads):
+        # `_expected` numbers its frames from 0 - only compare the rest of the error frame.
+        error = self._expected_error(command)
+        self.assertEqual(error[1:], payloads[-1][1:])
+        self.assertEqual(0x30, payloads[-1][0] & 0xF0)
+
+    @staticmethod
+    def _expected_error(command):
+        encoder = MspResponseEncoder()
+        encoder.set_error(MspError.ERROR, command)
+        return encoder.encode_frames(Frame())
+
+    def test_streamed_response_too_short(self):
+        self.pumper.send_request(_STREAM_SHORT, b"")
+        payloads = self.pumper.drain()
+        # The frames that were sent before the source ran dry, and then the error.
+        self.assertEqual(3, len(payloads))
+        self._assert_error_response(_STREAM_SHORT, payloads)
+        # The coordinator is still usable - the sequence numbers carry on from the error.
+        self.pumper.send_request(_STREAM_RESPONSE, b"")
+        self.assertEqual(
+            strip_sequence(self._expected(_STREAM_RESPONSE, _RESPONSE)),
+            strip_sequence(self.pumper.drain()),
+        )
+
+    def test_streamed_response_too_long(self):
+        self.pumper.send_request(_STREAM_LONG, b"")
+        payloads = self.pumper.drain()
+        # The overrun is only noticed once the declared length has been read.
+        self.assertEqual(5, len(payloads))
+        self._assert_error_response(_STREAM_LONG, payloads)
+
+    def test_streamed_response_over_max(self):
+        self.pumper.send_request(_STREAM_TOO_LONG, b"")
+        payloads = self.pumper.drain()
+        self.assertEqual(1, len(payloads))
+        self._assert_error_response(_STREAM_TOO_LONG, payloads)
+
+    def test_queued_streamed_response(self):
+        self.pumper.send_request(_STREAM_SHORT, b"")
+        # Queued behind the first response - it's only read as it's sent, just like the first.
+        self.pumper.send_request(_STREAM_RESPONSE, b"")
+        self.assertEqual(1, self.coordinator.get_response_queue().queued)
+        payloads = self.pumper.drain()
+        self.assertEqual(
+            strip_sequence(self._expected(_STREAM_RESPONSE, _RESPONSE)),
+            strip_sequence(payloads[3:]),
+        )
+
+    def test_queued_streamed_response_too_short(self):
+        self.pumper.send_request(_STREAM_RESPONSE, b"")
+        self.pumper.send_request(_STREAM_SHORT, b"")
+        payloads = self.pumper.drain()
+        # As when it's not queued, the frames that were sent before the source ran dry and then the error.
+        self.assertEqual(
+            len(self._expected(_STREAM_RESPONSE, _RESPONSE)) + 3, len(payloads)
+        )
+        self._assert_error_response(_STREAM_SHORT, payloads)
+
+    def test_source_ended_early(self):
+        source = MspGeneratorSource(10, iter([b"abc"]))
+        with self.assertRaises(ValueError):
+            source.read_into(MspResponseEncoder.create_response_buffer(), 5)
+
+    def test_source_overran(self):
+        source = MspGeneratorSource(4, iter([b"abcdef"]))
+        with self.assertRaises(ValueError):
+            source.read_into(MspResponseEncoder.create_response_buffer(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import unittest
+
+from config.vtx import VtxConfig
+from host.msp_client import encode_uart_v1, encode_uart_v2
+from msp.command.core import MspApiVersionCommand, MspCommand
+from msp.command.vtx import MspSetVtxConfigCommand, MspVtxTableBandCommand
+from msp.response_cache import MspResponseCache
+from msp.response_source import MspGeneratorSource
+from msp.uart_protocol import MspUartDecoder, MspVersion, crc8_dvb_s2
+from msp.uart_pumper import MspUartPumper
+from util.buffer import ReadBuffer, WriteBuffer
+
+from helpers import FakeUart
+
+_API_VERSION = MspApiVersionCommand.COMMAND_API_VERSION
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+_SET_VTX_CONFIG = MspSetVtxConfigCommand.COMMAND_SET_VTX_CONFIG
+_SHORT_STREAM = 200
+
+
+class _ShortStreamCommand(MspCommand):
+    streams_response = True
+
+    def __init__(self):
+        super().__init__(_SHORT_STREAM)
+
+    def open_response(self, _):
+        return MspGeneratorSource(10, iter([b"abc"]))
+
+
+class MspUartDecoderTests(unittest.TestCase):
+    def _decode_all(self, data, chunk_len):
+        decoder = MspUartDecoder()
+        requests = []
+        for start in range(0, len(data), chunk_len):
+            chunk = memoryview(data[start : start + chunk_len])
+            i = 0
+            while i < len(chunk):
+                request, consumed = decoder.decode_into(chunk, i)
+                i += consumed
+                if request:
+                    payload = bytes(request.payload.get_buffer(use_offset=False))
+                    requests.append((decoder.version, request.command_id, payload))
+        return requests
+
+    def test_crc(self):
+        # The standard check value for CRC-8/DVB-S2.
+        self.assertEqual(0xBC, crc8_dvb_s2(0, b"123456789"))
+
+    def test_decode(self):
+        data = (
+            b"junk"
+            + encode_uart_v1(b"<", 1, b"")
+            + encode_uart_v2(b"<", 0x1234, bytes(range(40)))
+            + encode_uart_v1(b"<", 137, b"\x02")
+        )
+        expected = [
+            (MspVersion.V1, 1, b""),
+            (MspVersion.V2, 0x1234, bytes(range(40))),
+            (MspVersion.V1, 137, b"\x02"),
+        ]
+        for chunk_len in (1, 7, len(data)):
+            self.assertEqual(expected, self._decode_all(data, chunk_len))
+
+    def test_bad_checksum(self):
+        bad = bytearray(encode_uart_v1(b"<", 1, b"\x05"))
+        bad[-1] ^= 0xFF
+        data = bytes(bad) + encode_uart_v2(b">", 1, b"") + encode_uart_v1(b"<", 2, b"")
+        # Responses, i.e. '>', are also ignored.
+        self.assertEqual([(MspVersion.V1, 2, b"")], self._decode_all(data, 3))
+
+
+class MspUartPumperTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        commands = [
+            MspApiVersionCommand(),
+            MspVtxTableBandCommand(self.config),
+            MspSetVtxConfigCommand(self.config),
+            _ShortStreamCommand(),
+        ]
+        self.commands = {c.id: c for c in commands}
+        self.cache = MspResponseCache()
+        self.uart = FakeUart()
+        self.pumper = MspUartPumper(
+            "tx",
+            "rx",
+            self.commands,
+            response_cache=self.cache,
+            transport=lambda *_: self.uart,
+        )
+
+    def _exchange(self, request):
+        self.uart.rx = request
+        while self.uart.rx:
+            self.pumper.pump()
+        response = self.uart.tx
+        self.uart.tx = b""
+        return response
+
+    def _expected_payload(self, command_id, payload):
+        response = WriteBuffer(length=64)
+        request = ReadBuffer(buffer=memoryview(payload))
+        self.commands[command_id].handle_request(request, response)
+        return bytes(response.get_buffer())
+
+    def testencode_uart_v1(self):
+        response = self._exchange(encode_uart_v1(b"<", _BAND, b"\x01"))
+        self.assertEqual(
+            encode_uart_v1(b">", _BAND, self._expected_payload(_BAND, b"\x01")),
+            response,
+        )
+
+    def testencode_uart_v2(self):
+        response = self._exchange(encode_uart_v2(b"<", _API_VERSION, b""))
+        expected = encode_uart_v2(
+            b">", _API_VERSION, self._expected_payload(_API_VERSION, b"")
+        )
+        self.assertEqual(expected, response)
+
+    def test_unknown_command(self):
+        self.assertEqual(
+            encode_uart_v1(b"!", 99, b""), self._exchange(encode_uart_v1(b"<", 99, b""))
+        )
+        self.assertEqual(
+            encode_uart_v2(b"!", 0x3000, b""),
+            self._exchange(encode_uart_v2(b"<", 0x3000, b"")),
+        )
+
+    def test_streamed_response_too_short(self):
+        requests = encode_uart_v1(b"<", _SHORT_STREAM, b"") + encode_uart_v1(
+            b"<", _API_VERSION, b""
+        )
+        expected = encode_uart_v1(b"!", _SHORT_STREAM, b"") + encode_uart_v1(
+            b">", _API_VERSION, self._expected_payload(_API_VERSION, b"")
+        )
+        self.assertEqual(expected, self._exchange(requests))
+
+    def test_pipelined_and_state_change(self):
+        self.cache.put(_BAND, b"\x02", memoryview(b"\x00"))
+        # Set band 2, channel 1 via the encoded frequency, then read band 2.
+        requests = encode_uart_v1(b"<", _SET_VTX_CONFIG, b"\x08\x00") + encode_uart_v1(
+            b"<", _BAND, b"\x02"
+        )
+        response = self._exchange(requests)
+
+        self.assertEqual((2, 1), (self.config.band, self.config.channel))
+        self.assertEqual(1, self.cache.invalidations)
+        expected = encode_uart_v1(b">", _SET_VTX_CONFIG, b"") + encode_uart_v1(
+            b">", _BAND, self._expected_payload(_BAND, b"\x02")
+        )
+        self.assertEqual(expected, response)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from config.vtx import VtxConfig
+from host.msp_client import DirectPumper, encode_uart_v1
+from msp.command.vtx import MspVtxTableBandCommand, MspVtxTablePowerLevelCommand
+from msp.request_decoder import MspError
+from msp.uart_pumper import MspUartPumper
+from sport.coordinator import SportCoordinator
+
+from helpers import FakeUart, pump_all
+
+_BAND = MspVtxTableBandCommand.COMMAND_VTX_TABLE_BAND
+_LEVEL = MspVtxTablePowerLevelCommand.COMMAND_VTX_TABLE_POWER_LEVEL
+
+
+# Requests for bands and levels that aren't in the table get an error response, over either link.
+class MspVtxTableRangeTests(unittest.TestCase):
+    def setUp(self):
+        self.config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        commands = [
+            MspVtxTableBandCommand(self.config),
+            MspVtxTablePowerLevelCommand(self.config),
+        ]
+        self.commands = {c.id: c for c in commands}
+        table = self.config.table
+        self.bad_requests = [
+            (_BAND, bytes([table.band_count + 1])),
+            (_BAND, b"\x00"),
+            (_BAND, b""),
+            (_LEVEL, bytes([table.level_count + 1])),
+            (_LEVEL, b"\x00"),
+        ]
+
+    def test_sport(self):
+        pumper = DirectPumper()
+        SportCoordinator(pumper).set_commands(self.commands)
+        for command, payload in self.bad_requests:
+            pumper.send_request(command, payload)
+            payloads = pumper.drain()
+            self.assertEqual(1, len(payloads))
+            self.assertTrue(payloads[0][0] & 0x20)  # The error flag.
+            self.assertEqual(bytes([1, MspError.ERROR]), payloads[0][1:3])
+
+        # Good requests are still answered.
+        pumper.send_request(_BAND, bytes([self.config.table.band_count]))
+        self.assertFalse(pumper.drain()[0][0] & 0x20)
+
+    def test_uart(self):
+        uart = FakeUart()
+        pumper = MspUartPumper("tx", "rx", self.commands, transport=lambda *_: uart)
+        for command, payload in self.bad_requests:
+            pump_all(pumper, uart, encode_uart_v1(b"<", command, payload))
+            self.assertEqual(encode_uart_v1(b"!", command, b""), uart.tx)
+            uart.tx = b""
+
+
+if __name__ == '__main__':
+    unittest.main()
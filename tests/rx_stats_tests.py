@@ -0,0 +1,144 @@
+import time
+import unittest
+
+from sbus.sbus_decoder import SbusDecoder
+from sbus.sbus_pumper import SbusPumper
+from sport.frame import Checksum
+from sport.physical_id import PhysicalId
+from sport.sport_pumper import SportPumper
+from util.rx_stats import RxStats
+
+from helpers import fake_transport, pump_all
+
+_SBUS_BAUD_RATE = 100000
+# The payload mustn't contain the start byte.
+_SBUS_FRAME = b"\x0f" + bytes(range(0x20, 0x36)) + b"\x00\x00"
+_START = b"\x7e"
+
+
+def _sport_frame(frame_bytes):
+    return frame_bytes + bytes([Checksum.calculate(sum(frame_bytes))])
+
+
+class RxStatsTests(unittest.TestCase):
+    def test_reads(self):
+        stats = RxStats(_SBUS_BAUD_RATE, 32)
+        stats.received(10)
+        stats.received(32)
+        self.assertEqual(
+            (2, 42, 32, 1), (stats.reads, stats.bytes, stats.max_fill, stats.full_reads)
+        )
+        self.assertEqual(64, stats.recommend_buffer_len())
+        stats.reset()
+        self.assertEqual(16, stats.recommend_buffer_len())
+
+    def test_timed(self):
+        stats = RxStats(_SBUS_BAUD_RATE, 32, timed=True)
+        stats.pumped()
+        time.sleep(0.005)
+        stats.pumped()
+        # About 55 bytes can arrive in 5ms at 100000 baud.
+        self.assertGreaterEqual(stats.max_interval_us, 5000)
+        self.assertEqual(1, stats.overflow_risks)
+        self.assertGreaterEqual(stats.recommend_buffer_len(), 128)
+
+
+class SbusFramingTests(unittest.TestCase):
+    def test_initial_sync(self):
+        decoder = SbusDecoder()
+        data = _SBUS_FRAME[10:] + _SBUS_FRAME
+        frame, consumed = decoder.decode_into(data)
+        self.assertIsNotNone(frame)
+        self.assertEqual(len(data), consumed)
+        self.assertEqual(0, decoder.framing_errors)
+
+    def test_lost_bytes(self):
+        decoder = SbusDecoder()
+        # Bytes dropped from the middle of the second frame - the decoder has to skip to find the next frame.
+        data = _SBUS_FRAME + _SBUS_FRAME[:5] + _SBUS_FRAME + _SBUS_FRAME
+        i = 0
+        frames = 0
+        while i < len(data):
+            frame, consumed = decoder.decode_into(data, i)
+            i += consumed
+            frames += 1 if frame else 0
+        self.assertEqual(3, frames)
+        # The truncated frame swallows the start of the next one so it has a bad end byte and then the rest of
+        # the next frame is skipped.
+        self.assertEqual(2, decoder.framing_errors)
+
+    def test_end_bytes(self):
+        decoder = SbusDecoder()
+        for end in (0x00, 0x04, 0x14, 0x24, 0x34):
+            decoder.decode_into(_SBUS_FRAME[:-1] + bytes([end]))
+        self.assertEqual(0, decoder.framing_errors)
+        decoder.decode_into(_SBUS_FRAME[:-1] + b"\x55")
+        self.assertEqual(1, decoder.framing_errors)
+
+    def test_pumper_gaps(self):
+        uarts = []
+        frames = []
+        pumper = SbusPumper(
+            None, frames.append, transport=fake_transport(uarts), rx_buffer_len=64
+        )
+        self.assertEqual(64, uarts[0].buffer_len)
+        pump_all(pumper, uarts[0], _SBUS_FRAME + _SBUS_FRAME[:-1] + b"\x55")
+        stats = pumper.get_rx_stats()
+        self.assertEqual(2, len(frames))
+        self.assertEqual(1, stats.gaps)
+        self.assertEqual(50, stats.bytes)
+        self.assertEqual(64, stats.buffer_len)
+
+
+class SportResyncTests(unittest.TestCase):
+    def setUp(self):
+        uarts = []
+        self.frames = []
+        self.pumper = SportPumper(
+            None, None, echo=False, transport=fake_transport(uarts)
+        )
+        self.pumper.add_subscriber(PhysicalId.ID1, self.frames.append)
+        self.uart = uarts[0]
+        self.frame = _sport_frame(b"\x10\x00\x04\x01\x02\x03\x04")
+
+    def _pump(self, data):
+        pump_all(self.pumper, self.uart, data)
+        return self.pumper.get_rx_stats().gaps
+
+    def test_frame(self):
+        self.assertEqual(0, self._pump(_START + bytes([PhysicalId.ID1]) + self.frame))
+        self.assertEqual(1, len(self.frames))
+
+    def test_empty_slot(self):
+        self.assertEqual(0, self._pump(_START + bytes([PhysicalId.ID1]) + _START))
+
+    def test_truncated(self):
+        self.assertEqual(
+            1, self._pump(_START + bytes([PhysicalId.ID1]) + self.frame[:4] + _START)
+        )
+        self.assertEqual(0, len(self.frames))
+
+    def test_invalid_checksum(self):
+        frame = self.frame[:-1] + bytes([self.frame[-1] ^ 0x01])
+        self.assertEqual(1, self._pump(_START + bytes([PhysicalId.ID1]) + frame))
+        self.assertEqual(0, len(self.frames))
+
+    # The echo buffer is sized for the longest encoded frame, whatever the receive buffer size.
+    def test_small_rx_buffer_escaped_echo(self):
+        uarts = []
+        pumper = SportPumper(
+            None, None, transport=fake_transport(uarts, echo=True), rx_buffer_len=8
+        )
+        self.assertEqual(8, uarts[0].buffer_len)
+        # Every byte of the frame needs escaping.
+        frame = pumper._frame_encoder.get_frame()
+        frame.buffer[:] = _START * len(frame.buffer)
+        encoded = pumper._frame_encoder.encode()
+        pumper._write(encoded)
+        verifier = pumper.get_echo_verifier()
+        self.assertEqual((1, len(encoded), 0, 0), verifier.get_summary()[:4])
+        self.assertEqual(b"", uarts[0].rx)
+
+
+if __name__ == '__main__':
+    unittest.main()
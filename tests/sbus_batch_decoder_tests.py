@@ -0,0 +1,42 @@
+import unittest
+
+from sbus.sbus_batch_decoder import decode_capture, find_frames
+from sbus_frame_tests import TEST_FRAMES
+
+
+class SbusBatchDecoderTests(unittest.TestCase):
+    def test_decode_capture(self):
+        # Leading and trailing partial frames should be ignored.
+        capture = b"\x12\x00" + self._join(TEST_FRAMES) + b"\x0F\x01"
+
+        result = decode_capture(capture)
+
+        self.assertEqual(len(TEST_FRAMES), len(result.offsets))
+        self.assertEqual([2, 27, 52, 77], result.offsets.tolist())
+        self.assertEqual((len(TEST_FRAMES), 18), result.channels.shape)
+
+        for i, (_, expected, lost, safe) in enumerate(TEST_FRAMES):
+            actual = ":".join("{:03X}".format(ch) for ch in result.channels[i])
+            self.assertEqual(expected, actual)
+            self.assertEqual(lost, result.lost_frame[i])
+            self.assertEqual(safe, result.failsafe[i])
+
+    def test_overlapping_candidates(self):
+        # Make a frame that contains a start byte that's followed, 24 bytes later, by an end byte.
+        frame = bytearray(self._join(TEST_FRAMES[:1]))
+        frame[10] = 0x0F
+        capture = bytes(frame) + bytes(10) + self._join(TEST_FRAMES[1:2])
+
+        self.assertEqual([0, 35], find_frames(capture).tolist())
+
+    def test_empty_capture(self):
+        result = decode_capture(b"")
+        self.assertEqual((0, 18), result.channels.shape)
+
+    @staticmethod
+    def _join(frames):
+        return b"".join(bytes.fromhex(f[0].replace(":", "")) for f in frames)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import unittest
+
+from host.selector_pump_master import SelectorPumpMaster
+from host.serial_transport import create_serial_transport, open_pty_pair
+
+
+# A pumper, reading from a pseudo-terminal, that records what it receives each time it's pumped.
+class _Pumper:
+    def __init__(self, test):
+        self.controller, peripheral, path = open_pty_pair()
+        test.addCleanup(os.close, peripheral)
+        test.addCleanup(os.close, self.controller)
+        self._transport = create_serial_transport(path, path, 57600, 0)
+        test.addCleanup(self._transport.close)
+        self._buffer = bytearray(8)
+        self.received = []
+
+    def fileno(self):
+        return self._transport.fileno()
+
+    def pump(self):
+        count = self._transport.readinto(self._buffer)
+        self.received.append(bytes(self._buffer[:count]) if count else None)
+
+
+class _Task:
+    def __init__(self):
+        self.work = 0
+        self.pumped = 0
+
+    def has_work(self):
+        return self.work > 0
+
+    def pump(self):
+        self.pumped += 1
+        if self.work:
+            self.work -= 1
+
+
+class SelectorPumpMasterTests(unittest.TestCase):
+    def setUp(self):
+        self.master = SelectorPumpMaster()
+        self.addCleanup(self.master.close)
+        self.a = _Pumper(self)
+        self.b = _Pumper(self)
+        self.master.register(self.a)
+        self.master.register(self.b)
+        self.task = _Task()
+        self.master.register_background(self.task)
+
+    def test_pumps_readable(self):
+        os.write(self.b.controller, b"xyz")
+        self.master.pump_all(timeout=1)
+        self.assertEqual([], self.a.received)
+        self.assertEqual([b"xyz"], self.b.received)
+
+    def test_nothing_readable(self):
+        self.master.pump_all(timeout=0.01)
+        self.assertEqual([], self.a.received)
+        self.assertEqual([], self.b.received)
+        # Background tasks are still pumped, e.g. so they can notice a deadline.
+        self.assertEqual(1, self.task.pumped)
+
+    def test_background_work(self):
+        # With no timeout, this would block forever if the pending work didn't stop it from waiting.
+        self.task.work = 2
+        self.master.pump_all()
+        self.master.pump_all()
+        self.assertEqual(0, self.task.work)
+        self.assertEqual([], self.a.received)
+
+        os.write(self.a.controller, b"a")
+        self.master.pump_all()
+        self.assertEqual([b"a"], self.a.received)
+        self.assertEqual(3, self.task.pumped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+from sensor.scheduler import SensorScheduler
+from sensor.sensor import Sensor
+from sport.frame import Frame
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class SensorSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.scheduler = SensorScheduler(self.clock)
+        self.frame = Frame()
+
+    def _sent_id(self):
+        if not self.scheduler.write_frame(self.frame):
+            return None
+        return int.from_bytes(self.frame.payload[0:2], "little")
+
+    def _run(self, slots, step=1):
+        counts = {}
+        for _ in range(slots):
+            sensor_id = self._sent_id()
+            counts[sensor_id] = counts.get(sensor_id, 0) + 1
+            self.clock.now += step
+        return counts
+
+    def test_weights(self):
+        self.scheduler.add(Sensor(1, lambda: 0), weight=3)
+        self.scheduler.add(Sensor(2, lambda: 0), weight=1)
+        counts = self._run(400)
+        self.assertEqual({1: 300, 2: 100}, counts)
+
+    def test_priority_and_rate(self):
+        # The high priority sensor is limited to 10 per second, the remaining slots go to the other sensor.
+        self.scheduler.add(Sensor(1, lambda: 0), priority=1, rate=10)
+        self.scheduler.add(Sensor(2, lambda: 0))
+        counts = self._run(1000, step=10)  # 10 seconds of slots every 10ms.
+        self.assertEqual({1: 100, 2: 900}, counts)
+
+    def test_threshold(self):
+        value = [100]
+        self.scheduler.add(Sensor(1, lambda: value[0]), threshold=5, max_interval=1000)
+
+        self.assertEqual(1, self._sent_id())
+        value[0] = 104
+        self.assertIsNone(self._sent_id())
+        self.clock.now += 1
+        value[0] = 106
+        self.assertEqual(1, self._sent_id())
+
+        # An unchanged value is still sent once `max_interval` has passed.
+        self.clock.now += 1000
+        self.assertEqual(1, self._sent_id())
+
+    def test_empty(self):
+        self.assertIsNone(self._sent_id())
+
+
+if __name__ == '__main__':
+    unittest.main()
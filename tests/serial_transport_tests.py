@@ -0,0 +1,41 @@
+import os
+import select
+import unittest
+
+from host.serial_transport import create_serial_transport, open_pty_pair
+
+
+class SerialTransportTests(unittest.TestCase):
+    def setUp(self):
+        self.controller, peripheral, path = open_pty_pair()
+        self.addCleanup(os.close, peripheral)
+        self.addCleanup(os.close, self.controller)
+        self.transport = create_serial_transport(path, path, 57600, 0)
+        self.addCleanup(self.transport.close)
+        self.buffer = bytearray(8)
+
+    def test_readinto_empty(self):
+        # Like `busio.UART`, this returns immediately, with `None`, if nothing has been received.
+        self.assertEqual(0, self.transport.in_waiting)
+        self.assertIsNone(self.transport.readinto(self.buffer))
+
+    def test_readinto(self):
+        os.write(self.controller, b"abc")
+        # The pseudo-terminal passes data on asynchronously.
+        select.select([self.transport], [], [], 1)
+        self.assertEqual(3, self.transport.in_waiting)
+        self.assertEqual(3, self.transport.readinto(self.buffer))
+        self.assertEqual(b"abc", self.buffer[:3])
+        self.assertIsNone(self.transport.readinto(self.buffer))
+
+    def test_write(self):
+        self.transport.write(memoryview(b"abcdef")[1:4])
+        self.assertEqual(b"bcd", os.read(self.controller, 8))
+
+    def test_different_devices(self):
+        with self.assertRaises(ValueError):
+            create_serial_transport("/dev/ttyS0", "/dev/ttyS1", 57600, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from util import slot_stats
+from util.slot_stats import SlotStats
+
+_ID_A = 0x1B
+_ID_B = 0x0D
+
+
+# A clock that only moves when told to, in microseconds.
+class _Clock:
+    def __init__(self):
+        self.now = 0
+
+    def advance(self, us):
+        self.now += us * 1000
+
+    def monotonic_ns(self):
+        return self.now
+
+
+class SlotStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch.object(
+            slot_stats.time, "monotonic_ns", self.clock.monotonic_ns
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stats = SlotStats(capacity=3, bucket_us=100, bucket_count=4)
+        self.stats.add_id(_ID_A)
+        self.stats.add_id(_ID_B)
+
+    # Run a slot that takes 10us per stage, up to and including `last_stage`, and then `extra_us` to finish.
+    def _slot(self, physical_id, last_stage=SlotStats.ECHO, extra_us=0):
+        stats = self.stats
+        stats.start(physical_id)
+        for stage in range(SlotStats.WRITE_FRAME, last_stage + 1):
+            self.clock.advance(10)
+            stats.mark(stage)
+        self.clock.advance(extra_us)
+        stats.finish()
+
+    def _recent(self):
+        return [(i, list(durations)) for i, durations in self.stats.get_recent()]
+
+    def test_stages(self):
+        self._slot(_ID_A)
+        self._slot(_ID_B, last_stage=SlotStats.WRITE_FRAME)
+        self.assertEqual(
+            [(_ID_A, [0, 10, 20, 30, 40]), (_ID_B, [0, 10, -1, -1, -1])],
+            self._recent(),
+        )
+
+    def test_summary(self):
+        self._slot(_ID_A)
+        self._slot(_ID_A, extra_us=200)
+        self.stats.not_clear(_ID_A)
+        self.assertEqual((2, 40, 140, 240, 1), self.stats.get_summary(_ID_A))
+        self.assertEqual((0, 0, 0, 0, 0), self.stats.get_summary(_ID_B))
+        # The last bucket also holds everything longer.
+        self.assertEqual([1, 0, 1, 0], list(self.stats.get_histogram(_ID_A)))
+        self._slot(_ID_A, extra_us=1000)
+        self.assertEqual([1, 0, 1, 1], list(self.stats.get_histogram(_ID_A)))
+
+    def test_wrap_around(self):
+        for physical_id in (1, 2, 3, 4, 5):
+            self.stats.add_id(physical_id)
+            self._slot(physical_id, extra_us=physical_id)
+        self.assertEqual([3, 4, 5], [i for i, _ in self._recent()])
+
+    def test_reset(self):
+        self._slot(_ID_A)
+        self._slot(_ID_B)
+        self.stats.not_clear(_ID_A)
+        histogram = self.stats.get_histogram(_ID_A)
+        self.stats.reset()
+        self.assertEqual([], self._recent())
+        # The stats are zeroed in place rather than reallocated.
+        self.assertIs(histogram, self.stats.get_histogram(_ID_A))
+        self.assertEqual((0, 0, 0, 0, 0), self.stats.get_summary(_ID_A))
+        self.assertEqual([0, 0, 0, 0], list(self.stats.get_histogram(_ID_A)))
+
+        # Recording starts again from the beginning of the ring.
+        for _ in range(4):
+            self._slot(_ID_B, last_stage=SlotStats.ENCODE)
+        self.assertEqual([(_ID_B, [0, 10, 20, -1, -1])] * 3, self._recent())
+
+    def test_dump(self):
+        self._slot(_ID_A)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.stats.dump(lambda physical_id: "ID{}".format(physical_id))
+        lines = output.getvalue().splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertEqual(
+            "ID27: count=1 min=40us avg=40us max=40us not_clear=0", lines[0]
+        )
+        self.assertEqual("    histogram (100us buckets): 1 0 0 0", lines[1])
+        self.assertTrue(lines[2].startswith("ID13: count=0"))
+
+
+if __name__ == '__main__':
+    unittest.main()
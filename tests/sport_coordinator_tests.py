@@ -0,0 +1,85 @@
+import unittest
+
+from host.msp_client import DirectPumper
+from msp.command.core import MspApiVersionCommand
+from sensor.sensor import Sensor
+from sport.coordinator import SportCoordinator, TransmitRole
+from sport.frame import FrameId
+from sport.physical_id import PhysicalId
+
+_API_VERSION = MspApiVersionCommand.COMMAND_API_VERSION
+_MSP_ID = PhysicalId.ID27
+_SENSOR_IDS = (PhysicalId.ID24, PhysicalId.ID25)
+
+
+class SportCoordinatorRoleTests(unittest.TestCase):
+    def _create(self, **kwargs):
+        self.pumper = DirectPumper()
+        coordinator = SportCoordinator(self.pumper, **kwargs)
+        coordinator.set_sensors([Sensor(0x5900, lambda: 42)])
+        coordinator.set_commands({_API_VERSION: MspApiVersionCommand()})
+        return coordinator
+
+    # Returns the ID of the frame sent by `physical_id` or `None` if it has nothing to send.
+    def _next_id(self, physical_id):
+        del self.pumper.frame_ids[:]
+        if self.pumper.next_payload(physical_id) is None:
+            return None
+        return self.pumper.frame_ids[0]
+
+    def test_default(self):
+        self._create()
+        self.assertEqual([PhysicalId.ID27], list(self.pumper.publishers))
+        self.assertEqual([PhysicalId.ID13], list(self.pumper.subscribers))
+        self.assertEqual(FrameId.SENSOR, self._next_id(PhysicalId.ID27))
+        self.pumper.send_request(_API_VERSION, b"")
+        self.assertEqual(FrameId.MSP_SERVER, self._next_id(PhysicalId.ID27))
+
+    def test_msp_only(self):
+        self._create(transmit_roles={_MSP_ID: TransmitRole.MSP})
+        # The slot is left unused rather than filled with a sensor.
+        self.assertIsNone(self._next_id(_MSP_ID))
+        self.pumper.send_request(_API_VERSION, b"")
+        self.assertEqual(FrameId.MSP_SERVER, self._next_id(_MSP_ID))
+        self.assertIsNone(self._next_id(_MSP_ID))
+
+    def test_sensors_only(self):
+        roles = {_MSP_ID: TransmitRole.MSP, PhysicalId.ID24: TransmitRole.SENSORS}
+        self._create(transmit_roles=roles)
+        self.pumper.send_request(_API_VERSION, b"")
+        # The pending response doesn't take the sensor slot.
+        self.assertEqual(FrameId.SENSOR, self._next_id(PhysicalId.ID24))
+        self.assertEqual(FrameId.MSP_SERVER, self._next_id(_MSP_ID))
+
+    def test_shared_msp_id(self):
+        roles = SportCoordinator.dedicated_msp_roles(_MSP_ID, _SENSOR_IDS)
+        self.assertEqual(TransmitRole.SHARED, roles[_MSP_ID])
+        for physical_id in _SENSOR_IDS:
+            self.assertEqual(TransmitRole.SENSORS, roles[physical_id])
+
+        self._create(transmit_roles=roles)
+        self.assertEqual(
+            {_MSP_ID} | set(_SENSOR_IDS), set(self.pumper.publishers.keys())
+        )
+        self.assertEqual(FrameId.SENSOR, self._next_id(_MSP_ID))
+
+    def test_dedicated_msp_id(self):
+        roles = SportCoordinator.dedicated_msp_roles(
+            _MSP_ID, _SENSOR_IDS, share_msp_id=False
+        )
+        self.assertEqual(TransmitRole.MSP, roles[_MSP_ID])
+
+        self._create(transmit_roles=roles)
+        self.assertIsNone(self._next_id(_MSP_ID))
+        self.assertEqual(FrameId.SENSOR, self._next_id(_SENSOR_IDS[0]))
+
+    def test_receive_id_collision(self):
+        with self.assertRaises(ValueError):
+            self._create(receive_id=PhysicalId.ID27)
+        roles = SportCoordinator.dedicated_msp_roles(_MSP_ID, _SENSOR_IDS)
+        with self.assertRaises(ValueError):
+            self._create(transmit_roles=roles, receive_id=_SENSOR_IDS[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
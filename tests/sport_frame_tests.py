@@ -0,0 +1,95 @@
+import random
+import unittest
+
+from sport.control_code import SportControlCode as Code
+from sport.frame import FrameDecoder, FrameEncoder, Checksum
+
+
+# The original byte-at-a-time encoding logic - used as a reference for `FrameEncoder`.
+def reference_encode(frame_bytes):
+    encoded = bytearray()
+
+    def append(b):
+        if b == Code.ESCAPE or b == Code.START:
+            encoded.append(Code.ESCAPE)
+            b ^= Code.ESCAPE_XOR
+        encoded.append(b)
+
+    for b in frame_bytes:
+        append(b)
+    append(Checksum.calculate(sum(frame_bytes)))
+
+    return bytes(encoded)
+
+
+class FrameEncoderTests(unittest.TestCase):
+    def test_no_escape(self):
+        encoder = FrameEncoder()
+        encoder.get_frame().buffer[:] = b"\x10\x00\x04\x00\x00\x00\x00"
+        self.assertEqual(b"\x10\x00\x04\x00\x00\x00\x00\xeb", encoder.encode())
+
+    def test_escape(self):
+        encoder = FrameEncoder()
+        encoder.get_frame().buffer[:] = b"\x32\x7e\x01\x7d\x00\x00\x00"
+        expected = reference_encode(b"\x32\x7e\x01\x7d\x00\x00\x00")
+        self.assertEqual(b"\x32\x7d\x5e\x01\x7d\x5d", expected[:6])
+        self.assertEqual(expected, encoder.encode())
+
+    def test_matches_reference(self):
+        rng = random.Random(0)
+        encoder = FrameEncoder()
+        buffer = encoder.get_frame().buffer
+        # Bias the values so that escaping (of both the frame and the checksum) is common.
+        values = [0x7D, 0x7E, 0x00, 0xFF] + list(range(256))
+        for _ in range(10000):
+            frame_bytes = bytes(rng.choice(values) for _ in range(len(buffer)))
+            buffer[:] = frame_bytes
+            self.assertEqual(reference_encode(frame_bytes), encoder.encode())
+
+    def test_round_trip(self):
+        encoder = FrameEncoder()
+        encoder.get_frame().buffer[:] = b"\x30\x7e\x7d\x01\x02\x03\x04"
+        decoder = FrameDecoder()
+        frame = None
+        for b in encoder.encode():
+            frame = decoder.decode(b)
+        self.assertEqual(b"\x30\x7e\x7d\x01\x02\x03\x04", frame.buffer)
+
+
+class FrameDecoderTests(unittest.TestCase):
+    def test_decode_into_matches_decode(self):
+        rng = random.Random(0)
+        encoder = FrameEncoder()
+        buffer = encoder.get_frame().buffer
+        values = [0x7D, 0x7E, 0x00, 0xFF] + list(range(256))
+        for _ in range(2000):
+            frame_bytes = bytes(rng.choice(values) for _ in range(len(buffer)))
+            buffer[:] = frame_bytes
+            encoded = bytes(encoder.encode())
+
+            # Split the encoded frame at a random point.
+            split = rng.randrange(len(encoded) + 1)
+            decoder = FrameDecoder()
+            frame, consumed = decoder.decode_into(memoryview(encoded[:split]))
+            self.assertEqual(split, consumed)
+            if frame is None:
+                frame, consumed = decoder.decode_into(memoryview(encoded), split)
+                self.assertEqual(len(encoded) - split, consumed)
+            self.assertEqual(frame_bytes, frame.buffer)
+
+    def test_decode_into_stops_at_start(self):
+        decoder = FrameDecoder()
+        frame, consumed = decoder.decode_into(memoryview(b"\x10\x01\x7E\x1B"))
+        self.assertIsNone(frame)
+        self.assertEqual(2, consumed)
+
+    def test_decode_into_invalid_checksum(self):
+        decoder = FrameDecoder()
+        data = b"\x10\x00\x04\x00\x00\x00\x00\xEC\x7E"
+        frame, consumed = decoder.decode_into(memoryview(data))
+        self.assertIs(FrameDecoder.INVALID_FRAME, frame)
+        self.assertEqual(8, consumed)
+
+
+if __name__ == '__main__':
+    unittest.main()
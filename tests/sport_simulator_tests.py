@@ -0,0 +1,74 @@
+import unittest
+
+from host.sport_simulator import MspClient, SportBusSimulator
+from msp.command.core import MspApiVersionCommand
+from sensor.demo import create_demo_1_sensor
+from sport.coordinator import SportCoordinator
+from sport.physical_id import PhysicalId
+
+_API_VERSION = MspApiVersionCommand.COMMAND_API_VERSION
+_FOREIGN_IDS = (PhysicalId.ID1, PhysicalId.ID2)
+
+
+def _create(msp_client=None, **kwargs):
+    simulator = SportBusSimulator(
+        foreign_ids=_FOREIGN_IDS, msp_client=msp_client, **kwargs
+    )
+    coordinator = SportCoordinator(simulator.pumper)
+    coordinator.set_sensors([create_demo_1_sensor()])
+    coordinator.set_commands({_API_VERSION: MspApiVersionCommand()})
+    return simulator
+
+
+class SportSimulatorTests(unittest.TestCase):
+    def test_sensors(self):
+        simulator = _create()
+        simulator.run(1000)
+        # One poll of our ID every 4 slots of 12ms.
+        self.assertEqual(21, simulator.polls)
+        self.assertEqual(1.0, simulator.get_hit_rate())
+        self.assertEqual(simulator.polls, simulator.sensor_frames)
+        self.assertEqual(0, simulator.collisions)
+        verifier = simulator.pumper.get_echo_verifier()
+        self.assertEqual(simulator.polls, verifier.frames)
+        self.assertEqual(0, verifier.mismatches + verifier.timeouts)
+
+    def test_msp(self):
+        client = MspClient(_API_VERSION)
+        simulator = _create(client)
+        simulator.run(2000)
+        self.assertGreater(client.responses, 0)
+        self.assertEqual(0, client.errors)
+        # The API version response is 3 bytes.
+        self.assertEqual(3 * client.responses, client.response_bytes)
+        # The request is sent in the last slot of the cycle and the response, a single frame, in the first slot of
+        # the next cycle.
+        self.assertEqual(client.latency_min, client.latency_max)
+        self.assertLess(client.get_average_latency(), 2 * 12 * 10**6)
+
+    def test_deterministic(self):
+        results = []
+        for _ in range(2):
+            client = MspClient(_API_VERSION)
+            simulator = _create(
+                client, stall_ns=20 * 10**6, stall_interval_ns=70 * 10**6
+            )
+            simulator.run(2000)
+            results.append(
+                (simulator.polls, simulator.hits, simulator.now, client.latency_total)
+            )
+        self.assertEqual(results[0], results[1])
+
+    def test_stalls(self):
+        simulator = _create(
+            stall_ns=20 * 10**6, stall_interval_ns=70 * 10**6, rx_buffer_len=8
+        )
+        simulator.run(2000)
+        self.assertGreater(simulator.stalls, 0)
+        self.assertLess(simulator.get_hit_rate(), 1.0)
+        # Foreign frames arriving during stalls overflow the small receive buffer.
+        self.assertGreater(simulator.get_overflow_bytes(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from config.vtx import VtxConfig
+from config.vtx_table import VtxTable, compile_table
+
+
+class VtxTableTests(unittest.TestCase):
+    def setUp(self):
+        with open("vtx_table.json") as f:
+            self.expected = json.load(f)["vtx_table"]
+        self._dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._dir.name, "vtx_table.bin")
+        with open(self.filename, "wb") as f:
+            f.write(compile_table("vtx_table.json"))
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _check(self, table):
+        bands = self.expected["bands_list"]
+        levels = self.expected["powerlevels_list"]
+        self.assertEqual(len(bands), table.band_count)
+        self.assertEqual(len(levels), table.level_count)
+
+        for i, band in enumerate(bands):
+            self.assertEqual(band["name"].encode(), bytes(table.get_band_name(i)))
+            self.assertEqual(ord(band["letter"]), table.get_band_letter(i))
+            self.assertEqual(band["is_factory_band"], table.is_factory_band(i))
+            frequencies = band["frequencies"]
+            self.assertEqual(len(frequencies), table.get_frequency_count(i))
+            for channel, freq in enumerate(frequencies):
+                self.assertEqual(freq, table.get_freq(i, channel))
+
+        for i, level in enumerate(levels):
+            self.assertEqual(level["value"], table.get_level_value(i))
+            self.assertEqual(level["label"].encode(), bytes(table.get_level_label(i)))
+
+        with self.assertRaises(IndexError):
+            table.get_band_name(len(bands))
+
+    def test_json(self):
+        self._check(VtxTable("vtx_table.json"))
+
+    def test_binary(self):
+        self._check(VtxTable(self.filename))
+
+    def test_find_band_channel(self):
+        table = VtxTable(self.filename)
+        for band in range(table.band_count):
+            for channel in range(table.get_frequency_count(band)):
+                freq = table.get_freq(band, channel)
+                if freq == 0:
+                    continue
+                found_band, found_channel = table.find_band_channel(freq)
+                self.assertEqual(freq, table.get_freq(found_band, found_channel))
+                # Duplicates resolve to the lowest band and channel.
+                self.assertLessEqual(
+                    found_band * table.channel_count + found_channel,
+                    band * table.channel_count + channel,
+                )
+
+        self.assertIsNone(table.find_band_channel(0))
+        self.assertIsNone(table.find_band_channel(5801))
+        self.assertIsNone(table.find_band_channel(6000))
+
+    def test_bad_magic(self):
+        with open(self.filename, "r+b") as f:
+            f.write(b"JUNK")
+        with self.assertRaises(ValueError):
+            VtxTable(self.filename)
+
+
+class VtxConfigTests(unittest.TestCase):
+    def test_set_frequency_resolves_band_channel(self):
+        config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        band, channel = config.table.find_band_channel(5800)
+
+        config.set_frequency(freq=5800)
+        self.assertEqual(
+            (band + 1, channel + 1, 5800), (config.band, config.channel, config.freq)
+        )
+
+        config.set_frequency(freq=5801)
+        self.assertEqual((0, 0, 5801), (config.band, config.channel, config.freq))
+
+    def test_round_trip(self):
+        config = VtxConfig("../vtx_config.json", "vtx_table.json")
+        config.set_frequency(freq=5801)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "vtx_config.bin")
+            store = json.loads(config.serialize())
+            store["type"] = config.type
+            with open(filename, "wb") as f:
+                f.write(VtxConfig.pack(store))
+
+            loaded = VtxConfig(filename, "vtx_table.json")
+            self.assertEqual(config.type, loaded.type)
+            self.assertEqual(True, loaded.pit_mode)
+            self.assertEqual(5801, loaded.freq)
+
+            # Saves are written back in binary.
+            loaded.power = 2
+            loaded.save()
+            self.assertEqual(2, VtxConfig(filename, "vtx_table.json").power)
+
+    def test_unusable_binary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "vtx_config.bin")
+            shutil.copy(
+                "../vtx_config.json", os.path.join(directory, "vtx_config.json")
+            )
+            expected = VtxConfig("../vtx_config.json", "vtx_table.json")
+            store = json.loads(expected.serialize())
+            store["type"] = expected.type
+            data = VtxConfig.pack(store)
+            stale = bytearray(data)
+            stale[4] = VtxConfig.VERSION + 1
+
+            # Missing, truncated and a different version all fall back to the JSON file.
+            for contents in (None, data[:-1], stale):
+                if contents is not None:
+                    with open(filename, "wb") as f:
+                        f.write(contents)
+                config = VtxConfig(filename, "vtx_table.json")
+                self.assertEqual(expected.freq, config.freq)
+                self.assertEqual(expected.power, config.power)
+
+            # Saving replaces the unusable binary file.
+            config.save()
+            with open(filename, "rb") as f:
+                self.assertEqual(expected.freq, VtxConfig.unpack(f.read())["freq"])
+
+    def test_interrupted_save(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "vtx_config.bin")
+            config = VtxConfig("../vtx_config.json", "vtx_table.json")
+            store = json.loads(config.serialize())
+            store["type"] = config.type
+            store["power"] = 3
+            # Only the temporary file was left, e.g. power was lost just before it was renamed.
+            with open(filename + ".tmp", "wb") as f:
+                f.write(VtxConfig.pack(store))
+            self.assertEqual(3, VtxConfig(filename, "vtx_table.json").power)
+            self.assertTrue(os.path.exists(filename))
+
+    def test_unpack_length(self):
+        with self.assertRaises(ValueError):
+            VtxConfig.unpack(b"VTXC\x01")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import contextlib
+import io
+import os
+import time
+import unittest
+
+from app.main import Main
+from host.select_wait import SelectWait
+from util.blocking_reader import BlockingReader
+from util.echo_verifier import EchoVerifier
+from util.wait_strategy import SleepWait, SpinWait, SpinYieldWait
+
+from helpers import FakeUart, fake_transport
+
+_BAUD_RATE = 57600
+_SBUS_FRAME = b"\x0f" + bytes(range(0x20, 0x36)) + b"\x00\x00"
+
+
+# Nothing is available until `release` is called, e.g. by a wait strategy.
+class _Stream(FakeUart):
+    def __init__(self):
+        super().__init__()
+        self.pending = b""
+
+    def release(self):
+        self.rx += self.pending
+        self.pending = b""
+
+
+# Records the timeouts it's called with and releases the stream's data after `delay` calls.
+class _RecordingWait(SpinWait):
+    def __init__(self, delay=1):
+        self.delay = delay
+        self.timeouts = []
+
+    def wait(self, stream, timeout):
+        self.timeouts.append(timeout)
+        if len(self.timeouts) == self.delay:
+            stream.release()
+
+
+class WaitStrategyTests(unittest.TestCase):
+    def test_spin_yield(self):
+        yields = []
+        wait = SpinYieldWait(spin_count=3, on_yield=lambda: yields.append(1))
+        for _ in range(5):
+            wait.wait(None, -1)
+        self.assertEqual(2, len(yields))
+        wait.start()
+        wait.wait(None, -1)
+        self.assertEqual(2, len(yields))
+
+    def test_sleep(self):
+        wait = SleepWait(_BAUD_RATE)
+        start = time.monotonic_ns()
+        wait.wait(None, 2000000)
+        self.assertGreaterEqual(time.monotonic_ns() - start, 2000000)
+
+    def test_select(self):
+        r, w = os.pipe()
+        try:
+            wait = SelectWait()
+            start = time.monotonic_ns()
+            wait.wait(r, 2000000)
+            self.assertGreaterEqual(time.monotonic_ns() - start, 2000000)
+
+            os.write(w, b"x")
+            start = time.monotonic_ns()
+            wait.wait(r, -1)  # Returns immediately as the pipe is readable.
+            self.assertLess(time.monotonic_ns() - start, 1000000000)
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_blocking_reader_indefinite(self):
+        stream = _Stream()
+        stream.pending = b"\x42"
+        wait = _RecordingWait(delay=3)
+        self.assertEqual(0x42, BlockingReader(wait=wait).read(stream))
+        self.assertEqual([-1, -1, -1], wait.timeouts)
+
+    def test_blocking_reader_timeout(self):
+        wait = _RecordingWait(delay=0)
+        timeout = BlockingReader.calculate_timeout(_BAUD_RATE, 4)
+        self.assertIsNone(BlockingReader(timeout, wait=wait).read(_Stream()))
+        self.assertGreater(len(wait.timeouts), 0)
+        for t in wait.timeouts:
+            self.assertTrue(0 <= t <= timeout)
+
+    def test_echo_verifier(self):
+        stream = _Stream()
+        stream.pending = b"\x01\x02\x03"
+        wait = _RecordingWait()
+        verifier = EchoVerifier(_BAUD_RATE, 8, wait=wait)
+        self.assertTrue(verifier.verify(stream, b"\x01\x02\x03"))
+        self.assertEqual(2, verifier.reads)
+        # The first wait is for, at most, the transmission time of the whole echo.
+        self.assertLessEqual(
+            wait.timeouts[0], BlockingReader.calculate_timeout(_BAUD_RATE, 3)
+        )
+
+    # By default the S.Port pumper yields to the S.BUS pumper - the S.BUS frames are only printed later.
+    def test_main_sbus_yield_doesnt_print(self):
+        uarts = []
+        main = Main(
+            "sport",
+            "sport",
+            "sbus",
+            transport=fake_transport(uarts),
+            config_filename="../vtx_config.json",
+            table_filename="vtx_table.json",
+        )
+        pump_master = main.setup()
+        sbus_uart = uarts[0]
+        sbus_uart.rx = _SBUS_FRAME
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main.get_sbus_pumper().pump()
+            self.assertEqual("", output.getvalue())
+            pump_master.pump_all()
+        self.assertIn("failsafe", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import builtins
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from config import write_behind
+from config.write_behind import WriteBehindSaver, recover_saved
+from msp.command.core import MspCommandError, MspSaveAllCommand
+
+
+class _Config:
+    def __init__(self, filename, data):
+        self._filename = filename
+        self.data = data
+
+    def get_filename(self):
+        return self._filename
+
+    def serialize(self):
+        return self.data
+
+
+class _BadConfig(_Config):
+    def serialize(self):
+        raise ValueError("can't serialize")
+
+
+# A file that runs out of space after its first write.
+class _FullFile:
+    def __init__(self, filename, mode):
+        self._file = builtins.open(filename, mode)
+        self._writes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self._file.close()
+
+    def write(self, data):
+        if self._writes:
+            raise OSError(28, "No space left on device")
+        self._writes += 1
+        self._file.write(data)
+
+
+class WriteBehindSaverTests(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self._dir.name, "config.json")
+        with open(self.filename, "w") as f:
+            f.write("old")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    @staticmethod
+    def _pump_until_done(saver):
+        steps = 0
+        while saver.has_work():
+            saver.pump()
+            steps += 1
+        return steps
+
+    def _read(self):
+        with open(self.filename) as f:
+            return f.read()
+
+    def test_incremental_save(self):
+        config = _Config(self.filename, b"x" * 200)
+        saver = WriteBehindSaver(chunk_len=64)
+
+        saver.request_save([config])
+        self.assertEqual(WriteBehindSaver.PENDING, saver.get_status())
+
+        # Nothing is written until pumped and the file is replaced in one go at the end.
+        saver.pump()
+        self.assertEqual("old", self._read())
+
+        # At least one increment per chunk.
+        self.assertGreater(self._pump_until_done(saver), 4)
+        self.assertEqual("x" * 200, self._read())
+        self.assertEqual(WriteBehindSaver.IDLE, saver.get_status())
+        self.assertEqual(1, saver.completed)
+
+    def test_coalescing(self):
+        config = _Config(self.filename, b"new")
+        saver = WriteBehindSaver()
+        saver.request_save([config])
+        saver.request_save([config])
+        self._pump_until_done(saver)
+        self.assertEqual(1, saver.completed)
+        self.assertEqual("new", self._read())
+
+    def test_failure(self):
+        config = _Config(os.path.join(self._dir.name, "missing", "config.json"), b"")
+        saver = WriteBehindSaver()
+        saver.request_save([config])
+        self._pump_until_done(saver)
+        self.assertEqual(WriteBehindSaver.FAILED, saver.get_status())
+        self.assertEqual(1, saver.failures)
+
+    def test_config_failure(self):
+        saver = WriteBehindSaver()
+        saver.request_save([_BadConfig(self.filename, b"")])
+        self._pump_until_done(saver)
+        self.assertEqual(WriteBehindSaver.FAILED, saver.get_status())
+        self.assertEqual("old", self._read())
+
+    def test_partial_write_removed(self):
+        config = _Config(self.filename, b"x" * 200)
+        saver = WriteBehindSaver(chunk_len=64)
+        saver.request_save([config])
+        with mock.patch.object(write_behind, "open", _FullFile, create=True):
+            self._pump_until_done(saver)
+        self.assertEqual(WriteBehindSaver.FAILED, saver.get_status())
+        self.assertEqual("old", self._read())
+        self.assertEqual(["config.json"], os.listdir(self._dir.name))
+
+    def test_failure_reported(self):
+        saver = WriteBehindSaver()
+        self.assertFalse(saver.request_save([_BadConfig(self.filename, b"")]))
+        self._pump_until_done(saver)
+        # The failure is reported once, by the next request.
+        self.assertTrue(saver.request_save([_Config(self.filename, b"new")]))
+        self.assertEqual(WriteBehindSaver.PENDING, saver.get_status())
+        self._pump_until_done(saver)
+        self.assertFalse(saver.request_save([]))
+
+    def test_recover_saved(self):
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w") as f:
+            f.write("new")
+        # The old file is still there, so the save didn't get as far as removing it - the temporary file may
+        # be incomplete.
+        self.assertEqual(self.filename, recover_saved(self.filename))
+        self.assertEqual("old", self._read())
+
+        # Interrupted between removing the old file and renaming the new one.
+        os.remove(self.filename)
+        with mock.patch.object(write_behind.os, "rename", side_effect=OSError(30)):
+            self.assertEqual(temp_filename, recover_saved(self.filename))
+        self.assertEqual(self.filename, recover_saved(self.filename))
+        self.assertEqual("new", self._read())
+        self.assertFalse(os.path.exists(temp_filename))
+
+
+class MspSaveAllCommandTests(unittest.TestCase):
+    def test_background_failure(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "config.json")
+            saver = WriteBehindSaver()
+            command = MspSaveAllCommand([_BadConfig(filename, b"")], saver)
+            command.handle_request(None, None)
+            WriteBehindSaverTests._pump_until_done(saver)
+            with self.assertRaises(MspCommandError):
+                command.handle_request(None, None)
+            # The save is retried.
+            self.assertEqual(WriteBehindSaver.PENDING, saver.get_status())
+
+
+if __name__ == '__main__':
+    unittest.main()